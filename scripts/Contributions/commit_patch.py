@@ -1,21 +1,43 @@
+import asyncio
 import os
-import time
+import sys
+from collections import Counter
 
 import pandas as pd
-import requests
 from dotenv import load_dotenv
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from crawler.async_client import AsyncGitHubClient  # noqa: E402
+from crawler.crawl_state import DONE, FAILED, MISSING, CrawlState  # noqa: E402
+from crawler.http_cache import HttpCache  # noqa: E402
+from crawler.sink import StreamingCsvWriter  # noqa: E402
+from crawler.token_pool import load_tokens  # noqa: E402
+
 # .envファイルを読み込む
 load_dotenv("config/.env")
 
-# GitHub API 認証情報
-GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
-HEADERS = {"Authorization": f"token {GITHUB_TOKEN}"}
+# GitHub API 認証情報（GITHUB_TOKENS にカンマ区切りで複数指定できる）
+GITHUB_TOKENS = load_tokens("GITHUB_TOKEN")
 
 # 各開発者のCSVが保存されているディレクトリ
 input_directory = "/Users/kazuki-h/newresearch/res/commit_history2"
 output_directory = "/Users/kazuki-h/newresearch/results/commit-diff"
-os.makedirs(output_directory, exist_ok=True)
+
+# 同時に送信するAPIリクエスト数の上限
+MAX_CONCURRENT_REQUESTS = 20
+
+# 一度に取得するコミット数と、出力CSVをディスクへ書き出す行数
+COMMIT_CHUNK = 200
+FLUSH_ROWS = 2000
+
+COLUMNS = ["commit_sha", "repo_name", "filename", "patch", "developer"]
+
+# 開発者ごとの進捗を記録する状態DB。再実行時は未完了の開発者だけを処理する
+state_db = "results/crawl_state.sqlite3"
+STATE_JOB = "commit_patch"
+
+# エンドポイントごとのリクエスト数・リトライ回数の保存先
+METRICS_FILE = "/Users/kazuki-h/newresearch/results/retry_metrics_commit_patch.csv"
 
 # ファイルを保存するディレクトリを作成する関数
 def ensure_directory_exists(file_path):
@@ -25,98 +47,164 @@ def ensure_directory_exists(file_path):
     parent_dir = os.path.dirname(file_path)
     os.makedirs(parent_dir, exist_ok=True)
 
-# GitHub API から変更ファイルの diff を取得
-def get_commit_patch(owner, repo, commit_sha, file_path, max_retries=5):
+# GitHub API からコミットの全ファイルの diff を取得
+async def get_commit_patches(client, repo, commit_sha):
     """
-    コミット SHA とファイル名を使って、そのファイルの変更内容（diff）を取得
-    一時的な接続エラーが発生した場合はリトライする
+    コミット詳細を1回だけ取得し、{ファイル名: patch} の辞書を返す。
+    files のないコミット（マージ・空コミット）は空の辞書、再試行を使い切っても取得できなかった場合は None を返す
     """
-    url = f"https://api.github.com/repos/{owner}/{repo}/commits/{commit_sha}"
-
-    for attempt in range(max_retries):
-        try:
-            response = requests.get(url, headers=HEADERS, timeout=10)
-
-            # 成功した場合
-            if response.status_code == 200:
-                commit_data = response.json()
-                for file in commit_data.get("files", []):
-                    if file["filename"] == file_path:
-                        return file.get("patch", "")
-                return None  # ファイルが見つからなかった場合
-
-            # APIレート制限 (403) の場合
-            elif response.status_code == 403:
-                reset_time = int(response.headers.get("X-RateLimit-Reset", time.time() + 60))
-                wait_time = reset_time - int(time.time())
-                print(f"⚠ APIのレート制限。{wait_time}秒待機... ({attempt+1}/{max_retries})")
-                time.sleep(max(wait_time, 1))  # 1秒以上待機
-
-            else:
-                print(f"⚠ APIエラー: {response.status_code} ({attempt+1}/{max_retries})")
-                time.sleep(5)
-
-        except requests.exceptions.ConnectionError:
-            print(f"⚠ 接続エラー。10秒待機して再試行 ({attempt+1}/{max_retries})")
-            time.sleep(10)
-
-        except requests.exceptions.Timeout:
-            print(f"⚠ タイムアウト。5秒待機して再試行 ({attempt+1}/{max_retries})")
-            time.sleep(5)
-
-    print("❌ 最大リトライ回数を超えました")
-    return None
-
-# フォルダ内のすべての開発者 CSV を処理
-for dev_filename in os.listdir(input_directory):
-    if dev_filename.endswith(".csv"):
-        filepath = os.path.join(input_directory, dev_filename)
-        developer_name = dev_filename.replace(".csv", "")  # 開発者名を取得
-
-        print(f"📂 Processing developer: {developer_name} ({dev_filename})")
-
-        # CSV を読み込む
-        df = pd.read_csv(filepath)
-
-        # `patch` カラムを追加するためのリスト
-        commit_patch_data = []
-
-        # 各コミットの変更ファイルを処理
-        for _, row in df.iterrows():
-            repo = row["repo"]  # "owner/repo" の形式
-            commit_sha = row["commit_sha"]
-            changed_files = row["changed_files"]
-
-            # `changed_files` の中に複数のファイルが含まれている場合があるため、リストに分割
-            file_list = [file.strip() for file in str(changed_files).split(",")]
+    status, commit_data = await client.get_json(f"/repos/{repo}/commits/{commit_sha}")
+    if status != 200:
+        print(f"⚠ コミット詳細を取得できませんでした: {repo}@{commit_sha} ({status})")
+        return None
+    return {file["filename"]: file.get("patch", "") for file in commit_data.get("files", [])}
 
-            # リポジトリ情報を分割
-            try:
-                owner, repo_name = repo.split("/")
-            except ValueError:
-                print(f"⚠ Invalid repo format: {repo}")
-                continue
-
-            for file_path in file_list:  # `filename` を `file_path` に変更
-                print(f"🔍 Fetching patch for {commit_sha} - {file_path} in {repo}...")
-
-                patch = get_commit_patch(owner, repo_name, commit_sha, file_path)
-
-                commit_patch_data.append([
-                    commit_sha, repo, file_path, patch, developer_name  # `developer` カラムを追加
-                ])
-
-            time.sleep(1)  # API制限回避のため遅延
-
-        # DataFrame に変換
-        commit_patch_df = pd.DataFrame(commit_patch_data, columns=["commit_sha", "repo_name", "filename", "patch", "developer"])
-
-        # **修正: `developer_name.csv` に統一**
-        output_csv = os.path.join(output_directory, f"{developer_name}.csv")
-        ensure_directory_exists(output_csv)  # ディレクトリを確認・作成
-
-        commit_patch_df.to_csv(output_csv, index=False, encoding="utf-8")
+def load_developer_csvs():
+    """
+    入力ディレクトリの開発者CSVを (開発者名, ファイルパス) のリストで返す
+    """
+    return [
+        (dev_filename.replace(".csv", ""), os.path.join(input_directory, dev_filename))
+        for dev_filename in sorted(os.listdir(input_directory))
+        if dev_filename.endswith(".csv")
+    ]
 
-        print(f"✅ 変更されたファイルの内容を追加し、保存しました: {output_csv}")
+def count_commit_references(developer_files):
+    """
+    複数の開発者CSVに同じコミットが現れる回数を数える。
+    全開発者が参照し終えたコミットは保持している patch を破棄できる
+    """
+    references = Counter()
+    for _, filepath in developer_files:
+        df = pd.read_csv(filepath, usecols=["repo", "commit_sha"])
+        references.update(set(zip(df["repo"], df["commit_sha"])))
+    return references
 
-print("🎉 すべての開発者のCSVに変更ファイルの内容を追加しました！")
+async def process_developer(client, developer_name, df, patch_cache, references, writer, renew=None):
+    """
+    1人の開発者のコミットについて、未取得のコミットだけを並行して取得し、
+    ファイルごとの patch 行を writer に書き込む。
+    COMMIT_CHUNK 件ずつ取得・書き込みを行うため、保持する patch は1チャンク分と他の開発者と共有するものだけになる。
+    files のないコミットはファイル名・patch が空の1行を書き込み、取得済みとして扱う。
+    取得できなかったコミットは書き込まずに (repo, commit_sha) のリストで返す（.partial から再開すると取り直す）。
+    renew を指定した場合はチャンクごとに呼び出す（状態DBの確保期限の延長）
+    """
+    written = writer.resume("commit_sha")
+    if written:
+        print(f"↩ {developer_name} の書き込み済み {len(written)} 件から再開します")
+
+    commits = []
+    for repo, commit_sha in df[["repo", "commit_sha"]].itertuples(index=False):
+        if len(str(repo).split("/")) != 2:
+            print(f"⚠ Invalid repo format: {repo}")
+            continue
+        if commit_sha in written:
+            # 前回の実行で書き込み済みのコミットは参照し終えたものとして扱う
+            release_commit(patch_cache, references, (repo, commit_sha))
+            continue
+        commits.append((repo, commit_sha))
+
+    # 他の開発者のCSVで取得済みのコミットは再取得しない
+    fetch_count = sum(1 for key in commits if key not in patch_cache)
+    print(f"🔍 Fetching {fetch_count} commits for {developer_name} ({len(commits) - fetch_count} reused)...")
+
+    failed = []
+    for start in range(0, len(commits), COMMIT_CHUNK):
+        chunk = commits[start:start + COMMIT_CHUNK]
+        to_fetch = list(dict.fromkeys(key for key in chunk if key not in patch_cache))
+        fetched = await asyncio.gather(*(get_commit_patches(client, repo, sha) for repo, sha in to_fetch))
+        patch_cache.update(zip(to_fetch, fetched))
+
+        for key in chunk:
+            repo, commit_sha = key
+            patches = patch_cache.get(key)
+            if patches is None:
+                failed.append(key)
+            elif patches:
+                writer.write_rows([[commit_sha, repo, file_path, patch, developer_name] for file_path, patch in patches.items()])
+            else:
+                writer.write_rows([[commit_sha, repo, None, None, developer_name]])
+            release_commit(patch_cache, references, key)
+
+        # 取得に失敗したコミットは保持せず、同じコミットを参照する他の開発者の処理で取り直す
+        for key in to_fetch:
+            if key in patch_cache and patch_cache[key] is None:
+                del patch_cache[key]
+        if renew is not None:
+            renew()
+    return failed
+
+def release_commit(patch_cache, references, key):
+    """
+    参照し終えたコミットはメモリから解放
+    """
+    references[key] -= 1
+    if references[key] <= 0:
+        patch_cache.pop(key, None)
+
+async def main():
+    os.makedirs(output_directory, exist_ok=True)
+    developer_files = load_developer_csvs()
+
+    state = CrawlState(state_db)
+    state.add(STATE_JOB, [developer_name for developer_name, _ in developer_files], ["patches"])
+    print(f"Crawl state before run: {state.summary(STATE_JOB)}")
+    # 前回までに完了した開発者のコミットは参照回数に数えない
+    done = set(state.items(STATE_JOB, DONE))
+    developer_files = [(developer_name, filepath) for developer_name, filepath in developer_files if developer_name not in done]
+    references = count_commit_references(developer_files)
+    total_rows = sum(references.values())
+    print(f"📊 {len(references)} unique commits across {len(developer_files)} developers ({total_rows} references)")
+
+    patch_cache = {}
+    # コミットSHA指定の詳細は不変なので、再実行時はキャッシュから返る
+    cache = HttpCache()
+    filepaths = dict(developer_files)
+    try:
+        async with AsyncGitHubClient(GITHUB_TOKENS, max_concurrency=MAX_CONCURRENT_REQUESTS, cache=cache) as client:
+            # 状態DBから未処理の開発者を1人ずつ確保して処理する（今回の実行で失敗した開発者は次回に再試行する）
+            while True:
+                claimed = state.claim(STATE_JOB, limit=1)
+                if not claimed:
+                    break
+                developer_name = next(iter(claimed))
+                filepath = filepaths.get(developer_name)
+                if filepath is None:
+                    # 以前の実行で登録したが、入力ディレクトリから CSV がなくなった開発者
+                    state.record(STATE_JOB, [(developer_name, "patches", MISSING, "input CSV not found")])
+                    continue
+                print(f"📂 Processing developer: {developer_name} ({os.path.basename(filepath)})")
+
+                # 同じコミットが1つのCSVに重複している場合も参照回数は1回として扱う
+                df = pd.read_csv(filepath).drop_duplicates(subset=["repo", "commit_sha"])
+
+                output_csv = os.path.join(output_directory, f"{developer_name}.csv")
+                ensure_directory_exists(output_csv)  # ディレクトリを確認・作成
+
+                writer = StreamingCsvWriter(output_csv, COLUMNS, flush_rows=FLUSH_ROWS)
+                failed = None
+                try:
+                    failed = await process_developer(
+                        client, developer_name, df, patch_cache, references, writer,
+                        renew=lambda: state.renew(STATE_JOB, [developer_name]),
+                    )
+                finally:
+                    # 例外や取得できなかったコミットがあれば .partial のまま残し、次回はその続きから取り直す
+                    writer.close(complete=failed == [])
+                if failed:
+                    print(f"❌ {developer_name} のコミット {len(failed)} 件の詳細を取得できませんでした")
+                    state.record(STATE_JOB, [(developer_name, "patches", FAILED, f"{len(failed)} commits failed")])
+                    continue
+                state.record(STATE_JOB, [(developer_name, "patches", DONE, None)])
+                print(f"✅ 変更されたファイルの内容を追加し、保存しました: {output_csv} ({writer.rows_written} 行)")
+
+            client.metrics.report()
+            client.metrics.save_csv(METRICS_FILE)
+    finally:
+        state.release(STATE_JOB)
+        print(f"Crawl state after run: {state.summary(STATE_JOB)}")
+
+    print("🎉 すべての開発者のCSVに変更ファイルの内容を追加しました！")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,24 +1,28 @@
+import asyncio
 import os
-import time
+import sys
 
 import pandas as pd
-import requests
 from dotenv import load_dotenv
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from crawler.async_client import AsyncGitHubClient  # noqa: E402
+from crawler.crawl_state import DONE, FAILED, CrawlState  # noqa: E402
+from crawler.http_cache import HttpCache  # noqa: E402
+from crawler.sink import StreamingCsvWriter  # noqa: E402
+from crawler.token_pool import load_tokens  # noqa: E402
+
 # .envファイルを読み込む
 load_dotenv("config/.env")
 
-# GitHub API 認証情報を.envから取得
-GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
-
-if not GITHUB_TOKEN:
-    raise ValueError("GITHUB_TOKEN が .env に設定されていません。")
+# GitHub API 認証情報を.envから取得（GITHUB_TOKENS にカンマ区切りで複数指定できる）
+GITHUB_TOKENS = load_tokens("GITHUB_TOKEN")
 
-HEADERS = {"Authorization": f"token {GITHUB_TOKEN}"}
+if not GITHUB_TOKENS:
+    raise ValueError("GITHUB_TOKEN または GITHUB_TOKENS が .env に設定されていません。")
 
 # 取得する開発者リストのCSVファイル
 developer_list_file = "/Users/kazuki-h/newresearch/results/B.csv"
-developers_df = pd.read_csv(developer_list_file)
 
 # 取得する日付範囲を指定
 SINCE_DATE = "2005-01-01T00:00:00Z"
@@ -26,84 +30,180 @@ UNTIL_DATE = "2024-12-31T23:59:59Z"
 
 # 保存フォルダを作成
 output_dir = "/Users/kazuki-h/newresearch/results/commit_history"
-os.makedirs(output_dir, exist_ok=True)
-
-# APIのレート制限を確認する関数
-def check_rate_limit(response):
-    if response.status_code == 403 and "X-RateLimit-Reset" in response.headers:
-        reset_time = int(response.headers["X-RateLimit-Reset"])
-        current_time = int(time.time())
-        wait_time = reset_time - current_time
-        if wait_time > 0:
-            print(f"⚠ APIのレート制限に達しました。{wait_time}秒待機します...")
-            time.sleep(wait_time + 1)
-        return True
-    return False
-
-# 各開発者のコミット履歴を取得し、個別のCSVに保存
-for developer in developers_df['developer'].dropna():
-    print(f"Fetching commits for {developer} from {SINCE_DATE} to {UNTIL_DATE}...")
-    commit_data = []  # 個別のリストを作成
+
+# 開発者ごとの進捗を記録する状態DB。再実行時は未完了の開発者だけを処理する
+state_db = "results/crawl_state.sqlite3"
+STATE_JOB = "commits"
+# エンドポイントごとのリクエスト数・リトライ回数の保存先
+METRICS_FILE = "results/retry_metrics_commits.csv"
+# 処理中の開発者の確保期限を延長する間隔（秒）。状態DBの lease_seconds（既定 1800 秒）より十分短くする
+LEASE_RENEW_SECONDS = 300
+
+# 同時に送信するAPIリクエスト数の上限と、並行して処理する開発者数
+MAX_CONCURRENT_REQUESTS = 20
+DEVELOPER_WORKERS = 4
+
+# この行数ごとに出力CSVをディスクへ書き出す
+FLUSH_ROWS = 500
+
+PER_PAGE = 100
+COLUMNS = ['developer', 'repo', 'commit_sha', 'commit_message', 'commit_date', 'changed_files']
+
+
+async def fetch_changed_files(client, repo_name, sha):
+    """
+    コミット詳細を取得し、変更ファイル名のリストを返す（files のないコミットは空のリスト）。
+    取得できなかった場合は例外にし、空のコミットとして書き込まずに開発者を FAILED にする
+    """
+    status, commit_details = await client.get_json(f"/repos/{repo_name}/commits/{sha}")
+    if status == 200:
+        return [file['filename'] for file in commit_details.get('files', [])]
+    raise RuntimeError(f"Error fetching files of {repo_name}@{sha}: {status}")
+
+
+def commit_row(developer, commit, changed_files):
+    return [
+        developer,
+        commit['repository']['full_name'],
+        commit['sha'],
+        commit['commit']['message'],
+        commit['commit']['committer']['date'],
+        ", ".join(changed_files)  # 変更ファイルをカンマ区切りで保存
+    ]
+
+
+async def write_page(writer, developer, pending):
+    """
+    1ページ分のコミット詳細の取得を待ち、検索結果の順に書き込む
+    """
+    for commit, task in pending:
+        writer.write_rows([commit_row(developer, commit, await task)])
+
+
+async def cancel_tasks(tasks):
+    """
+    完了していないタスクをキャンセルし、終了を待つ
+    """
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def fetch_developer_commits(client, developer, writer):
+    """
+    開発者のコミットを検索し、各コミットの変更ファイルを取得して writer に書き込む。
+    検索結果のページが届いた時点でコミット詳細の取得タスクを開始し、次のページの検索と並行させる。
+    前のページの行は次のページを検索している間に書き込むため、保持するのは高々2ページ分になる。
+    .partial に書き込み済みのコミットは詳細を取得し直さない
+    """
+    written = writer.resume("commit_sha")
+    if written:
+        print(f"↩ {developer} の書き込み済み {len(written)} 件から再開します")
+    previous, pending = [], []
     page = 1
 
+    try:
+        while True:
+            params = {
+                "q": f"author:{developer} committer-date:{SINCE_DATE}..{UNTIL_DATE}",
+                "sort": "committer-date",
+                "per_page": PER_PAGE,
+                "page": page,
+            }
+            status, data = await client.get_json("/search/commits", params=params)
+
+            if status == 422:
+                # 検索APIは1000件までしか返さないため、それ以降のページは 422 になる
+                print(f"⚠ {developer} の検索結果が上限に達しました (page {page})")
+                break
+            if status != 200:
+                raise RuntimeError(f"Error fetching {developer}: {status}")
+
+            commits = data.get('items', [])
+            pending = []
+            for commit in commits:
+                if commit['sha'] in written:
+                    continue
+                repo_name = commit['repository']['full_name']
+                task = asyncio.create_task(fetch_changed_files(client, repo_name, commit['sha']))
+                pending.append((commit, task))
+
+            await write_page(writer, developer, previous)
+            previous = pending
+
+            if len(commits) < PER_PAGE:
+                break
+            page += 1
+
+        await write_page(writer, developer, previous)
+    finally:
+        # 途中で例外になった場合も、開始済みのコミット詳細の取得を止める（裏で API の残量を使い続けないように）
+        await cancel_tasks([task for _, task in previous + pending])
+
+
+async def keep_lease(state, developer):
+    """
+    開発者の処理が終わるまで確保期限を定期的に延長する（長時間かかる開発者を別プロセスが再確保しないように）
+    """
     while True:
-        url = f"https://api.github.com/search/commits?q=author:{developer}+committer-date:{SINCE_DATE}..{UNTIL_DATE}&sort=committer-date&per_page=100&page={page}"
-        
-        response = requests.get(url, headers=HEADERS)
-
-        if check_rate_limit(response):
-            continue  # レート制限後に再試行
-
-        if response.status_code != 200:
-            print(f"Error fetching {developer}: {response.status_code}")
-            break
+        await asyncio.sleep(LEASE_RENEW_SECONDS)
+        state.renew(STATE_JOB, [developer])
 
-        commits = response.json().get('items', [])
-        if not commits:
-            break
 
-        for commit in commits:
-            sha = commit['sha']
-            repo_name = commit['repository']['full_name']
-            commit_message = commit['commit']['message']
-            commit_date = commit['commit']['committer']['date']
-
-            # 各コミットの変更ファイル情報を取得
-            commit_details_url = f"https://api.github.com/repos/{repo_name}/commits/{sha}"
-            commit_response = requests.get(commit_details_url, headers=HEADERS)
-
-            if check_rate_limit(commit_response):
-                continue  # レート制限後に再試行
-
-            if commit_response.status_code == 200:
-                commit_details = commit_response.json()
-                changed_files = [file['filename'] for file in commit_details.get('files', [])]
+async def developer_worker(client, state):
+    """
+    状態DBから未処理の開発者を1人ずつ確保して処理する。
+    別プロセスで同時に実行しても同じ開発者を重複して取得しない。
+    失敗した開発者は今回の実行では再確保せず、次回の実行で再試行する
+    """
+    while True:
+        claimed = state.claim(STATE_JOB, limit=1)
+        if not claimed:
+            return
+        developer = next(iter(claimed))
+        lease = asyncio.create_task(keep_lease(state, developer))
+        try:
+            print(f"Fetching commits for {developer} from {SINCE_DATE} to {UNTIL_DATE}...")
+            developer_filename = os.path.join(output_dir, f"{developer}.csv")
+            # 1行も見つからなかった開発者のCSVは作らない
+            with StreamingCsvWriter(developer_filename, COLUMNS, flush_rows=FLUSH_ROWS, write_empty=False) as writer:
+                await fetch_developer_commits(client, developer, writer)
+            if writer.rows_written:
+                print(f"✅ {developer} のコミット履歴を保存しました: {developer_filename} ({writer.rows_written} 件)")
             else:
-                print(f"⚠ ファイル情報を取得できませんでした: {commit_details_url}")
-                changed_files = []
-
-            commit_data.append([
-                developer,
-                repo_name,
-                sha,
-                commit_message,
-                commit_date,
-                ", ".join(changed_files)  # 変更ファイルをカンマ区切りで保存
-            ])
-
-        page += 1
-        time.sleep(1)
-
-    # DataFrame に変換
-    if commit_data:
-        commit_df = pd.DataFrame(commit_data, columns=['developer', 'repo', 'commit_sha', 'commit_message', 'commit_date', 'changed_files'])
-
-        # 各開発者ごとにCSV保存
-        developer_filename = os.path.join(output_dir, f"{developer}.csv")
-        commit_df.to_csv(developer_filename, index=False, encoding="utf-8")
-
-        print(f"✅ {developer} のコミット履歴を保存しました: {developer_filename}")
-    else:
-        print(f"⚠ {developer} のコミット履歴は見つかりませんでした。")
-
-print("🎉 すべてのコミット履歴の取得と保存が完了しました！")
\ No newline at end of file
+                print(f"⚠ {developer} のコミット履歴は見つかりませんでした。")
+            state.record(STATE_JOB, [(developer, "commits", DONE, None)])
+        except Exception as e:
+            print(f"❌ {developer} の処理中にエラーが発生しました: {e!r}")
+            state.record(STATE_JOB, [(developer, "commits", FAILED, repr(e))])
+        finally:
+            await cancel_tasks([lease])
+
+
+async def main():
+    os.makedirs(output_dir, exist_ok=True)
+    developers_df = pd.read_csv(developer_list_file)
+
+    state = CrawlState(state_db)
+    state.add(STATE_JOB, developers_df['developer'].dropna().unique(), ["commits"])
+    print(f"Crawl state before run: {state.summary(STATE_JOB)}")
+
+    # コミットSHA指定の詳細は不変なので、再実行時はキャッシュから返る
+    cache = HttpCache()
+    try:
+        async with AsyncGitHubClient(GITHUB_TOKENS, max_concurrency=MAX_CONCURRENT_REQUESTS, cache=cache) as client:
+            workers = [developer_worker(client, state) for _ in range(DEVELOPER_WORKERS)]
+            await asyncio.gather(*workers)
+
+            print(f"トークンごとの残量: {client.token_pool.summary()}")
+            client.metrics.report()
+            client.metrics.save_csv(METRICS_FILE)
+    finally:
+        state.release(STATE_JOB)
+        print(f"Crawl state after run: {state.summary(STATE_JOB)}")
+
+    print("🎉 すべてのコミット履歴の取得と保存が完了しました！")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,52 @@
+import os
+import time
+
+from tqdm import tqdm
+
+from dependency_parsers import PARSERS, find_manifests
+from document_builder import list_repositories
+
+# 計測に使うマニフェストを集めるディレクトリ（document.py と同じ）
+BASE_DIR = "/Users/kazuki-h/newresearch/results/dependencies_files"
+# 各パーサの計測の繰り返し回数（最も速かった回を採用する）
+REPEAT = 3
+
+
+def collect_manifests(base_dir):
+    """
+    全リポジトリのマニフェストを {ファイル名: [パス, ...]} で集める
+    """
+    manifests = {filename: [] for filename in PARSERS}
+    for repo in tqdm(list_repositories(base_dir), desc="Collecting manifests"):
+        for filename, path in find_manifests(os.path.join(base_dir, repo)).items():
+            manifests[filename].append(path)
+    return manifests
+
+
+def benchmark_parser(parser, paths, repeat=REPEAT):
+    """
+    paths の全ファイルを parser で解析する時間を repeat 回測り、最短の秒数を返す
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for path in paths:
+            parser(path)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    manifests = collect_manifests(BASE_DIR)
+    print(f"{'manifest':<20}{'files':>8}{'MB':>10}{'seconds':>10}{'MB/s':>10}")
+    for filename, paths in manifests.items():
+        if not paths:
+            continue
+        size_mb = sum(os.path.getsize(path) for path in paths) / (1 << 20)
+        seconds = benchmark_parser(PARSERS[filename], paths)
+        throughput = size_mb / seconds if seconds > 0 else float("inf")
+        print(f"{filename:<20}{len(paths):>8}{size_mb:>10.2f}{seconds:>10.3f}{throughput:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
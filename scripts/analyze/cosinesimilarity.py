@@ -1,9 +1,27 @@
 import os
-from gensim.models.doc2vec import Doc2Vec, TaggedDocument
+from gensim.models.doc2vec import TaggedDocument
 from tqdm import tqdm
-from sklearn.metrics.pairwise import cosine_similarity
 import csv
 
+from document_builder import DOCUMENTS_FILE, read_documents
+from model_registry import load_or_train
+from set_similarity import SparseSimilarityIndex
+from similarity_index import DEFAULT_INDEX_PATH, RepositorySimilarityIndex
+
+# 類似度の計算方法: "doc2vec"（Doc2Vec のベクトル）、"tfidf" / "binary"（依存パッケージ集合の疎行列）
+# doc2vec 以外では出力ファイル名の末尾に _tfidf などを付けるので、両方の結果を並べて比較できる
+SIMILARITY_BACKEND = "doc2vec"
+
+# 学習済み Doc2Vec モデルの保存先（similarity.py と共用）
+MODEL_DIR = "doc2vec_dependency_document"
+
+# 全リポジトリについて出力する近傍の件数
+TOP_K = 10
+# True なら全リポジトリの近傍を近似最近傍探索（doc2vec は IVF、tfidf / binary は MinHash-LSH）で求め、
+# 出力ファイル名の末尾に _approx を付ける。
+# リポジトリ数が多く、全組の類似度を求める厳密な計算が遅い場合に使う
+APPROXIMATE_TOP_K = False
+
 def main():
     # 各リポジトリのディレクトリが格納されているパス
     dependency_dir = "/Users/kazuki-h/newresearch/results/dependencies_files"
@@ -11,55 +29,65 @@ def main():
     documents = []
     repo_tags = []
     
-    # 各リポジトリディレクトリ内の "dependency_document.txt" を読み込み、TaggedDocument に変換
-    for repo_folder in tqdm(os.listdir(dependency_dir), desc="Processing repos for doc creation"):
-        repo_path = os.path.join(dependency_dir, repo_folder)
-        if os.path.isdir(repo_path):
-            doc_file = os.path.join(repo_path, "dependency_document.txt")
-            if os.path.exists(doc_file):
-                with open(doc_file, "r", encoding="utf-8") as f:
-                    doc = f.read()
-                tokens = doc.split()  # 単純なトークン化
-                if tokens:
-                    documents.append(TaggedDocument(words=tokens, tags=[repo_folder]))
-                    repo_tags.append(repo_folder)
-            else:
-                print(f"{doc_file} が見つかりませんでした。")
+    # document.py がまとめて保存した "dependency_documents.tsv" を読み込み、TaggedDocument に変換
+    for repo_folder, tokens in tqdm(read_documents(os.path.join(dependency_dir, DOCUMENTS_FILE)), desc="Processing repos for doc creation"):
+        documents.append(TaggedDocument(words=tokens, tags=[repo_folder]))
+        repo_tags.append(repo_folder)
     
     print(f"Total repositories processed: {len(documents)}")
     
-    # Doc2Vec モデルの学習
-    model = Doc2Vec(vector_size=100, window=5, min_count=1, workers=4, epochs=40)
-    model.build_vocab(documents)
-    print("Vocabulary built.")
-    model.train(documents, total_examples=model.corpus_count, epochs=model.epochs)
-    print("Doc2Vec model trained.")
-    
-    # 各リポジトリのベクトルを取得
-    repo_vectors = { tag: model.dv[tag] for tag in repo_tags }
+    if SIMILARITY_BACKEND == "doc2vec":
+        # Doc2Vec でドキュメントベクトルを求める
+        # 入力が前回と同じなら保存済みモデルを再利用し、新しいリポジトリだけ infer_vector で推論する
+        vectors = load_or_train(documents, MODEL_DIR)
+        
+        # 各リポジトリのベクトルを正規化した行列として保持し、後から類似リポジトリを検索できるよう保存
+        similarity_index = RepositorySimilarityIndex(repo_tags, vectors)
+        similarity_index.save(DEFAULT_INDEX_PATH)
+        print(f"リポジトリのベクトルを {DEFAULT_INDEX_PATH} に保存しました。")
+        suffix = ""
+    else:
+        # 依存パッケージは順序を持たない集合なので、リポジトリ×パッケージの疎行列で類似度を求める（学習は不要）
+        similarity_index = SparseSimilarityIndex(repo_tags, [document.words for document in documents], SIMILARITY_BACKEND)
+        suffix = f"_{SIMILARITY_BACKEND}"
     
     # 固定するリポジトリタグを指定（実際のディレクトリ名に合わせる）
     fixed_tag = "apache_zookeeper"
-    if fixed_tag not in repo_vectors:
+    if fixed_tag not in similarity_index:
         print(f"固定リポジトリタグ '{fixed_tag}' が見つかりませんでした。")
         return
 
-    fixed_vector = repo_vectors[fixed_tag].reshape(1, -1)
+    # 固定リポジトリと全リポジトリの類似度を1回の行列ベクトル積で求める
+    similarities = similarity_index.similarities(fixed_tag)
     
     # 結果保存用のCSVファイルを用意
-    output_csv = "similarity_results_final.csv"
+    output_csv = f"similarity_results_final{suffix}.csv"
     with open(output_csv, "w", newline="", encoding="utf-8") as csvfile:
         writer = csv.writer(csvfile)
         writer.writerow(["Fixed Repository", "Compared Repository", "Cosine Similarity"])
         
         print(f"\n固定リポジトリ '{fixed_tag}' と全リポジトリの類似度を計算します:")
-        for tag, vector in tqdm(repo_vectors.items(), desc="Computing similarities", unit="repo"):
+        for tag, similarity in zip(similarity_index.tags, similarities):
             if tag == fixed_tag:
                 continue
-            vec = vector.reshape(1, -1)
-            similarity = cosine_similarity(fixed_vector, vec)[0][0]
             writer.writerow([fixed_tag, tag, f"{similarity:.4f}"])
-            print(f"{fixed_tag} と {tag} のコサイン類似度: {similarity:.4f}")
+    
+    # 全リポジトリについて、最も似たリポジトリ上位 TOP_K 件を出力
+    if APPROXIMATE_TOP_K:
+        if SIMILARITY_BACKEND == "doc2vec":
+            similarity_index.build_ivf()
+        else:
+            similarity_index.build_lsh()
+        suffix += "_approx"
+    top_k_csv = f"similarity_top{TOP_K}_neighbors{suffix}.csv"
+    with open(top_k_csv, "w", newline="", encoding="utf-8") as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(["Repository", "Neighbor Repository", "Rank", "Cosine Similarity"])
+        for tag, neighbor, rank, similarity in tqdm(
+            similarity_index.top_k_all(TOP_K, approximate=APPROXIMATE_TOP_K), total=len(similarity_index) * TOP_K, desc="Computing top-K neighbors"
+        ):
+            writer.writerow([tag, neighbor, rank, f"{similarity:.4f}"])
+    print(f"全リポジトリの上位 {TOP_K} 件の近傍を {top_k_csv} に保存しました。")
     
     print(f"\n類似度結果が {output_csv} に保存されました。")
 
@@ -0,0 +1,284 @@
+import json
+import os
+import re
+import xml.etree.ElementTree as ET
+
+# マニフェストのファイル名 -> 依存パッケージ名のリストを返すパーサ
+PARSERS = {}
+# パーサの出力が変わったら上げる（document_builder の差分更新で、前回の結果を使わず解析し直す）
+PARSER_VERSION = 3
+
+# 大きなマニフェスト（モノレポの go.sum など）を読むときの1回あたりのバイト数
+CHUNK_SIZE = 1 << 20
+# go.sum: 各行の最初のトークン（モジュールパス）
+GO_SUM_PATTERN = re.compile(rb"^[^\S\n]*(\S+)", re.MULTILINE)
+# pom.xml: ${name} 形式のプレースホルダと、展開を繰り返す上限（プロパティが別のプロパティを参照する場合）
+POM_PLACEHOLDER_PATTERN = re.compile(r"\$\{([^}]+)\}")
+POM_PLACEHOLDER_DEPTH = 5
+# pom.xml: ${project.groupId} などで参照できる <project> 直下の要素
+POM_PROJECT_FIELDS = ("groupId", "artifactId", "version")
+# 読み終えても clear() しない <project> 直下の要素（${...} の展開に使う）
+POM_KEPT_ELEMENTS = frozenset(("properties", "parent", *POM_PROJECT_FIELDS))
+# Gradle: 'group:artifact:version' の group:artifact 部分（引用符の中は改行を含まない）
+GRADLE_PATTERN = re.compile(rb"['\"]([^'\"\n]+:[^'\"\n:]+):[^'\"\n]+['\"]")
+
+
+def register_parser(*filenames):
+    """
+    パーサを、リポジトリ直下のマニフェストのファイル名に対応付けて PARSERS に登録するデコレータ
+    """
+    def decorator(parser):
+        for filename in filenames:
+            PARSERS[filename] = parser
+        return parser
+    return decorator
+
+
+def iter_line_chunks(path, chunk_size=CHUNK_SIZE):
+    """
+    ファイルをバイナリで chunk_size バイトずつ読み、行の途中で切れないよう
+    最後の改行までのバイト列を順に返す（残りは次のチャンクの先頭に回す）
+    """
+    with open(path, "rb") as f:
+        rest = b""
+        while True:
+            block = f.read(chunk_size)
+            if not block:
+                break
+            block = rest + block
+            end = block.rfind(b"\n") + 1
+            if end == 0:
+                rest = block
+                continue
+            yield block[:end]
+            rest = block[end:]
+        if rest:
+            yield rest
+
+
+# ---------- Go: go.mod 解析 ----------
+
+@register_parser("go.mod")
+def parse_go_mod(go_mod_path):
+    """
+    go.mod から require 行を抽出し、依存パッケージ名のリストを返す。
+    簡易実装のため、'replace' 等は未考慮。
+    """
+    deps = []
+    require_pattern = re.compile(r'^\s*require\s+([^\s]+)\s+[\w\d\.-]+')
+    block_pattern_start = re.compile(r'^\s*require\s*\(')
+    block_pattern_end = re.compile(r'^\s*\)')
+    line_pattern = re.compile(r'^\s*([^\s]+)\s+([\w\d\.-]+)')  # "pkg version"
+
+    block_mode = False
+    try:
+        with open(go_mod_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line_stripped = line.strip()
+                # 単一行: require github.com/foo/bar v1.2.3
+                single_match = require_pattern.search(line_stripped)
+                if single_match:
+                    deps.append(single_match.group(1))
+                    continue
+
+                # ブロック開始: require (
+                if block_pattern_start.search(line_stripped):
+                    block_mode = True
+                    continue
+                # ブロック終了: )
+                if block_mode and block_pattern_end.search(line_stripped):
+                    block_mode = False
+                    continue
+
+                # ブロック内
+                if block_mode:
+                    m = line_pattern.search(line_stripped)
+                    if m:
+                        pkg_name = m.group(1)
+                        deps.append(pkg_name)
+    except Exception as e:
+        print(f"[WARN] Error reading {go_mod_path}: {e}")
+    return list(set(deps))
+
+
+# ---------- Go: go.sum 解析 ----------
+
+@register_parser("go.sum")
+def parse_go_sum(go_sum_path):
+    """
+    go.sum からパッケージ名を抽出し、リストを返す。
+    例:
+        github.com/pkg/errors v0.9.1 h1:xxxx
+        github.com/pkg/errors v0.9.1/go.mod h1:xxxx
+    各行の最初のトークンをバイト列のまま集合に入れて重複を除き、
+    最後にまとめてデコードして "/go.mod" を削除する（同一パッケージ扱い）
+    """
+    deps = set()
+    try:
+        for chunk in iter_line_chunks(go_sum_path):
+            deps.update(GO_SUM_PATTERN.findall(chunk))
+        return list({dep.decode("utf-8").replace("/go.mod", "") for dep in deps})
+    except Exception as e:
+        print(f"[WARN] Error reading {go_sum_path}: {e}")
+    return []
+
+
+# ---------- Maven/Gradle/Python/npm 解析 ----------
+
+def local_name(tag):
+    """
+    "{名前空間}groupId" のようなタグから名前空間を除く
+    """
+    return tag.rpartition("}")[2]
+
+
+def resolve_placeholders(value, properties, depth=POM_PLACEHOLDER_DEPTH):
+    """
+    "${name}" を properties の値で置き換える（値の中の "${...}" も depth 回まで展開する）。
+    定義の無いプレースホルダはそのまま残す
+    """
+    for _ in range(depth):
+        resolved = POM_PLACEHOLDER_PATTERN.sub(lambda m: properties.get(m.group(1), m.group(0)), value)
+        if resolved == value:
+            break
+        value = resolved
+    return value
+
+
+def project_properties(project):
+    """
+    <project> 直下の <properties> と groupId・artifactId・version（省略時は <parent> の値）を、
+    ${...} で参照する名前の辞書で返す
+    """
+    properties = {}
+    parent = {}
+    for child in project:
+        name = local_name(child.tag)
+        if name == "properties":
+            properties.update({local_name(prop.tag): (prop.text or "").strip() for prop in child})
+        elif name == "parent":
+            parent = {local_name(field.tag): (field.text or "").strip() for field in child}
+        elif name in POM_PROJECT_FIELDS:
+            properties[f"project.{name}"] = (child.text or "").strip()
+    for field in POM_PROJECT_FIELDS:
+        if field in parent:
+            properties[f"project.parent.{field}"] = parent[field]
+            properties.setdefault(f"project.{field}", parent[field])
+    return properties
+
+
+@register_parser("pom.xml")
+def extract_dependencies_from_pom(pom_file_path):
+    """
+    pom.xmlを iterparse で先頭から1回だけ読み、<dependency>要素の終了イベントごとに
+    "groupId:artifactId"形式の依存情報を取り出してリストで返す。
+    名前空間の有無に関係なくタグ名で判定する。読み終えた要素は、<dependency> の直下の要素と
+    <project> 直下の <properties>・<parent>・groupId・artifactId・version（とその直下）を除いて
+    clear() するので、<build> や <reporting> などの大きな部分木もメモリに残さない。
+    ${...} は同じ走査で読み込んだ <project> 直下の <properties> などの値で最後に置き換える
+    """
+    raw_dependencies = []
+    try:
+        context = ET.iterparse(pom_file_path, events=("start", "end"))
+        # ルートから現在の要素の親までのタグ名（名前空間を除く）
+        path = []
+        for event, elem in context:
+            if event == "start":
+                path.append(local_name(elem.tag))
+                continue
+            name = path.pop()
+            if name == "dependency":
+                fields = {local_name(child.tag): (child.text or "").strip() for child in elem}
+                if fields.get("groupId") and fields.get("artifactId"):
+                    raw_dependencies.append(f"{fields['groupId']}:{fields['artifactId']}")
+                elem.clear()
+            elif not path or path[-1] == "dependency":
+                continue
+            elif len(path) == 1 and name in POM_KEPT_ELEMENTS:
+                continue
+            elif len(path) == 2 and path[1] in ("properties", "parent"):
+                continue
+            else:
+                elem.clear()
+        properties = project_properties(context.root)
+    except Exception as e:
+        print(f"[WARN] Error parsing {pom_file_path}: {e}")
+        return []
+    return [resolve_placeholders(token, properties) for token in raw_dependencies]
+
+
+@register_parser("build.gradle", "build.gradle.kts")
+def extract_dependencies_from_gradle(gradle_file_path):
+    """
+    Gradleファイル（build.gradleまたはbuild.gradle.kts）から
+    'group:artifact:version' のうち group:artifact 部分を正規表現で抽出（重複は除く）。
+    引用符の中身は1行に収まるものだけを対象にする
+    """
+    dependencies = set()
+    try:
+        for chunk in iter_line_chunks(gradle_file_path):
+            dependencies.update(GRADLE_PATTERN.findall(chunk))
+        return [dep.decode("utf-8") for dep in dependencies]
+    except Exception as e:
+        print(f"[WARN] Error reading {gradle_file_path}: {e}")
+    return []
+
+
+@register_parser("requirements.txt")
+def extract_dependencies_from_requirements(requirements_file_path):
+    """
+    requirements.txt からパッケージ名を抽出する (例: "numpy==1.21.0" -> "numpy")
+    """
+    dependencies = []
+    try:
+        with open(requirements_file_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    pkg = line.split("==")[0]
+                    dependencies.append(pkg)
+    except Exception as e:
+        print(f"[WARN] Error reading {requirements_file_path}: {e}")
+    return dependencies
+
+
+@register_parser("package.json")
+def extract_dependencies_from_package_json(package_json_path):
+    """
+    package.jsonから、dependencies および devDependencies のキーを抽出
+    """
+    dependencies = []
+    try:
+        with open(package_json_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+            for dep_dict in [data.get("dependencies", {}), data.get("devDependencies", {})]:
+                dependencies.extend(dep_dict.keys())
+    except Exception as e:
+        print(f"[WARN] Error reading {package_json_path}: {e}")
+    return dependencies
+
+
+# ---------- 依存関係ドキュメント作成 ----------
+
+def find_manifests(repo_dir, filenames=None):
+    """
+    リポジトリ直下を os.scandir で1回だけ走査し、パーサのあるマニフェストを {ファイル名: パス} で返す
+    """
+    filenames = PARSERS.keys() if filenames is None else filenames
+    manifests = {}
+    with os.scandir(repo_dir) as entries:
+        for entry in entries:
+            if entry.name in filenames and entry.is_file():
+                manifests[entry.name] = entry.path
+    return manifests
+
+
+def create_dependency_document(repo_dir, filenames=None):
+    """
+    リポジトリ直下のマニフェスト（filenames を指定した場合はそのうちのもの）を解析し、
+    依存パッケージの重複を除いてソートした空白区切り文字列として返す
+    """
+    all_deps = set()
+    for filename, path in find_manifests(repo_dir, filenames).items():
+        all_deps.update(PARSERS[filename](path))
+    return " ".join(sorted(all_deps))
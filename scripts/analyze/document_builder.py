@@ -0,0 +1,138 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from dependency_parsers import PARSER_VERSION, create_dependency_document, find_manifests
+
+# 全リポジトリの依存関係ドキュメントをまとめたファイル（base_dir 直下に置く）。document.py が作る
+DOCUMENTS_FILE = "dependency_documents.tsv"
+# dependency_document.py（Go 以外のマニフェストだけ）が作るファイル。document.py の出力と索引を上書きしないよう別名にする
+MANIFEST_DOCUMENTS_FILE = "dependency_documents_no_go.tsv"
+# 前回解析したマニフェストのサイズ・更新時刻を記録するファイルの接尾辞（出力ファイルごとに
+# 例: dependency_documents.tsv -> dependency_documents_index.json）
+INDEX_SUFFIX = "_index.json"
+# 1回のタスクでワーカーに渡すリポジトリ数
+CHUNKSIZE = 64
+
+
+def list_repositories(base_dir):
+    """
+    base_dir 直下のサブフォルダ（= リポジトリ）を名前順に返す
+    """
+    with os.scandir(base_dir) as entries:
+        return sorted(entry.name for entry in entries if entry.is_dir())
+
+
+def build_document(base_dir, repo, filenames=None):
+    return repo, create_dependency_document(os.path.join(base_dir, repo), filenames)
+
+
+def build_documents(base_dir, repos=None, filenames=None, workers=None, chunksize=CHUNKSIZE):
+    """
+    各リポジトリの依存関係ドキュメントをプロセスプールで並列に作り、(リポジトリ名, ドキュメント) を
+    repos の順に返す。リポジトリは chunksize 件ずつまとめてワーカーに渡す
+    """
+    repos = list_repositories(base_dir) if repos is None else repos
+    build = partial(build_document, base_dir, filenames=filenames)
+    if workers == 1 or not repos:
+        yield from map(build, repos)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(build, repos, chunksize=chunksize)
+
+
+def write_documents(path, rows):
+    """
+    (リポジトリ名, ドキュメント) を「リポジトリ名<TAB>ドキュメント」の1行ずつ書き出す。
+    一時ファイルに書いてから置き換えるので、途中で止まっても前回のファイルは壊れない。
+    書き出した行数を返す
+    """
+    partial_path = path + ".partial"
+    count = 0
+    with open(partial_path, "w", encoding="utf-8") as f:
+        for repo, document in rows:
+            f.write(f"{repo}\t{document}\n")
+            count += 1
+    os.replace(partial_path, path)
+    return count
+
+
+def read_all_documents(path):
+    """
+    write_documents で書いたファイルを {リポジトリ名: ドキュメント} で返す（依存関係が空のリポジトリも含む）
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        return dict(line.rstrip("\n").partition("\t")[::2] for line in f)
+
+
+def manifest_signature(repo_dir, filenames=None):
+    """
+    リポジトリのマニフェストごとの [サイズ, 更新時刻(ns)] を {ファイル名: [...]} で返す
+    """
+    signature = {}
+    for filename, path in find_manifests(repo_dir, filenames).items():
+        stat = os.stat(path)
+        signature[filename] = [stat.st_size, stat.st_mtime_ns]
+    return signature
+
+
+def index_path_for(output_path):
+    """
+    出力ファイルに対応する索引ファイルのパス（同じディレクトリに、出力ファイル名から作る）
+    """
+    return os.path.splitext(output_path)[0] + INDEX_SUFFIX
+
+
+def refresh_documents(base_dir, output_path, filenames=None, workers=None, incremental=True, progress=None):
+    """
+    base_dir の全リポジトリの依存関係ドキュメントを output_path にまとめて書き出す。
+    incremental=True なら、マニフェストのサイズ・更新時刻が前回と同じリポジトリは前回のドキュメントを使い、
+    変わったリポジトリ（と新しいリポジトリ）だけを解析し直す。
+    progress には tqdm などを渡すと、解析するリポジトリの進捗を表示する。
+    戻り値: (リポジトリ数, 解析したリポジトリ数, スキップしたリポジトリ数)
+    """
+    index_path = index_path_for(output_path)
+    repos = list_repositories(base_dir)
+    signatures = {repo: manifest_signature(os.path.join(base_dir, repo), filenames) for repo in repos}
+
+    previous, known = {}, {}
+    if incremental and os.path.exists(output_path) and os.path.exists(index_path):
+        with open(index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        # 対象のマニフェストやパーサが違えば全て解析し直す
+        if index["filenames"] == (None if filenames is None else sorted(filenames)) and \
+                index["parser_version"] == PARSER_VERSION:
+            previous, known = read_all_documents(output_path), index["signatures"]
+
+    changed = [repo for repo in repos if repo not in previous or known.get(repo) != signatures[repo]]
+    rows = build_documents(base_dir, changed, filenames, workers)
+    if progress is not None:
+        rows = progress(rows, total=len(changed))
+    documents = {**previous, **dict(rows)}
+
+    write_documents(output_path, ((repo, documents[repo]) for repo in repos))
+    partial_path = index_path + ".partial"
+    with open(partial_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "filenames": None if filenames is None else sorted(filenames),
+            "parser_version": PARSER_VERSION,
+            "signatures": signatures,
+        }, f, ensure_ascii=False)
+    os.replace(partial_path, index_path)
+    return len(repos), len(changed), len(repos) - len(changed)
+
+
+def read_documents(path):
+    """
+    write_documents で書いたファイルを読み、依存パッケージが1つ以上あるリポジトリの
+    (リポジトリ名, 依存パッケージのリスト) をファイルの順に返す
+    """
+    documents = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            repo, _, document = line.rstrip("\n").partition("\t")
+            tokens = document.split()
+            if tokens:
+                documents.append((repo, tokens))
+    return documents
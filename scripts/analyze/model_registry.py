@@ -0,0 +1,146 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+from gensim.models.doc2vec import Doc2Vec
+
+# 各スクリプトで共通の Doc2Vec の学習パラメータ
+DOC2VEC_PARAMS = {"vector_size": 100, "window": 5, "min_count": 1, "workers": 4, "epochs": 40}
+# 新規・変更されたリポジトリがこの割合を超えたら、推論ではなくモデルを学習し直す
+RETRAIN_RATIO = 0.2
+
+MODEL_FILE = "doc2vec.model"
+MANIFEST_FILE = "_manifest.json"
+# 保存済みモデルで infer_vector したベクトルとドキュメントのハッシュ値（モデルを学習し直すと消す）
+INFERRED_FILE = "_inferred_vectors.npz"
+
+
+def document_fingerprint(words):
+    """
+    1つのドキュメント（トークン列）のハッシュ値
+    """
+    return hashlib.sha1(" ".join(words).encode("utf-8")).hexdigest()
+
+
+def corpus_fingerprint(document_hashes, params):
+    """
+    全ドキュメントのハッシュ値と学習パラメータから、コーパス全体のハッシュ値を求める
+    """
+    payload = json.dumps({"documents": sorted(document_hashes.items()), "params": params}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def read_manifest(model_dir):
+    path = os.path.join(model_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def read_inferred(model_dir):
+    """
+    前回推論したベクトルを {タグ: (ドキュメントのハッシュ値, ベクトル)} で返す
+    """
+    path = os.path.join(model_dir, INFERRED_FILE)
+    if not os.path.exists(path):
+        return {}
+    with np.load(path) as data:
+        return {
+            tag: (digest, vector)
+            for tag, digest, vector in zip(data["tags"].tolist(), data["hashes"].tolist(), data["vectors"])
+        }
+
+
+def save_inferred(model_dir, inferred):
+    """
+    推論したベクトルを一時ファイルに書いてから置き換える
+    """
+    path = os.path.join(model_dir, INFERRED_FILE)
+    tags = list(inferred)
+    with open(path + ".tmp", "wb") as f:
+        np.savez(
+            f,
+            tags=np.array(tags, dtype=str),
+            hashes=np.array([inferred[tag][0] for tag in tags], dtype=str),
+            vectors=np.stack([inferred[tag][1] for tag in tags]) if tags else np.empty((0, 0), dtype=np.float32),
+        )
+    os.replace(path + ".tmp", path)
+
+
+def train_model(documents, params):
+    model = Doc2Vec(**params)
+    model.build_vocab(documents)
+    print("Vocabulary built.")
+    model.train(documents, total_examples=model.corpus_count, epochs=model.epochs)
+    print("Doc2Vec model trained.")
+    return model
+
+
+def save_model(model, model_dir, document_hashes, params):
+    """
+    モデルを保存し、最後にマニフェストを書く（マニフェストが無いモデルは使わない）。
+    numpy 配列は全て別ファイルにして、読み込み時にメモリマップできるようにする
+    """
+    os.makedirs(model_dir, exist_ok=True)
+    manifest_path = os.path.join(model_dir, MANIFEST_FILE)
+    for path in [manifest_path, os.path.join(model_dir, INFERRED_FILE)]:
+        if os.path.exists(path):
+            os.remove(path)
+    model.save(os.path.join(model_dir, MODEL_FILE), sep_limit=0)
+    manifest = {
+        "fingerprint": corpus_fingerprint(document_hashes, params),
+        "params": params,
+        "documents": document_hashes,
+    }
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+
+
+def load_or_train(documents, model_dir, params=None, retrain_ratio=RETRAIN_RATIO):
+    """
+    TaggedDocument のリストについて、documents の順にドキュメントベクトルの行列を返す。
+    - 入力が保存済みモデルと同じなら、モデルをメモリマップで読み込んでベクトルを取り出す
+    - 新規・変更されたリポジトリが retrain_ratio 以下なら、それらだけ infer_vector で推論する。
+      推論は実行ごとに結果が変わるため、推論したベクトルはハッシュ値と一緒に保存し、
+      ドキュメントが変わっていなければ次回以降も同じベクトルを使う
+    - それ以外（モデルが無い・パラメータが違う・学習時から変更されたリポジトリが積み重なって多い）は
+      学習し直して保存する
+    """
+    params = dict(DOC2VEC_PARAMS, **(params or {}))
+    document_hashes = {document.tags[0]: document_fingerprint(document.words) for document in documents}
+    manifest = read_manifest(model_dir)
+
+    if manifest is not None and manifest["params"] == params:
+        if manifest["fingerprint"] == corpus_fingerprint(document_hashes, params):
+            changed = set()
+            print("入力が前回と同じため、保存済みの Doc2Vec モデルを読み込みます。")
+        else:
+            known = manifest["documents"]
+            changed = {tag for tag, digest in document_hashes.items() if known.get(tag) != digest}
+            print(f"前回から新規・変更されたリポジトリ: {len(changed)} 件")
+        if len(changed) <= retrain_ratio * len(document_hashes):
+            model = Doc2Vec.load(os.path.join(model_dir, MODEL_FILE), mmap="r")
+            cached = read_inferred(model_dir)
+            inferred = {}
+            for document in documents:
+                tag = document.tags[0]
+                if tag not in changed:
+                    continue
+                if tag in cached and cached[tag][0] == document_hashes[tag]:
+                    inferred[tag] = cached[tag]
+                else:
+                    inferred[tag] = (document_hashes[tag], model.infer_vector(document.words))
+            if inferred.keys() != cached.keys() or any(cached[tag][0] != digest for tag, (digest, _) in inferred.items()):
+                save_inferred(model_dir, inferred)
+                print(f"推論したベクトル {len(inferred)} 件を {model_dir} に保存しました。")
+            return np.stack([
+                inferred[document.tags[0]][1] if document.tags[0] in inferred else model.dv[document.tags[0]]
+                for document in documents
+            ])
+
+    model = train_model(documents, params)
+    save_model(model, model_dir, document_hashes, params)
+    print(f"Doc2Vec モデルを {model_dir} に保存しました。")
+    return np.stack([model.dv[document.tags[0]] for document in documents])
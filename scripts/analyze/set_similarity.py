@@ -0,0 +1,186 @@
+import zlib
+
+import numpy as np
+from scipy import sparse
+
+from similarity_index import top_k_rows
+
+# MinHash の計算に使う素数（2^31 - 1）。a * h + b が int64 に収まる
+MINHASH_PRIME = (1 << 31) - 1
+# MinHash の署名を一度に計算するハッシュ関数の数
+PERM_CHUNK = 16
+
+
+def package_matrix(token_lists, weighting="tfidf"):
+    """
+    リポジトリごとの依存パッケージのリストから、リポジトリ×パッケージの疎行列（CSR）を作る。
+    weighting="binary" なら有無の 0/1、"tfidf" なら TF-IDF（idf は sklearn と同じ平滑化）の重み。
+    戻り値: (行列, パッケージ名のリスト)
+    """
+    vocabulary = {}
+    rows, cols = [], []
+    for row, tokens in enumerate(token_lists):
+        for token in tokens:
+            rows.append(row)
+            cols.append(vocabulary.setdefault(token, len(vocabulary)))
+    matrix = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float32), (rows, cols)),
+        shape=(len(token_lists), len(vocabulary)),
+    )
+    matrix.sum_duplicates()
+    if weighting == "binary":
+        matrix.data[:] = 1
+    elif weighting == "tfidf":
+        document_frequency = np.bincount(matrix.indices, minlength=matrix.shape[1])
+        idf = np.log((1 + matrix.shape[0]) / (1 + document_frequency)) + 1
+        matrix = matrix.multiply(idf.astype(np.float32)[np.newaxis, :]).tocsr()
+    else:
+        raise ValueError(f"未対応の重み付けです: {weighting}")
+    return matrix, list(vocabulary)
+
+
+def normalize_sparse_rows(matrix):
+    """
+    疎行列の各行を L2 ノルムで割る（ゼロ行はそのまま）
+    """
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    scale = np.divide(1, norms, out=np.zeros_like(norms), where=norms > 0)
+    return sparse.diags(scale.astype(np.float32)) @ matrix
+
+
+class SparseSimilarityIndex:
+    """
+    依存パッケージの集合をリポジトリ×パッケージの疎行列で持ち、
+    コサイン類似度（TF-IDF または 0/1）と Jaccard 係数を疎行列の積でまとめて求める。
+    RepositorySimilarityIndex と同じく similarities() / most_similar() / top_k_all() を持つので、
+    Doc2Vec の代わりにそのまま使える。build_lsh() で MinHash-LSH の索引を作ると、
+    most_similar(approximate=True) と top_k_all(approximate=True) が
+    Jaccard 係数の近いリポジトリだけを候補にする
+    """
+
+    def __init__(self, tags, token_lists, weighting="tfidf"):
+        self.tags = list(tags)
+        self.index = {tag: i for i, tag in enumerate(self.tags)}
+        weighted, self.packages = package_matrix(token_lists, weighting)
+        self.matrix = normalize_sparse_rows(weighted).tocsr()
+        self.binary = weighted.copy()
+        self.binary.data[:] = 1
+        self.sizes = np.diff(self.binary.indptr)
+        self.lsh = None
+
+    def __len__(self):
+        return len(self.tags)
+
+    def __contains__(self, tag):
+        return tag in self.index
+
+    def similarity(self, tag_a, tag_b):
+        return float(self.matrix[self.index[tag_a]].multiply(self.matrix[self.index[tag_b]]).sum())
+
+    def similarities(self, tag, rows=None):
+        """
+        tag と全リポジトリ（rows を指定した場合はその行だけ）のコサイン類似度を返す
+        """
+        matrix = self.matrix if rows is None else self.matrix[rows]
+        return (matrix @ self.matrix[self.index[tag]].T).toarray().ravel()
+
+    def jaccard(self, tag, rows=None):
+        """
+        tag と全リポジトリ（rows を指定した場合はその行だけ）の Jaccard 係数を返す
+        """
+        binary = self.binary if rows is None else self.binary[rows]
+        sizes = self.sizes if rows is None else self.sizes[rows]
+        common = (binary @ self.binary[self.index[tag]].T).toarray().ravel()
+        union = sizes + self.sizes[self.index[tag]] - common
+        return np.divide(common, union, out=np.zeros(len(common)), where=union > 0)
+
+    def most_similar(self, tag, k=10, approximate=False):
+        """
+        tag に最も似たリポジトリを (タグ, コサイン類似度) のリストで上位 k 件返す（tag 自身は除く）
+        """
+        if approximate:
+            if self.lsh is None:
+                raise RuntimeError("build_lsh() で MinHash-LSH の索引を作ってください")
+            candidates = self.lsh.candidates(self.index[tag])
+        else:
+            candidates = np.arange(len(self.tags))
+        candidates = candidates[candidates != self.index[tag]]
+        columns, scores = top_k_rows(self.similarities(tag, candidates)[np.newaxis, :], k)
+        return [(self.tags[candidates[c]], float(s)) for c, s in zip(columns[0], scores[0])]
+
+    def top_k_all(self, k=10, block_size=1024, approximate=False):
+        """
+        全リポジトリについて、自分以外でコサイン類似度の高いリポジトリ上位 k 件を
+        (リポジトリ, 近傍, 順位, 類似度) の形で順に返す（block_size 行ずつ計算する）。
+        approximate=True なら各リポジトリについて LSH の候補だけから選ぶ
+        （候補が k 件に満たないリポジトリは k 件より少なくなる）
+        """
+        if approximate:
+            for tag in self.tags:
+                for rank, (neighbor, score) in enumerate(self.most_similar(tag, k, True), start=1):
+                    yield tag, neighbor, rank, score
+            return
+        for start in range(0, len(self.tags), block_size):
+            block = (self.matrix[start:start + block_size] @ self.matrix.T).toarray()
+            rows = np.arange(block.shape[0])
+            block[rows, start + rows] = -np.inf  # 自分自身を除く
+            neighbors, scores = top_k_rows(block, k)
+            for row in rows:
+                for rank, (neighbor, score) in enumerate(zip(neighbors[row], scores[row]), start=1):
+                    if np.isfinite(score):
+                        yield self.tags[start + row], self.tags[neighbor], rank, float(score)
+
+    def build_lsh(self, num_perm=128, bands=32, seed=0):
+        self.lsh = MinHashLsh(self.binary, self.packages, num_perm, bands, seed)
+        return self.lsh
+
+
+class MinHashLsh:
+    """
+    MinHash の署名を bands 個の帯に分け、どれかの帯が一致したリポジトリを候補にする LSH 索引。
+    Jaccard 係数が高い組ほど候補に残りやすい（1帯あたり num_perm / bands 行）
+    """
+
+    def __init__(self, binary, packages, num_perm=128, bands=32, seed=0):
+        if num_perm % bands:
+            raise ValueError("num_perm は bands で割り切れる必要があります")
+        rng = np.random.default_rng(seed)
+        a = rng.integers(1, MINHASH_PRIME, num_perm, dtype=np.int64)
+        b = rng.integers(0, MINHASH_PRIME, num_perm, dtype=np.int64)
+        # パッケージ名は実行ごとに変わらないハッシュ値にしてから、num_perm 個のハッシュ関数を一度に適用する
+        package_hashes = np.array([zlib.crc32(p.encode("utf-8")) % MINHASH_PRIME for p in packages], dtype=np.int64)
+        hashed = (a[:, np.newaxis] * package_hashes[np.newaxis, :] + b[:, np.newaxis]) % MINHASH_PRIME
+
+        # 各リポジトリのパッケージ列について最小値を取る（パッケージの無いリポジトリは最大値のまま）
+        self.signatures = np.full((binary.shape[0], num_perm), MINHASH_PRIME, dtype=np.int64)
+        non_empty = np.flatnonzero(np.diff(binary.indptr))
+        if len(non_empty):
+            # (ハッシュ関数 × 全リポジトリのパッケージ) の配列が大きくならないよう、ハッシュ関数を分けて計算する
+            for start in range(0, num_perm, PERM_CHUNK):
+                chunk = hashed[start:start + PERM_CHUNK, binary.indices]
+                minimum = np.minimum.reduceat(chunk, binary.indptr[non_empty], axis=1)
+                self.signatures[non_empty, start:start + PERM_CHUNK] = minimum.T
+
+        rows_per_band = num_perm // bands
+        self.band_keys = [
+            [band.tobytes() for band in self.signatures[:, i * rows_per_band:(i + 1) * rows_per_band]]
+            for i in range(bands)
+        ]
+        self.buckets = []
+        for keys in self.band_keys:
+            buckets = {}
+            for row, key in enumerate(keys):
+                buckets.setdefault(key, []).append(row)
+            self.buckets.append(buckets)
+
+    def estimate_jaccard(self, row_a, row_b):
+        return float(np.mean(self.signatures[row_a] == self.signatures[row_b]))
+
+    def candidates(self, row):
+        """
+        row とどれかの帯が一致したリポジトリの行番号を返す（row 自身を含む）
+        """
+        found = set()
+        for keys, buckets in zip(self.band_keys, self.buckets):
+            found.update(buckets[keys[row]])
+        return np.array(sorted(found), dtype=np.int64)
@@ -1,12 +1,18 @@
 import os
-from gensim.models.doc2vec import Doc2Vec, TaggedDocument
+from gensim.models.doc2vec import TaggedDocument
 from tqdm import tqdm
-from sklearn.metrics.pairwise import cosine_similarity
 import csv
 
+from document_builder import DOCUMENTS_FILE, read_documents
+from model_registry import load_or_train
+from similarity_index import RepositorySimilarityIndex
+
+# 学習済み Doc2Vec モデルの保存先（cosinesimilarity.py と共用）
+MODEL_DIR = "doc2vec_dependency_document"
+
 def main():
     # 1. リポジトリが格納されたベースディレクトリ
-    #    各サブフォルダ(=リポジトリ) に "dependency_document.txt" がある想定
+    #    document.py が作成した "dependency_documents.tsv" がある想定
     base_dir = "/Users/kazuki-h/newresearch/results/dependencies_files"
 
     # 比較したい2つのリポジトリフォルダ名
@@ -16,52 +22,31 @@ def main():
     documents = []
     repo_tags = []
 
-    # 2. dependency_document.txt を読み込んで TaggedDocument を作成
-    for repo_folder in tqdm(os.listdir(base_dir), desc="Loading dependency documents"):
-        repo_path = os.path.join(base_dir, repo_folder)
-        if not os.path.isdir(repo_path):
-            continue
-
-        doc_path = os.path.join(repo_path, "dependency_document.txt")
-        if not os.path.exists(doc_path):
-            # dependency_document.txt が無ければスキップ
-            continue
-
-        # 依存関係の文字列を読み込み
-        with open(doc_path, "r", encoding="utf-8") as f:
-            dep_str = f.read().strip()
-
-        tokens = dep_str.split()
-        if tokens:
-            # Doc2Vec 用に TaggedDocument を作る
-            documents.append(TaggedDocument(words=tokens, tags=[repo_folder]))
-            repo_tags.append(repo_folder)
+    # 2. dependency_documents.tsv を読み込んで TaggedDocument を作成（依存関係が空のリポジトリは含まれない）
+    for repo_folder, tokens in tqdm(read_documents(os.path.join(base_dir, DOCUMENTS_FILE)), desc="Loading dependency documents"):
+        # Doc2Vec 用に TaggedDocument を作る
+        documents.append(TaggedDocument(words=tokens, tags=[repo_folder]))
+        repo_tags.append(repo_folder)
 
     print(f"Total repositories processed: {len(documents)}")
 
-    # 3. Doc2Vec モデルを学習
-    model = Doc2Vec(vector_size=100, window=5, min_count=1, workers=4, epochs=40)
-    model.build_vocab(documents)
-    print("Vocabulary built.")
-    model.train(documents, total_examples=model.corpus_count, epochs=model.epochs)
-    print("Doc2Vec model trained.")
+    # 3. Doc2Vec でドキュメントベクトルを求める
+    # 入力が前回と同じなら保存済みモデルを再利用し、新しいリポジトリだけ infer_vector で推論する
+    vectors = load_or_train(documents, MODEL_DIR)
 
     # 4. リポジトリのベクトルを取得
-    repo_vectors = { tag: model.dv[tag] for tag in repo_tags }
+    similarity_index = RepositorySimilarityIndex(repo_tags, vectors)
 
     # 5. repoA, repoB が存在するかチェック
-    if repoA not in repo_vectors:
+    if repoA not in similarity_index:
         print(f"[ERROR] Repository '{repoA}' not found in doc list.")
         return
-    if repoB not in repo_vectors:
+    if repoB not in similarity_index:
         print(f"[ERROR] Repository '{repoB}' not found in doc list.")
         return
 
-    vecA = repo_vectors[repoA].reshape(1, -1)
-    vecB = repo_vectors[repoB].reshape(1, -1)
-
-    # 6. コサイン類似度を計算
-    similarity = cosine_similarity(vecA, vecB)[0][0]
+    # 6. コサイン類似度を計算（正規化済みベクトルの内積）
+    similarity = similarity_index.similarity(repoA, repoB)
     print(f"Cosine similarity between {repoA} and {repoB}: {similarity:.4f}")
 
     # 7. CSVに書き出し（1行だけ）
@@ -0,0 +1,160 @@
+import numpy as np
+
+# 保存したベクトルの既定のパス（cosinesimilarity.py が書き出す）
+DEFAULT_INDEX_PATH = "repo_vectors.npz"
+
+
+def normalize_rows(vectors):
+    """
+    各行を L2 ノルムで割った float32 行列を返す（ゼロベクトルはそのまま）
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+def top_k_rows(scores, k):
+    """
+    スコア行列の各行について、値の大きい順に上位 k 列の (列番号, スコア) を返す
+    """
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        empty = np.empty((scores.shape[0], 0))
+        return empty.astype(np.int64), empty.astype(scores.dtype)
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-top_scores, axis=1, kind="stable")
+    return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+
+class RepositorySimilarityIndex:
+    """
+    リポジトリのベクトル（Doc2Vec など）を正規化した float32 行列として保持し、
+    コサイン類似度を内積で求める。
+    most_similar() は1回の行列ベクトル積で「X に最も似たリポジトリ」を返し、
+    top_k_all() は block_size 行ずつの行列積で全リポジトリの上位 k 件の近傍を求める。
+    build_ivf() で近似最近傍探索（IVF）の索引を作ると、most_similar(approximate=True) と
+    top_k_all(approximate=True) が使える
+    """
+
+    def __init__(self, tags, vectors):
+        self.tags = list(tags)
+        self.index = {tag: i for i, tag in enumerate(self.tags)}
+        self.matrix = normalize_rows(vectors)
+        self.ivf = None
+
+    def __len__(self):
+        return len(self.tags)
+
+    def __contains__(self, tag):
+        return tag in self.index
+
+    @classmethod
+    def from_doc2vec(cls, model, tags):
+        """
+        学習済み Doc2Vec モデルから、tags の順にドキュメントベクトルを取り出して索引を作る
+        """
+        return cls(tags, np.stack([model.dv[tag] for tag in tags]) if tags else np.empty((0, model.vector_size)))
+
+    def save(self, path=DEFAULT_INDEX_PATH):
+        np.savez(path, tags=np.array(self.tags, dtype=str), matrix=self.matrix)
+
+    @classmethod
+    def load(cls, path=DEFAULT_INDEX_PATH):
+        with np.load(path) as data:
+            return cls(data["tags"].tolist(), data["matrix"])
+
+    def vector(self, tag):
+        return self.matrix[self.index[tag]]
+
+    def similarity(self, tag_a, tag_b):
+        return float(self.vector(tag_a) @ self.vector(tag_b))
+
+    def similarities(self, tag):
+        """
+        tag と全リポジトリのコサイン類似度を tags の順に返す
+        """
+        return self.matrix @ self.vector(tag)
+
+    def most_similar(self, tag, k=10, approximate=False, n_probe=8):
+        """
+        tag に最も似たリポジトリを (タグ, 類似度) のリストで上位 k 件返す（tag 自身は除く）
+        """
+        query = self.vector(tag)
+        if approximate:
+            if self.ivf is None:
+                raise RuntimeError("build_ivf() で近似最近傍探索の索引を作ってください")
+            candidates = self.ivf.candidates(query, n_probe)
+        else:
+            candidates = np.arange(len(self.tags))
+        candidates = candidates[candidates != self.index[tag]]
+        columns, scores = top_k_rows((self.matrix[candidates] @ query)[np.newaxis, :], k)
+        return [(self.tags[candidates[c]], float(s)) for c, s in zip(columns[0], scores[0])]
+
+    def top_k_all(self, k=10, block_size=1024, approximate=False, n_probe=8):
+        """
+        全リポジトリについて、自分以外で最も似たリポジトリ上位 k 件を
+        (リポジトリ, 近傍, 順位, 類似度) の形で順に返す。
+        block_size 行ずつ行列積を取り、類似度行列全体をメモリに載せない。
+        approximate=True なら各リポジトリについて IVF の n_probe 個のクラスタだけを候補にする
+        """
+        if approximate:
+            for tag in self.tags:
+                for rank, (neighbor, score) in enumerate(self.most_similar(tag, k, True, n_probe), start=1):
+                    yield tag, neighbor, rank, score
+            return
+        for start in range(0, len(self.tags), block_size):
+            block = self.matrix[start:start + block_size] @ self.matrix.T
+            rows = np.arange(block.shape[0])
+            block[rows, start + rows] = -np.inf  # 自分自身を除く
+            neighbors, scores = top_k_rows(block, k)
+            for row in rows:
+                for rank, (neighbor, score) in enumerate(zip(neighbors[row], scores[row]), start=1):
+                    if np.isfinite(score):
+                        yield self.tags[start + row], self.tags[neighbor], rank, float(score)
+
+    def build_ivf(self, n_lists=None, iterations=10, seed=0):
+        """
+        球面 k-means でベクトルを n_lists 個のクラスタに分けた IVF 索引を作る（既定はおよそ sqrt(N) 個）
+        """
+        self.ivf = IvfIndex(self.matrix, n_lists or max(1, int(np.sqrt(len(self.tags)))), iterations, seed)
+        return self.ivf
+
+
+class IvfIndex:
+    """
+    NumPy だけで作る転置ファイル（IVF）型の近似最近傍索引。
+    クエリに近い n_probe 個のクラスタに属するベクトルだけを候補にする
+    """
+
+    def __init__(self, matrix, n_lists, iterations=10, seed=0):
+        rng = np.random.default_rng(seed)
+        n_lists = min(n_lists, len(matrix))
+        self.centroids = matrix[rng.choice(len(matrix), n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            assignments = np.argmax(matrix @ self.centroids.T, axis=1)
+            for cluster in range(n_lists):
+                members = matrix[assignments == cluster]
+                if len(members):
+                    self.centroids[cluster] = members.sum(axis=0)
+            self.centroids = normalize_rows(self.centroids)
+        assignments = np.argmax(matrix @ self.centroids.T, axis=1)
+        order = np.argsort(assignments, kind="stable")
+        bounds = np.searchsorted(assignments[order], np.arange(n_lists + 1))
+        self.lists = [order[bounds[i]:bounds[i + 1]] for i in range(n_lists)]
+
+    def candidates(self, query, n_probe=8):
+        """
+        クエリに近いクラスタ n_probe 個に属する行番号を返す
+        """
+        n_probe = min(n_probe, len(self.lists))
+        nearest = np.argpartition(-(self.centroids @ query), n_probe - 1)[:n_probe]
+        return np.concatenate([self.lists[cluster] for cluster in nearest])
+
+
+if __name__ == "__main__":
+    # cosinesimilarity.py が保存したベクトルを読み込み、指定したリポジトリに似たリポジトリを表示する
+    query_tag = "apache_zookeeper"
+    similarity_index = RepositorySimilarityIndex.load(DEFAULT_INDEX_PATH)
+    for neighbor, score in similarity_index.most_similar(query_tag, k=10):
+        print(f"{query_tag} と {neighbor} のコサイン類似度: {score:.4f}")
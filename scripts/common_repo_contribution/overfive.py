@@ -1,9 +1,12 @@
 import ast
-from collections import defaultdict
-from itertools import combinations
+import os
+import sys
 
 import pandas as pd
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from corpus.common_repos import build_repo_bitsets, groups_to_frame, mine_common_groups  # noqa: E402
+
 # データの読み込み（CSVファイルを読み込む場合）
 file_path = "/Users/kazuki-h/newresearch/results/movement/Zinto/zookeeper_pre_contribution_with_developers.csv"  # ファイルパスを指定
 df = pd.read_csv(file_path)
@@ -11,47 +14,22 @@ df = pd.read_csv(file_path)
 # 1. developersカラムをリスト形式に変換
 df['developers'] = df['developers'].apply(ast.literal_eval)
 
-def analyze_common_repos(group_size):
-    """
-    任意の人数のグループに対する共通リポジトリ分析を行う
-    :param group_size: グループのサイズ（例: 5人組なら5, 6人組なら6）
-    :return: 共通リポジトリ情報のデータフレーム
-    """
-    group_to_repos = defaultdict(set)  # グループごとにリポジトリを保持
-
-    # グループごとの共通リポジトリを収集
-    for _, row in df.iterrows():
-        repo = row['before']  # リポジトリ名
-        developers = row['developers']  # リポジトリに貢献した開発者リスト
-
-        # 指定されたグループサイズで組み合わせを生成
-        for group in combinations(developers, group_size):
-            group = tuple(sorted(group))  # 順序を統一（例: ('A', 'B', 'C', 'D', 'E')）
-            group_to_repos[group].add(repo)
-
-    # グループごとの共通リポジトリ情報をデータフレームに変換
-    group_common_repo_details = [
-        {
-            **{f"developer_{i+1}": group[i] for i in range(group_size)},  # 各開発者を列に展開
-            "common_repos_count": len(repos),  # 共通リポジトリ数
-            "common_repos": list(repos)       # 共通リポジトリ名
-        }
-        for group, repos in group_to_repos.items()
-    ]
-
-    # 結果をデータフレームに変換
-    df_groups = pd.DataFrame(group_common_repo_details)
-
-    # 結果をソートして表示
-    df_groups.sort_values(by="common_repos_count", ascending=False, inplace=True)
-    
-    return df_groups
-
-# 2. 5人組から10人組までを一気に分析
+# 分析するグループの人数と、出力するグループの共通リポジトリ数の下限。
+# 1つのリポジトリだけを共有するグループは組み合わせ数が膨大になるため、2以上にしておく
+GROUP_SIZES = range(5, 13)
+MIN_COMMON_REPOS = 2
+# 2つ以上のリポジトリを共有する大人数の集団があると全ての部分集合（例: 60人から12人の組み合わせ）を
+# 列挙してしまうため、出力するグループ数の合計に上限を設ける（超えたら CSV を書かずにエラーで終了する）
+MAX_GROUPS = 5_000_000
+
+# 2. 5人組から12人組までを1回の探索で一気に分析
+bitsets, repo_names = build_repo_bitsets(df, 'before')
+print(f"🔍 {GROUP_SIZES[0]}〜{GROUP_SIZES[-1]}人組を分析中...")
+groups_by_size = mine_common_groups(bitsets, GROUP_SIZES, MIN_COMMON_REPOS, max_groups=MAX_GROUPS)
+
 results = {}
-for group_size in range(5, 13):  # 5人組から10人組まで
-    print(f"🔍 {group_size}人組を分析中...")
-    results[group_size] = analyze_common_repos(group_size)
+for group_size in GROUP_SIZES:
+    results[group_size] = groups_to_frame(groups_by_size[group_size], group_size, repo_names)
     output_path = f"./../../results/common_repoCon/into_{group_size}_common_repos_with_details.csv"
     results[group_size].to_csv(output_path, index=False)
     print(f"✅ {group_size}人組の結果を '{output_path}' に保存しました！")
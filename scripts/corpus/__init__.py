@@ -0,0 +1,4 @@
+"""
+分析スクリプト共通のデータ読み込みモジュール。
+各スクリプトからは scripts/ を sys.path に追加して `from corpus.xxx import ...` で利用する。
+"""
@@ -0,0 +1,159 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+
+def build_repo_bitsets(df, repo_column, developers_column="developers"):
+    """
+    リポジトリごとの開発者リストから、開発者 -> 貢献したリポジトリのビット集合（int）を作る。
+    戻り値: ({開発者: ビット集合}, リポジトリ名のリスト（ビット位置の順）)
+    """
+    repo_names = list(dict.fromkeys(df[repo_column]))
+    repo_index = {repo: i for i, repo in enumerate(repo_names)}
+    bitsets = {}
+    for repo, developers in zip(df[repo_column], df[developers_column]):
+        bit = 1 << repo_index[repo]
+        for developer in developers:
+            bitsets[developer] = bitsets.get(developer, 0) | bit
+    return bitsets, repo_names
+
+
+def mine_common_groups(bitsets, group_sizes, min_common_repos=1, max_groups=None):
+    """
+    共通して貢献したリポジトリが min_common_repos 個以上ある開発者グループを、
+    group_sizes に含まれる人数ごとに {人数: [(開発者のタプル, 共通リポジトリのビット集合), ...]} で返す。
+    Eclat と同様に、開発者を名前順に1人ずつ加えながらビット集合の AND を取り、
+    共通リポジトリ数が閾値を下回った時点でその先の組み合わせを打ち切る。
+    多くの開発者が同じリポジトリを共有していると部分集合を全て列挙するため組み合わせ数が爆発する。
+    max_groups を指定すると、全人数の合計がその件数を超えた時点で RuntimeError を送出する
+    （名前順で先頭のグループだけの偏った結果を、全件のように出力しないように）
+    """
+    group_sizes = sorted(set(group_sizes))
+    max_size = group_sizes[-1]
+    results = {size: [] for size in group_sizes}
+
+    # 単独で閾値に届かない開発者はどのグループにも入らない
+    items = [
+        (developer, bitset) for developer, bitset in sorted(bitsets.items())
+        if bitset.bit_count() >= min_common_repos
+    ]
+
+    found = 0
+    stack = [((), items)]
+    while stack:
+        prefix, candidates = stack.pop()
+        # 残りの候補を全員加えても最小の人数に届かなければ打ち切る
+        if len(prefix) + len(candidates) < group_sizes[0]:
+            continue
+        children = []
+        for i, (developer, bitset) in enumerate(candidates):
+            group = prefix + (developer,)
+            if len(group) in results:
+                results[len(group)].append((group, bitset))
+                found += 1
+                if max_groups is not None and found > max_groups:
+                    raise RuntimeError(
+                        f"グループ数が上限 {max_groups} 件を超えたため探索を中止しました。"
+                        "min_common_repos を上げるか、max_groups を増やしてください"
+                    )
+            if len(group) == max_size:
+                continue
+            # この開発者より後ろの候補との共通リポジトリ（条件付きの縦持ちデータベース）
+            extensions = [
+                (other, common) for other, other_bitset in candidates[i + 1:]
+                if (common := bitset & other_bitset).bit_count() >= min_common_repos
+            ]
+            if extensions:
+                children.append((group, extensions))
+        # 名前順に結果が並ぶよう、逆順に積む
+        stack.extend(reversed(children))
+    return results
+
+
+def bitset_members(bitset, names):
+    """
+    ビット集合に含まれる位置の名前を、位置の順に返す
+    """
+    members = []
+    while bitset:
+        lowest = bitset & -bitset
+        members.append(names[lowest.bit_length() - 1])
+        bitset ^= lowest
+    return members
+
+
+def groups_to_frame(groups, group_size, repo_names):
+    """
+    mine_common_groups の1つの人数の結果を、developer_1..n, common_repos_count, common_repos 列の
+    データフレームにして共通リポジトリ数の多い順に返す
+    """
+    rows = []
+    for group, bitset in groups:
+        common_repos = bitset_members(bitset, repo_names)
+        rows.append({
+            **{f"developer_{i + 1}": developer for i, developer in enumerate(group)},
+            "common_repos_count": len(common_repos),
+            "common_repos": common_repos,
+        })
+    columns = [f"developer_{i + 1}" for i in range(group_size)] + ["common_repos_count", "common_repos"]
+    df_groups = pd.DataFrame(rows, columns=columns)
+    return df_groups.sort_values(by="common_repos_count", ascending=False, kind="stable").reset_index(drop=True)
+
+
+def incidence_matrix(developer_lists, developer_index):
+    """
+    リポジトリごとの開発者リストから、リポジトリ×開発者の 0/1 の疎行列（CSR）を作る。
+    developer_index は {開発者: 列番号}
+    """
+    rows, cols = [], []
+    for row, developers in enumerate(developer_lists):
+        for developer in developers:
+            rows.append(row)
+            cols.append(developer_index[developer])
+    matrix = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.int32), (rows, cols)),
+        shape=(len(developer_lists), len(developer_index)),
+    )
+    # 同じ開発者が重複して並んでいても1人として数える
+    matrix.data[:] = 1
+    return matrix
+
+
+def repository_overlap(pre_df, post_df, pre_column, post_column, developers_column="developers",
+                       include_zero=False, jaccard=False):
+    """
+    pre_df と post_df の各リポジトリの組について、両方に貢献した開発者数を
+    疎行列の積（pre × post^T）で求める。
+    既定では重複が1人以上の組だけを返し、include_zero=True なら全ての組を返す。
+    jaccard=True なら Jaccard 係数（重複数 / 和集合の人数）の列も加える。
+    戻り値の列: pre_repo, post_repo, overlap_count（, jaccard）
+    """
+    developer_index = {}
+    for developers in pd.concat([pre_df[developers_column], post_df[developers_column]]):
+        for developer in developers:
+            developer_index.setdefault(developer, len(developer_index))
+    pre_matrix = incidence_matrix(pre_df[developers_column], developer_index)
+    post_matrix = incidence_matrix(post_df[developers_column], developer_index)
+
+    overlap = (pre_matrix @ post_matrix.T).tocsr()
+    overlap.sort_indices()
+    if include_zero:
+        pre_rows = np.repeat(np.arange(overlap.shape[0]), overlap.shape[1])
+        post_rows = np.tile(np.arange(overlap.shape[1]), overlap.shape[0])
+        counts = overlap.toarray().ravel()
+    else:
+        coo = overlap.tocoo()
+        keep = coo.data > 0
+        pre_rows, post_rows, counts = coo.row[keep], coo.col[keep], coo.data[keep]
+
+    result = pd.DataFrame({
+        "pre_repo": pre_df[pre_column].to_numpy()[pre_rows],
+        "post_repo": post_df[post_column].to_numpy()[post_rows],
+        "overlap_count": counts.astype(np.int64),
+    })
+    if jaccard:
+        pre_sizes = np.asarray(pre_matrix.sum(axis=1)).ravel()[pre_rows]
+        post_sizes = np.asarray(post_matrix.sum(axis=1)).ravel()[post_rows]
+        union = pre_sizes + post_sizes - counts
+        result["jaccard"] = np.divide(counts, union, out=np.zeros(len(counts)), where=union > 0)
+    return result
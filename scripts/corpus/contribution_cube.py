@@ -0,0 +1,173 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from corpus.developer_data import DEFAULT_DATA_DIR, list_source_files, load_contributions
+
+# キューブの次元。month 以外は辞書（ラベルのリスト）への整数コードで持つ
+CUBE_DIMENSIONS = ["developer", "repository", "month", "type"]
+LABEL_DIMENSIONS = ["developer", "repository", "type"]
+COUNT_COLUMN = "contribution_count"
+# 辞書・集計済みの最終月などは Parquet のスキーマのメタデータに入れ、1ファイルで置き換えられるようにする
+METADATA_KEY = b"contribution_cube"
+CUBE_FILE = "monthly_contributions_cube.parquet"
+
+
+def cube_path_for(data_dir):
+    """
+    CSV ディレクトリに対応するキューブのファイル（例: developer_data -> developer_data_cube/...parquet）
+    """
+    return os.path.join(f"{os.path.normpath(data_dir)}_cube", CUBE_FILE)
+
+
+def month_ordinals(times):
+    """
+    datetime の Series を、pandas の月次 Period と同じ序数（1970-01 = 0）の int32 配列にする
+    """
+    return ((times.dt.year - 1970) * 12 + times.dt.month - 1).to_numpy(dtype="int32")
+
+
+class ContributionCube:
+    """
+    開発者 × リポジトリ × 月 × 種類（issues / pulls）ごとの貢献数を、整数コードの列で持つ集計済みのキューブ。
+    rollup() で任意の次元の組に集約し直せるので、元の貢献データを読み直さずに
+    月別・リポジトリ別などの集計を作れる
+    """
+
+    def __init__(self, counts, dictionaries, last_month=None, source_files=None):
+        self.counts = counts
+        self.dictionaries = dictionaries
+        self.last_month = last_month
+        self.source_files = source_files or {}
+
+    @classmethod
+    def empty(cls):
+        counts = pd.DataFrame({
+            "developer": np.empty(0, dtype="int32"),
+            "repository": np.empty(0, dtype="int32"),
+            "month": np.empty(0, dtype="int32"),
+            "type": np.empty(0, dtype="int16"),
+            COUNT_COLUMN: np.empty(0, dtype="int64"),
+        })
+        return cls(counts, {dimension: [] for dimension in LABEL_DIMENSIONS})
+
+    @classmethod
+    def load(cls, path):
+        table = pq.read_table(path)
+        metadata = json.loads(table.schema.metadata[METADATA_KEY])
+        return cls(table.to_pandas(), metadata["dictionaries"], metadata["last_month"], metadata["source_files"])
+
+    def save(self, path):
+        """
+        一時ファイルに書いてから置き換える（途中で止まっても前回のキューブは壊れない）
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        metadata = {
+            "dictionaries": self.dictionaries,
+            "last_month": self.last_month,
+            "source_files": self.source_files,
+        }
+        table = pa.Table.from_pandas(self.counts, preserve_index=False)
+        table = table.replace_schema_metadata({METADATA_KEY: json.dumps(metadata, ensure_ascii=False)})
+        tmp_path = f"{path}.tmp"
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+
+    def encode(self, values, dimension):
+        """
+        ラベルの Series を辞書の整数コードにする。辞書に無いラベルは末尾に追加する（既存のコードは変えない）
+        """
+        dictionary = self.dictionaries[dimension]
+        known = set(dictionary)
+        dictionary.extend(label for label in pd.unique(values) if label not in known)
+        return pd.Categorical(values, categories=dictionary).codes
+
+    def fold(self, contributions):
+        """
+        貢献データ（developer, repository, type, created_at 列）を月ごとに集計してキューブに加える
+        """
+        contributions = contributions.dropna(subset=LABEL_DIMENSIONS + ["created_at"])
+        if contributions.empty:
+            return
+        codes = pd.DataFrame({
+            "developer": self.encode(contributions["developer"].astype(str), "developer").astype("int32"),
+            "repository": self.encode(contributions["repository"].astype(str), "repository").astype("int32"),
+            "month": month_ordinals(contributions["created_at"]),
+            "type": self.encode(contributions["type"].astype(str), "type").astype("int16"),
+        })
+        counts = codes.groupby(CUBE_DIMENSIONS).size().astype("int64").reset_index(name=COUNT_COLUMN)
+        self.counts = pd.concat([self.counts, counts], ignore_index=True)
+        self.last_month = int(self.counts["month"].max())
+
+    def drop_from_month(self, month):
+        """
+        month 以降の集計を取り除く（その月からデータを集計し直すため）
+        """
+        self.counts = self.counts[self.counts["month"] < month].reset_index(drop=True)
+
+    def rollup(self, dimensions, filters=None):
+        """
+        dimensions（CUBE_DIMENSIONS の一部）ごとに貢献数を合計し、ラベルに戻したデータフレームを返す。
+        filters（例: {"repository": "apache/zookeeper"}、値はリストでもよい）で先に行を絞り込む。
+        month は pandas の月次 Period とし、行は dimensions の順に並べ替えて返す
+        """
+        counts = self.counts
+        for dimension, values in (filters or {}).items():
+            values = [values] if isinstance(values, str) or not hasattr(values, "__iter__") else list(values)
+            if dimension == "month":
+                wanted = pd.PeriodIndex(values, freq="M").asi8
+            else:
+                dictionary = self.dictionaries[dimension]
+                wanted = [dictionary.index(value) for value in values if value in dictionary]
+            counts = counts[counts[dimension].isin(wanted)]
+
+        rolled = counts.groupby(list(dimensions), sort=False)[COUNT_COLUMN].sum().reset_index()
+        for dimension in dimensions:
+            if dimension == "month":
+                rolled[dimension] = pd.PeriodIndex.from_ordinals(rolled[dimension], freq="M")
+            else:
+                # 辞書は追加順なので、ラベルに戻してから文字列順に並べ替える
+                rolled[dimension] = np.asarray(self.dictionaries[dimension], dtype=object)[rolled[dimension].to_numpy()]
+        return rolled.sort_values(list(dimensions), kind="stable").reset_index(drop=True)
+
+
+def update_cube(data_dir=DEFAULT_DATA_DIR, cube_path=None, full=False):
+    """
+    developer_data から月次の貢献キューブを作り、保存して返す。
+    CSV が前回から更新されていなければ保存済みのキューブをそのまま返す。
+    CSV のファイル構成（追加・削除）が変わっていなければ、
+    前回の最終月（途中までしか集計していない可能性がある）以降の貢献だけを読み込んで集計し直す。
+    既存の CSV に過去の月の貢献が追加される場合は full=True で全て作り直すこと
+    """
+    cube_path = cube_path or cube_path_for(data_dir)
+    source_files = list_source_files(data_dir)
+    cube = None
+    if not full and os.path.exists(cube_path):
+        cube = ContributionCube.load(cube_path)
+        if cube.source_files == source_files:
+            print(f"✅ CSV が更新されていないため、保存済みのキューブを使います: {cube_path}")
+            return cube
+        if sorted(cube.source_files) != sorted(source_files) or cube.last_month is None:
+            print("⚠️ CSV の構成が変わったため、キューブを作り直します")
+            cube = None
+
+    columns = ["developer", "repository", "type", "created_at"]
+    if cube is None:
+        cube = ContributionCube.empty()
+        contributions = load_contributions(data_dir, columns=columns)
+    else:
+        start = pd.PeriodIndex.from_ordinals([cube.last_month], freq="M")[0]
+        contributions = load_contributions(data_dir, columns=columns, filters=[("year", ">=", start.year)])
+        contributions = contributions[month_ordinals(contributions["created_at"]) >= cube.last_month]
+        cube.drop_from_month(cube.last_month)
+        print(f"🔄 {start} 以降の {len(contributions)} 件の貢献をキューブに追加します")
+
+    cube.fold(contributions)
+    cube.source_files = source_files
+    cube.save(cube_path)
+    print(f"✅ 月次の貢献キューブを保存しました: {cube_path}（{len(cube.counts)} セル）")
+    return cube
@@ -0,0 +1,233 @@
+import ast
+import json
+import os
+import shutil
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# 変換元の CSV ディレクトリ（{開発者}_issues.csv / {開発者}_pulls.csv）
+DEFAULT_DATA_DIR = "../results/developer_data"
+
+# Parquet に保存する列。CSV にない列は欠損値になる
+SOURCE_COLUMNS = [
+    "repository_url", "number", "title", "state", "created_at", "updated_at",
+    "closed_at", "comments", "comments_url", "url", "user",
+]
+DATE_COLUMNS = ["created_at", "updated_at", "closed_at"]
+CATEGORY_COLUMNS = ["developer", "repository", "type"]
+
+# type・year でパーティション分割する。created_at が不正な行は year=0 に入れる
+PARTITION_COLUMNS = ["type", "year"]
+MANIFEST_FILE = "_manifest.json"
+# iter_contributions で1回に読み込む行数の既定値
+DEFAULT_BATCH_SIZE = 200_000
+# データセットの列構成が変わったら上げる（古いデータセットは作り直す）
+DATASET_VERSION = 3
+
+# GitHub API の日時の形式（例: 2024-01-02T03:04:05Z）
+GITHUB_TIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+# user 列（dict の repr、または JSON）の先頭の login キーの値。
+# 引用符やバックスラッシュを含む値は ast.literal_eval に任せる
+USER_LOGIN_PATTERN = r"""^\{\s*(?P<key>['"])login(?P=key)\s*:\s*(?P<quote>['"])(?P<login>[^'"\\]*)(?P=quote)"""
+
+
+def parse_timestamps(values):
+    """
+    日時の文字列を UTC の datetime に変換する（不正な値は NaT）。
+    GitHub API の形式の値は pyarrow の strptime で一括変換し、それ以外の形式の行だけ ISO8601 として解釈する。
+    strptime は 2021-02-29 のような存在しない日付を翌月に繰り越すため、変換後の日付が元の文字列の日付と一致する値だけ使う
+    """
+    array = pa.array(values.to_numpy(dtype=object), type=pa.string(), from_pandas=True)
+    parsed = pc.strptime(array, format=GITHUB_TIME_FORMAT, unit="us", error_is_null=True)
+    same_date = pc.equal(pc.strftime(parsed, format="%Y-%m-%d"), pc.utf8_slice_codeunits(array, 0, 10))
+    parsed = pc.if_else(same_date, parsed, None)
+    timestamps = pd.Series(parsed.to_pandas(), index=values.index).dt.tz_localize("UTC")
+    rest = timestamps.isna() & values.notna()
+    if rest.any():
+        timestamps[rest] = pd.to_datetime(values[rest], errors="coerce", utc=True, format="ISO8601")
+    return timestamps
+
+
+def literal_user_login(user_info):
+    """
+    user 列の文字列を ast.literal_eval で dict に戻して login を返す（正規表現で取れない行用）
+    """
+    try:
+        return ast.literal_eval(user_info).get("login", None)
+    except (ValueError, SyntaxError, AttributeError):
+        return None
+
+
+def extract_user_logins(users):
+    """
+    user 列から GitHub のユーザー名（login）を取り出す。
+    login が先頭のキーである通常の行は正規表現でまとめて抽出し、
+    それ以外の行だけ ast.literal_eval で解釈する
+    """
+    logins = users.str.extract(USER_LOGIN_PATTERN, expand=True)["login"]
+    fallback = logins.isna() & users.notna()
+    if fallback.any():
+        logins[fallback] = users[fallback].map(literal_user_login)
+    return logins
+
+
+def dataset_dir_for(data_dir):
+    """
+    CSV ディレクトリに対応する Parquet データセットのディレクトリ（例: developer_data -> developer_data_parquet）
+    """
+    return f"{os.path.normpath(data_dir)}_parquet"
+
+
+def list_source_files(data_dir):
+    """
+    変換対象の CSV を {ファイル名: 更新時刻} で返す
+    """
+    return {
+        file_name: os.path.getmtime(os.path.join(data_dir, file_name))
+        for file_name in sorted(os.listdir(data_dir))
+        if file_name.endswith(".csv")
+    }
+
+
+def read_source_csv(data_dir, file_name):
+    """
+    1つの CSV を読み込み、開発者名・貢献タイプ・リポジトリ名を付けて型を揃えたデータフレームを返す
+    """
+    # ファイル名から開発者名と貢献タイプ（issues / pulls）を抽出
+    name_parts = os.path.splitext(file_name)[0].split("_")
+    df = pd.read_csv(
+        os.path.join(data_dir, file_name),
+        usecols=lambda column: column in SOURCE_COLUMNS,
+        dtype=str,
+    )
+    df = df.reindex(columns=SOURCE_COLUMNS)
+    df.insert(0, "developer", name_parts[0])
+    df.insert(1, "type", name_parts[1] if len(name_parts) > 1 else "")
+    # URLの形式: https://api.github.com/repos/owner_name/repository_name
+    df.insert(2, "repository", df["repository_url"].str.extract(r"repos/([^/]+/[^/]+)", expand=False))
+    for column in DATE_COLUMNS:
+        df[column] = parse_timestamps(df[column])
+    for column in ["number", "comments"]:
+        df[column] = pd.to_numeric(df[column], errors="coerce").astype("Int64")
+    # user の login は取り込み時に1回だけ抽出して列にしておく
+    df["user_login"] = extract_user_logins(df["user"])
+    return df
+
+
+def ingest(data_dir=DEFAULT_DATA_DIR, dataset_dir=None):
+    """
+    developer_data の CSV をまとめて1つの Parquet データセットに変換する。
+    developer / repository は辞書エンコード（カテゴリ）、日時は UTC の timestamp として保存し、
+    type・year（created_at の年）でパーティション分割する
+    """
+    dataset_dir = dataset_dir or dataset_dir_for(data_dir)
+    source_files = list_source_files(data_dir)
+    print(f"📦 {len(source_files)} 件の CSV を Parquet に変換します: {data_dir} -> {dataset_dir}")
+
+    df = pd.concat([read_source_csv(data_dir, file_name) for file_name in source_files], ignore_index=True)
+    df = df.sort_values(["developer", "created_at"], kind="stable")
+    df["year"] = df["created_at"].dt.year.fillna(0).astype("int32")
+    for column in ["developer", "repository"]:
+        df[column] = df[column].astype("category")
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    # 書き込み途中のデータセットを読まないよう、一時ディレクトリに書いてから置き換える
+    tmp_dir = f"{dataset_dir}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    pq.write_to_dataset(table, tmp_dir, partition_cols=PARTITION_COLUMNS)
+    with open(os.path.join(tmp_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump({"source_files": source_files, "rows": len(df), "version": DATASET_VERSION}, f)
+    shutil.rmtree(dataset_dir, ignore_errors=True)
+    os.replace(tmp_dir, dataset_dir)
+
+    print(f"✅ {len(df)} 行を保存しました: {dataset_dir}")
+    return dataset_dir
+
+
+def is_stale(data_dir, dataset_dir):
+    """
+    データセットがない、古い形式である、または CSV が追加・更新されていれば True
+    """
+    manifest_path = os.path.join(dataset_dir, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return True
+    with open(manifest_path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("version") != DATASET_VERSION:
+        return True
+    return manifest["source_files"] != list_source_files(data_dir)
+
+
+def ensure_dataset(data_dir):
+    """
+    データセットがないか CSV より古い場合は ingest() で作り直し、データセットのディレクトリを返す
+    """
+    dataset_dir = dataset_dir_for(data_dir)
+    if is_stale(data_dir, dataset_dir):
+        ingest(data_dir, dataset_dir)
+    return dataset_dir
+
+
+def columns_to_read(columns, dropna_created_at):
+    """
+    不正な日付の行を除くために created_at も読み込む列に加える
+    """
+    if columns is not None and dropna_created_at and "created_at" not in columns:
+        return list(columns) + ["created_at"]
+    return columns
+
+
+def finish_frame(df, columns, dropna_created_at):
+    """
+    読み込んだデータフレームから不正な日付の行を除き、列とカテゴリを整える
+    """
+    if dropna_created_at:
+        # 不正な日付の行を除外
+        df = df.dropna(subset=["created_at"])
+        if columns is not None:
+            df = df[list(columns)]
+    for column in CATEGORY_COLUMNS:
+        if column in df.columns:
+            # filters で読み飛ばした行のカテゴリは残さない（groupby の空グループを防ぐ）
+            df[column] = df[column].astype("category").cat.remove_unused_categories()
+    return df.reset_index(drop=True)
+
+
+def load_contributions(data_dir=DEFAULT_DATA_DIR, columns=None, filters=None, dropna_created_at=True):
+    """
+    developer_data を Parquet データセットから読み込む。
+    データセットがないか CSV より古い場合は先に ingest() で作り直す。
+    columns で読み込む列を絞り、filters（例: [("type", "=", "pulls"), ("year", ">=", 2020)]）で
+    パーティションと行グループ単位で読み飛ばす。
+    developer / repository / type はカテゴリ型、created_at などは UTC の datetime 型で返す
+    """
+    dataset_dir = ensure_dataset(data_dir)
+    df = pq.read_table(dataset_dir, columns=columns_to_read(columns, dropna_created_at), filters=filters).to_pandas()
+    return finish_frame(df, columns, dropna_created_at)
+
+
+def iter_contributions(data_dir=DEFAULT_DATA_DIR, columns=None, filters=None, dropna_created_at=True,
+                       batch_size=DEFAULT_BATCH_SIZE):
+    """
+    load_contributions と同じ列・条件・順序で、最大 batch_size 行ずつのデータフレームを順に返す。
+    データセット全体をメモリに載せずに、CSV への書き出しなどを少しずつ行うときに使う
+    """
+    dataset_dir = ensure_dataset(data_dir)
+    dataset = ds.dataset(dataset_dir, format="parquet", partitioning="hive")
+    scanner = dataset.scanner(
+        columns=columns_to_read(columns, dropna_created_at),
+        filter=pq.filters_to_expression(filters) if filters else None,
+        batch_size=batch_size,
+    )
+    for batch in scanner.to_batches():
+        if batch.num_rows:
+            yield finish_frame(batch.to_pandas(), columns, dropna_created_at)
+
+
+if __name__ == "__main__":
+    ingest(DEFAULT_DATA_DIR)
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+
+PHASES = ["before", "after"]
+
+
+def classify_pre_post(data, pivots, developer_column="developer", repo_column="repo", time_column="created_at"):
+    """
+    各開発者の貢献を、基準リポジトリ（pivots）に初めて貢献した時点の前 (before) と後 (after) に分類する。
+    全ての基準リポジトリについて、開発者ごとの初回貢献の位置を1回の groupby-min で求め、
+    開発者で結合してから位置を比較するため、基準リポジトリが増えても走査は1回で済む。
+    基準リポジトリに貢献していない開発者と、基準リポジトリ自体への貢献は含めない。
+    戻り値の列: pivot, phase, developer, repo
+    """
+    data = data.dropna(subset=[repo_column])
+    # 同じ時刻の貢献は元の順序を保ち、初回貢献の行より前か後かを位置で判定する
+    data = data.sort_values([developer_column, time_column], kind="stable")
+    rows = pd.DataFrame({
+        "developer": data[developer_column].to_numpy(),
+        "repo": data[repo_column].to_numpy(),
+        "order": np.arange(len(data)),
+    })
+
+    first_contact = (
+        rows[rows["repo"].isin(pivots)]
+        .groupby(["developer", "repo"], observed=True)["order"].min()
+        .reset_index()
+        .rename(columns={"repo": "pivot", "order": "first_order"})
+    )
+    joined = rows.merge(first_contact, on="developer")
+    joined = joined[joined["repo"] != joined["pivot"]]
+    joined["phase"] = np.where(joined["order"] < joined["first_order"], "before", "after")
+    return joined.sort_values(["pivot", "order"], kind="stable")[["pivot", "phase", "developer", "repo"]].reset_index(drop=True)
+
+
+def count_developers(classified):
+    """
+    基準リポジトリ・前後ごとに、各リポジトリに貢献した開発者の人数を多い順に返す。
+    戻り値の列: pivot, phase, repo, count
+    """
+    unique_pairs = classified.drop_duplicates(["pivot", "phase", "developer", "repo"])
+    counts = unique_pairs.groupby(["pivot", "phase", "repo"], observed=True).size().reset_index(name="count")
+    return counts.sort_values(["pivot", "phase", "count", "repo"], ascending=[True, True, False, True]).reset_index(drop=True)
+
+
+def count_contributions(classified):
+    """
+    基準リポジトリ・前後ごとに、リポジトリと開発者の組ごとの貢献数を返す。
+    戻り値の列: pivot, phase, repo, developer, count
+    """
+    return classified.groupby(["pivot", "phase", "repo", "developer"], observed=True).size().reset_index(name="count")
+
+
+def list_developers(classified):
+    """
+    基準リポジトリ・前後ごとに、各リポジトリに貢献した開発者の人数と一覧を返す。
+    戻り値の列: pivot, phase, repo, count, developers
+    """
+    unique_pairs = classified.drop_duplicates(["pivot", "phase", "developer", "repo"])
+    grouped = unique_pairs.groupby(["pivot", "phase", "repo"], observed=True)["developer"]
+    return pd.DataFrame({
+        "count": grouped.size(),
+        "developers": grouped.agg(lambda developers: sorted(developers)),
+    }).reset_index()
+
+
+def pre_post_summaries(data, pivots, **columns):
+    """
+    classify_pre_post の結果から、人数 (count)・開発者ごとの貢献数 (detailed)・開発者一覧 (with_developers)
+    の3種類の集計をまとめて返す
+    """
+    classified = classify_pre_post(data, pivots, **columns)
+    return {
+        "count": count_developers(classified),
+        "detailed": count_contributions(classified),
+        "with_developers": list_developers(classified),
+    }
+
+
+def split_summary(summary, pivot, phase):
+    """
+    集計結果から1つの基準リポジトリ・前後の行を取り出し、pivot・phase 列を除いて返す
+    """
+    selected = summary[(summary["pivot"] == pivot) & (summary["phase"] == phase)]
+    return selected.drop(columns=["pivot", "phase"]).reset_index(drop=True)
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+
+# 1チャンクで生成する (i, j) ペア数の上限。ウィンドウが広くてもメモリ使用量をこの程度に抑える
+DEFAULT_CHUNK_PAIRS = 2_000_000
+
+
+def to_seconds(times):
+    """
+    datetime の Series（tz 付きでもよい）を UNIX 秒の int64 配列に変換する
+    """
+    elapsed = pd.Series(pd.to_datetime(times, utc=True)) - pd.Timestamp("1970-01-01", tz="UTC")
+    return (elapsed // pd.Timedelta(seconds=1)).to_numpy(dtype="int64")
+
+
+def window_bounds(groups, seconds, window_seconds, query_groups=None, query_seconds=None):
+    """
+    (グループ, 時刻) で並べ替えた配列について、各クエリ（省略時は各行自身）と同じグループで
+    時刻差が window_seconds 以内の行の範囲 [lo, hi) を searchsorted で求める。
+    グループごとに十分離れたオフセットを足した1本のキーにすることで、全グループを一度に二分探索する
+    """
+    if query_groups is None:
+        query_groups, query_seconds = groups, seconds
+    if len(seconds) == 0 or len(query_seconds) == 0:
+        empty = np.zeros(len(query_seconds), dtype="int64")
+        return empty, empty
+    origin = min(seconds.min(), query_seconds.min())
+    stride = int(max(seconds.max(), query_seconds.max()) - origin) + 2 * window_seconds + 1
+    keys = groups.astype("int64") * stride + (seconds - origin)
+    query_keys = query_groups.astype("int64") * stride + (query_seconds - origin)
+    lo = np.searchsorted(keys, query_keys - window_seconds, side="left")
+    hi = np.searchsorted(keys, query_keys + window_seconds, side="right")
+    return lo, hi
+
+
+def iter_ranges(lo, hi, chunk_pairs=DEFAULT_CHUNK_PAIRS):
+    """
+    各クエリ q の範囲 [lo[q], hi[q]) を展開した (クエリ番号, 行番号) の配列の組をチャンクごとに返す
+    """
+    counts = hi - lo
+    ends = np.cumsum(counts)
+    start = 0
+    while start < len(counts):
+        # 累積ペア数が chunk_pairs を超えない範囲のクエリをまとめて処理する（1件で超える場合はその1件）
+        done = ends[start - 1] if start else 0
+        end = max(int(np.searchsorted(ends, done + chunk_pairs, side="right")), start + 1)
+        chunk_counts = counts[start:end]
+        left = np.repeat(np.arange(start, end), chunk_counts)
+        # 各クエリの [lo, hi) を連結した列: lo を繰り返し、範囲内の通し番号を足す
+        offsets = np.repeat(np.cumsum(chunk_counts) - chunk_counts, chunk_counts)
+        right = np.repeat(lo[start:end], chunk_counts) + (np.arange(len(left)) - offsets)
+        yield left, right
+        start = end
+
+
+def iter_window_pairs(groups, seconds, window_seconds, chunk_pairs=DEFAULT_CHUNK_PAIRS):
+    """
+    同じグループ内で時刻差が window_seconds 以内の行の組 (i, j)（i == j を含む）を、
+    行番号の配列の組としてチャンクごとに返す。
+    groups・seconds は (グループ, 時刻) の順に並べ替えておくこと。
+    ウィンドウの範囲を求めるのは O(N log N)、列挙するのは出力に比例する
+    """
+    lo, hi = window_bounds(groups, seconds, window_seconds)
+    yield from iter_ranges(lo, hi, chunk_pairs)
+
+
+def iter_window_matches(query_groups, query_seconds, groups, seconds, window_seconds, chunk_pairs=DEFAULT_CHUNK_PAIRS):
+    """
+    各クエリ（キーパーソンの貢献など）と同じグループで時刻差が window_seconds 以内の行を、
+    (クエリ番号, 行番号) の配列の組としてチャンクごとに返す。groups・seconds は並べ替えておくこと
+    """
+    lo, hi = window_bounds(groups, seconds, window_seconds, query_groups, query_seconds)
+    yield from iter_ranges(lo, hi, chunk_pairs)
@@ -0,0 +1,4 @@
+"""
+GitHub API クローラー共通モジュール。
+各スクリプトからは scripts/ を sys.path に追加して `from crawler.xxx import ...` で利用する。
+"""
@@ -0,0 +1,151 @@
+import asyncio
+import os
+
+import aiohttp
+
+from crawler.http_cache import is_immutable, token_scope
+from crawler.retry import CONNECTION_ERROR, CircuitBreaker, RetryMetrics, RetryPolicy, RetryState, endpoint_of
+from crawler.token_pool import TokenPool
+
+# GitHub API のベースURL（ローカルのスタブサーバーで試す場合は GITHUB_API_URL で上書きする）
+DEFAULT_API_URL = "https://api.github.com"
+
+
+def resource_for_path(path):
+    """
+    URLパスから GitHub のレート制限区分（core / search / graphql）を判定する
+    """
+    if path.startswith("/search/"):
+        return "search"
+    if path == "/graphql":
+        return "graphql"
+    return "core"
+
+
+class AsyncGitHubClient:
+    """
+    aiohttp ベースの GitHub API クライアント。
+    同時に送信するリクエスト数をセマフォで制限し、レート制限の状態を全タスクで共有する。
+    tokens に複数のトークンを渡すと、リクエストごとに残量が最も多いトークンを使い、
+    全トークンの残量が尽きたときだけリセットまで待機する。
+    cache (HttpCache) を渡すと、不変リソースはキャッシュから返し、それ以外は ETag で再検証する。
+    5xx・接続エラー・二次レート制限は retry_policy に従って再試行し、回数は metrics に記録する
+    """
+
+    def __init__(self, tokens, api_url=None, max_concurrency=10, timeout=30, cache=None, cache_scope=None,
+                 retry_policy=None, circuit_breaker=None):
+        self.api_url = (api_url or os.getenv("GITHUB_API_URL", DEFAULT_API_URL)).rstrip("/")
+        self.headers = {"Accept": "application/vnd.github+json"}
+        self.token_pool = tokens if isinstance(tokens, TokenPool) else TokenPool(tokens)
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.cache = cache
+        # プール内のトークンは同じ閲覧権限を持つ前提で、先頭のトークンをキャッシュのスコープにする
+        self.cache_scope = cache_scope or token_scope(self.token_pool.tokens[0] if self.token_pool.tokens else None)
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.metrics = RetryMetrics()
+        self.session = None
+
+    async def __aenter__(self):
+        self.session = aiohttp.ClientSession(headers=self.headers, timeout=self.timeout)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.session.close()
+
+    async def acquire_slot(self, resource):
+        """
+        送信枠（セマフォ）を確保してから残量のあるトークンを1つ確保し、トークンを返す。
+        全トークンが尽きていれば、送信枠を手放してからリセットまで待機する
+        （search の残量待ちで、残量のある core などのリクエストを止めないように）。
+        呼び出し側は送信後に self.semaphore.release() すること
+        """
+        while True:
+            await self.semaphore.acquire()
+            token, wait_time = self.token_pool.acquire(resource)
+            if wait_time <= 0:
+                return token
+            self.semaphore.release()
+            print(f"⚠ 全トークンがレート制限に達しました ({resource})。{wait_time:.0f}秒待機します...")
+            await asyncio.sleep(wait_time)
+
+    async def wait_for_circuit(self):
+        """
+        サーキットブレーカーが開いている間（エラー率の急増・二次レート制限）は送信を止める
+        """
+        while (wait_time := self.circuit_breaker.wait_time()) > 0:
+            await asyncio.sleep(wait_time)
+
+    async def get_json(self, path, params=None):
+        """
+        GET リクエストを送信し、(ステータスコード, JSON) を返す。
+        一次レート制限 (403/429) の場合は他のトークンで、全て尽きていればリセットを待って再試行する。
+        再試行を使い切った場合は最後のステータスコード（接続エラーなら None）と None を返す
+        """
+        resource = resource_for_path(path)
+        url = f"{self.api_url}{path}"
+
+        request_headers = {}
+        cached = None
+        if self.cache is not None:
+            cache_key = self.cache.make_key(self.cache_scope, url, params)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                cached_data, etag, immutable = cached
+                if immutable:
+                    return 200, cached_data
+                request_headers["If-None-Match"] = etag
+
+        retry = RetryState(
+            self.retry_policy, self.circuit_breaker, self.metrics, endpoint_of(path), len(self.token_pool)
+        )
+        while True:
+            await self.wait_for_circuit()
+            status, response_headers, data = None, {}, None
+            try:
+                # 実際に送信する直前にトークンを選ぶ（待機中のタスクが残量を先取りしないように）
+                token = await self.acquire_slot(resource)
+                try:
+                    headers = dict(request_headers)
+                    if token:
+                        headers["Authorization"] = f"token {token}"
+                    async with self.session.get(url, params=params, headers=headers) as response:
+                        self.token_pool.update(token, resource, response.headers)
+                        status, response_headers = response.status, response.headers
+                        if status == 200:
+                            data = await response.json()
+                            reason = None
+                        else:
+                            body_text = await response.text() if status in (403, 429) else ""
+                            reason = self.retry_policy.classify(status, response_headers, body_text)
+                finally:
+                    self.semaphore.release()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                reason = CONNECTION_ERROR
+                print(f"⚠ 接続エラー: {url} {e!r}")
+
+            if not retry.schedule(reason, response_headers):
+                break
+            if retry.delay > 0:
+                print(f"⚠ {reason} のため {retry.delay:.1f}秒後に再試行します ({retry.attempt}/{self.retry_policy.max_attempts}): {url}")
+                await asyncio.sleep(retry.delay)
+
+        if retry.gave_up:
+            print(f"❌ 最大リトライ回数を超えました: {url} ({reason})")
+            return status, None
+
+        if status == 304 and cached is not None:
+            self.cache.touch(cache_key)
+            return 200, cached_data
+
+        if status == 200:
+            if self.cache is not None:
+                self.cache.put(
+                    cache_key, data,
+                    etag=response_headers.get("ETag"),
+                    immutable=is_immutable(path, params),
+                )
+            return status, data
+
+        return status, None
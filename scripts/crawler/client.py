@@ -0,0 +1,170 @@
+import os
+import re
+import time
+from urllib.parse import parse_qsl, urlsplit
+
+import requests
+
+from crawler.async_client import DEFAULT_API_URL, resource_for_path
+from crawler.http_cache import is_immutable, token_scope
+from crawler.retry import (
+    CONNECTION_ERROR, PRIMARY_RATE_LIMIT, SECONDARY_RATE_LIMIT, CircuitBreaker, RetryMetrics, RetryPolicy, RetryState,
+    endpoint_of,
+)
+from crawler.token_pool import TokenPool
+
+LINK_PATTERN = re.compile(r'<([^>]+)>;\s*rel="([^"]+)"')
+
+
+def next_page_params(headers):
+    """
+    Link ヘッダーの rel="next" の URL からクエリパラメータを取り出して返す。次のページがなければ None
+    """
+    for url, rel in LINK_PATTERN.findall(headers.get("Link", "")):
+        if rel == "next":
+            return dict(parse_qsl(urlsplit(url).query))
+    return None
+
+
+class GitHubClient:
+    """
+    requests ベースの同期版 GitHub API クライアント。
+    tokens に複数のトークンを渡すと、リクエストごとに残量が最も多いトークンを使い、
+    全トークンの残量が尽きたときだけリセットまで待機する。
+    cache (HttpCache) を渡すと、不変リソースはキャッシュから返し、それ以外は ETag で再検証する。
+    5xx・接続エラー・二次レート制限は retry_policy に従って再試行し、回数は metrics に記録する
+    """
+
+    def __init__(self, tokens, api_url=None, timeout=30, cache=None, cache_scope=None,
+                 retry_policy=None, circuit_breaker=None):
+        self.api_url = (api_url or os.getenv("GITHUB_API_URL", DEFAULT_API_URL)).rstrip("/")
+        self.session = requests.Session()
+        self.session.headers["Accept"] = "application/vnd.github+json"
+        self.token_pool = tokens if isinstance(tokens, TokenPool) else TokenPool(tokens)
+        self.timeout = timeout
+        self.cache = cache
+        # プール内のトークンは同じ閲覧権限を持つ前提で、先頭のトークンをキャッシュのスコープにする
+        self.cache_scope = cache_scope or token_scope(self.token_pool.tokens[0] if self.token_pool.tokens else None)
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.metrics = RetryMetrics()
+
+    def acquire_token(self, resource):
+        """
+        残量のあるトークンを1つ確保する。全トークンが尽きていればリセットまで待機する
+        """
+        while True:
+            token, wait_time = self.token_pool.acquire(resource)
+            if wait_time <= 0:
+                return token
+            print(f"⚠ 全トークンがレート制限に達しました ({resource})。{wait_time:.0f}秒待機します...")
+            time.sleep(wait_time)
+
+    def wait_for_circuit(self):
+        """
+        サーキットブレーカーが開いている間（エラー率の急増・二次レート制限）は送信を止める
+        """
+        while (wait_time := self.circuit_breaker.wait_time()) > 0:
+            time.sleep(wait_time)
+
+    def request(self, method, path, params=None, json_body=None, headers=None, retry_on=None):
+        """
+        トークンを選んでリクエストを送信し、レスポンスを返す。
+        一次レート制限 (403/429) の場合は他のトークンで、全て尽きていればリセットを待って再試行する。
+        5xx・二次レート制限で再試行を使い切った場合は最後のレスポンスを返し、
+        接続エラーで使い切った場合は最後の例外を送出する。
+        retry_on に再試行理由を列挙すると、それ以外の理由では1回目の失敗でそのまま返す（または送出する）
+        """
+        resource = resource_for_path(path)
+        url = f"{self.api_url}{path}"
+
+        retry = RetryState(
+            self.retry_policy, self.circuit_breaker, self.metrics, endpoint_of(path), len(self.token_pool), retry_on
+        )
+        while True:
+            self.wait_for_circuit()
+            token = self.acquire_token(resource)
+            request_headers = dict(headers or {})
+            if token:
+                request_headers["Authorization"] = f"token {token}"
+
+            response, error = None, None
+            try:
+                response = self.session.request(
+                    method, url, params=params, json=json_body, headers=request_headers, timeout=self.timeout
+                )
+                self.token_pool.update(token, resource, response.headers)
+                body_text = response.text if response.status_code in (403, 429) else ""
+                reason = self.retry_policy.classify(response.status_code, response.headers, body_text)
+            except requests.exceptions.RequestException as e:
+                error = e
+                reason = CONNECTION_ERROR
+                print(f"⚠ 接続エラー: {url} {e!r}")
+
+            if not retry.schedule(reason, response.headers if response is not None else None):
+                break
+            if retry.delay > 0:
+                print(f"⚠ {reason} のため {retry.delay:.1f}秒後に再試行します ({retry.attempt}/{self.retry_policy.max_attempts}): {url}")
+                time.sleep(retry.delay)
+
+        if retry.gave_up:
+            if retry_on is None or reason in retry_on:
+                print(f"❌ 最大リトライ回数を超えました: {url} ({reason})")
+            if error is not None:
+                raise error
+        return response
+
+    def get_json(self, path, params=None):
+        """
+        GET リクエストを送信し、(ステータスコード, JSON, レスポンスヘッダー) を返す。
+        キャッシュから返した場合のヘッダーは空の辞書になる
+        """
+        url = f"{self.api_url}{path}"
+
+        request_headers = {}
+        cached = None
+        if self.cache is not None:
+            cache_key = self.cache.make_key(self.cache_scope, url, params)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                cached_data, etag, immutable = cached
+                if immutable:
+                    return 200, cached_data, {}
+                request_headers["If-None-Match"] = etag
+
+        response = self.request("GET", path, params=params, headers=request_headers)
+
+        if response.status_code == 304 and cached is not None:
+            self.cache.touch(cache_key)
+            return 200, cached_data, response.headers
+
+        if response.status_code == 200:
+            data = response.json()
+            if self.cache is not None:
+                self.cache.put(
+                    cache_key, data,
+                    etag=response.headers.get("ETag"),
+                    immutable=is_immutable(path, params),
+                )
+            return response.status_code, data, response.headers
+
+        return response.status_code, None, response.headers
+
+    def post_graphql(self, query, variables=None, max_retries=5):
+        """
+        GraphQL API にクエリを送信し、(ステータスコード, JSON, レスポンスヘッダー) を返す。
+        GraphQL のレート制限は HTTP 200 + errors[].type == "RATE_LIMITED" で返ることもあるため、
+        その場合も他のトークン、またはリセット後に再試行する。
+        タイムアウト・5xx はクエリが重すぎることが多いので再試行せず、呼び出し側でバッチを小さくする
+        """
+        body = {"query": query, "variables": variables or {}}
+        for _ in range(max_retries * max(len(self.token_pool), 1)):
+            response = self.request(
+                "POST", "/graphql", json_body=body, retry_on=(PRIMARY_RATE_LIMIT, SECONDARY_RATE_LIMIT)
+            )
+            if response.status_code != 200:
+                return response.status_code, None, response.headers
+            data = response.json()
+            if not any(error.get("type") == "RATE_LIMITED" for error in data.get("errors") or []):
+                return response.status_code, data, response.headers
+        return response.status_code, data, response.headers
@@ -0,0 +1,176 @@
+import os
+import socket
+import sqlite3
+import time
+from contextlib import contextmanager
+
+# 状態DBの既定パス（スクリプト実行時のカレントディレクトリからの相対パス）
+DEFAULT_STATE_PATH = "results/crawl_state.sqlite3"
+
+# 各タスクの状態
+PENDING = "pending"   # 未処理
+CLAIMED = "claimed"   # いずれかのワーカーが処理中
+DONE = "done"         # 取得・保存済み
+MISSING = "missing"   # 対象が存在しない (404 など)。再試行しない
+FAILED = "failed"     # 一時的なエラー。attempts が上限に達するまで再試行する
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class CrawlState:
+    """
+    クローラーの進捗を (ジョブ名, 対象, パート) 単位で SQLite に記録する状態ストア。
+    例: dependencies_file.py ではジョブ "dependencies"、対象 "owner/repo"、パート "pom.xml"。
+    claim() は BEGIN IMMEDIATE で排他的に未処理の対象を確保するため、
+    複数のワーカープロセスが同じDBを共有しても同じ対象を重複して処理しない。
+    lease_seconds より長く処理する対象は renew() で確保期限を延長すること。
+    FAILED のタスクはこのインスタンスの作成（= 今回の実行の開始）より前に失敗したものだけを再確保し、
+    今回の実行中に失敗したものは次回の実行で再試行する
+    """
+
+    def __init__(self, path=DEFAULT_STATE_PATH, worker_id=None, lease_seconds=1800, max_attempts=5):
+        parent_dir = os.path.dirname(path)
+        if parent_dir:
+            os.makedirs(parent_dir, exist_ok=True)
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds  # これより長く claimed のままのタスクは再確保できる
+        self.max_attempts = max_attempts
+        self.started_at = time.time()
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS tasks (
+                job TEXT NOT NULL,
+                item TEXT NOT NULL,
+                part TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                claimed_by TEXT,
+                claimed_at REAL,
+                updated_at REAL,
+                PRIMARY KEY (job, item, part)
+            )
+            """
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS tasks_job_status ON tasks (job, status)")
+
+    @contextmanager
+    def transaction(self):
+        """
+        書き込みロックを最初に取得するトランザクション。例外時はロールバックする
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.conn
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def add(self, job, items, parts, status=PENDING):
+        """
+        対象×パートのタスクを登録する。既に登録済みのタスクは変更しない
+        """
+        now = time.time()
+        rows = ((job, item, part, status, now) for item in items for part in parts)
+        with self.transaction() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO tasks (job, item, part, status, updated_at) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def _claimable(self):
+        # 未処理・前回までの実行で失敗した再試行可能なタスク・期限切れの claimed を確保対象とする
+        return (
+            "(status = ? OR (status = ? AND attempts < ? AND COALESCE(updated_at, 0) < ?) OR (status = ? AND claimed_at < ?))",
+            [PENDING, FAILED, self.max_attempts, self.started_at, CLAIMED, time.time() - self.lease_seconds],
+        )
+
+    def claim(self, job, limit):
+        """
+        未処理のパートが残っている対象を最大 limit 件確保し、{対象: [パート, ...]} を返す。
+        対象は登録順に返す
+        """
+        condition, params = self._claimable()
+        now = time.time()
+        with self.transaction() as conn:
+            items = [
+                row[0] for row in conn.execute(
+                    f"SELECT item FROM tasks WHERE job = ? AND {condition} GROUP BY item ORDER BY MIN(rowid) LIMIT ?",
+                    [job, *params, limit],
+                )
+            ]
+            claimed = {}
+            for item in items:
+                parts = [
+                    row[0] for row in conn.execute(
+                        f"SELECT part FROM tasks WHERE job = ? AND item = ? AND {condition} ORDER BY rowid",
+                        [job, item, *params],
+                    )
+                ]
+                conn.executemany(
+                    "UPDATE tasks SET status = ?, claimed_by = ?, claimed_at = ? WHERE job = ? AND item = ? AND part = ?",
+                    [(CLAIMED, self.worker_id, now, job, item, part) for part in parts],
+                )
+                claimed[item] = parts
+        return claimed
+
+    def record(self, job, results):
+        """
+        処理結果 [(対象, パート, 状態, エラー内容 or None), ...] を1トランザクションで記録する
+        """
+        now = time.time()
+        with self.transaction() as conn:
+            conn.executemany(
+                """
+                UPDATE tasks
+                SET status = ?, attempts = attempts + 1, last_error = ?, claimed_by = NULL, claimed_at = NULL, updated_at = ?
+                WHERE job = ? AND item = ? AND part = ?
+                """,
+                [(status, error, now, job, item, part) for item, part, status, error in results],
+            )
+
+    def renew(self, job, items):
+        """
+        このワーカーが確保中の対象の確保期限を延長する（lease_seconds 以内の間隔で呼ぶ）
+        """
+        now = time.time()
+        with self.transaction() as conn:
+            conn.executemany(
+                "UPDATE tasks SET claimed_at = ? WHERE job = ? AND item = ? AND status = ? AND claimed_by = ?",
+                [(now, job, item, CLAIMED, self.worker_id) for item in items],
+            )
+
+    def release(self, job):
+        """
+        このワーカーが確保したまま終了するタスクを未処理に戻す
+        """
+        with self.transaction() as conn:
+            conn.execute(
+                "UPDATE tasks SET status = ?, claimed_by = NULL, claimed_at = NULL WHERE job = ? AND status = ? AND claimed_by = ?",
+                (PENDING, job, CLAIMED, self.worker_id),
+            )
+
+    def items(self, job, status):
+        """
+        全てのパートが status の対象を登録順に返す
+        """
+        rows = self.conn.execute(
+            "SELECT item FROM tasks WHERE job = ? GROUP BY item HAVING MIN(status = ?) = 1 ORDER BY MIN(rowid)",
+            (job, status),
+        )
+        return [row[0] for row in rows]
+
+    def summary(self, job):
+        """
+        状態ごとのタスク数を返す
+        """
+        rows = self.conn.execute("SELECT status, COUNT(*) FROM tasks WHERE job = ? GROUP BY status", (job,))
+        return dict(rows.fetchall())
+
+    def close(self):
+        self.conn.close()
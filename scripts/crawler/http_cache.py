@@ -0,0 +1,135 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+import zlib
+from urllib.parse import urlencode
+
+# キャッシュファイルの既定パス（スクリプト実行時のカレントディレクトリからの相対パス）
+DEFAULT_CACHE_PATH = "results/cache/github_http_cache.sqlite3"
+
+# キャッシュ全体の上限サイズ（圧縮後のバイト数）
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+# SHA で指定されたオブジェクトは内容が変わらないため再検証せずに返す
+IMMUTABLE_PATH_PATTERN = re.compile(
+    r"^/repos/[^/]+/[^/]+/(commits|git/commits|git/trees|git/blobs)/[0-9a-f]{40}$"
+)
+SHA_PATTERN = re.compile(r"^[0-9a-f]{40}$")
+
+
+def token_scope(token):
+    """
+    トークンそのものを保存しないよう、ハッシュの先頭をキャッシュのスコープ名にする
+    """
+    if not token:
+        return "anonymous"
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()[:16]
+
+
+def is_immutable(path, params=None):
+    """
+    コミットSHA指定の取得や ref にSHAを指定した contents 取得など、内容が変わらないリソースか判定する
+    """
+    if IMMUTABLE_PATH_PATTERN.match(path):
+        return True
+    ref = (params or {}).get("ref")
+    return "/contents/" in path and ref is not None and bool(SHA_PATTERN.match(str(ref)))
+
+
+class HttpCache:
+    """
+    GitHub API のレスポンスを SQLite に保存するキャッシュ。
+    キーは (トークンのスコープ, URL, クエリ) で、不変リソースは無期限に返し、
+    それ以外は ETag を保存して If-None-Match による再検証に使う。
+    合計サイズが上限を超えたら最終アクセスが古いものから削除する (LRU)
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        parent_dir = os.path.dirname(path)
+        if parent_dir:
+            os.makedirs(parent_dir, exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                etag TEXT,
+                immutable INTEGER NOT NULL,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+        self.total_bytes = self._current_size()
+
+    def _current_size(self):
+        return self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    @staticmethod
+    def make_key(scope, url, params=None):
+        query = urlencode(sorted((params or {}).items()))
+        return f"{scope} {url}?{query}" if query else f"{scope} {url}"
+
+    def get(self, key):
+        """
+        キャッシュを検索し、(JSON, ETag, 不変かどうか) を返す。見つからなければ None
+        """
+        row = self.conn.execute(
+            "SELECT body, etag, immutable FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        self.conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        body, etag, immutable = row
+        return json.loads(zlib.decompress(body)), etag, bool(immutable)
+
+    def touch(self, key):
+        """
+        304 で再検証できたエントリの最終アクセス時刻を更新する
+        """
+        self.conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+
+    def put(self, key, data, etag=None, immutable=False):
+        """
+        レスポンスの JSON を圧縮して保存し、必要なら LRU で古いエントリを削除する
+        """
+        if not immutable and not etag:
+            return  # 再検証できないレスポンスは保存しない
+        body = zlib.compress(json.dumps(data).encode("utf-8"))
+        old = self.conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO responses (key, etag, immutable, body, size, accessed_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (key, etag, int(immutable), body, len(body), time.time()),
+        )
+        self.total_bytes += len(body) - (old[0] if old else 0)
+        if self.total_bytes > self.max_bytes:
+            self.evict()
+
+    def evict(self):
+        """
+        合計サイズが上限の 90% 以下になるまで最終アクセスが古い順に削除する
+        """
+        # 複数プロセスで共有している場合に備えて実際のサイズを取り直す
+        self.total_bytes = self._current_size()
+        target = int(self.max_bytes * 0.9)
+        rows = self.conn.execute("SELECT key, size FROM responses ORDER BY accessed_at")
+        stale_keys = []
+        for key, size in rows:
+            if self.total_bytes <= target:
+                break
+            stale_keys.append((key,))
+            self.total_bytes -= size
+        rows.close()
+        self.conn.executemany("DELETE FROM responses WHERE key = ?", stale_keys)
+        print(f"🧹 HTTPキャッシュから {len(stale_keys)} 件を削除しました")
+
+    def close(self):
+        self.conn.close()
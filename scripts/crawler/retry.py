@@ -0,0 +1,207 @@
+import csv
+import os
+import random
+import re
+import time
+from collections import Counter, defaultdict, deque
+
+# リトライ理由
+PRIMARY_RATE_LIMIT = "primary_rate_limit"      # X-RateLimit-Remaining が 0（トークンプールで切り替え・待機）
+SECONDARY_RATE_LIMIT = "secondary_rate_limit"  # 同時実行数などによる二次レート制限・abuse 検出
+SERVER_ERROR = "server_error"                  # 5xx
+CONNECTION_ERROR = "connection_error"          # 接続リセット・タイムアウトなど
+
+RETRYABLE_STATUSES = {500, 502, 503, 504}
+SECONDARY_LIMIT_PATTERN = re.compile(r"secondary rate limit|abuse", re.IGNORECASE)
+
+
+def endpoint_of(path):
+    """
+    メトリクス集計用に、リポジトリ名・SHA・ファイルパスなどを伏せたエンドポイント名を返す。
+    例: /repos/apache/zookeeper/contents/pom.xml -> /repos/:owner/:repo/contents/:path
+    """
+    parts = path.strip("/").split("/")
+    if parts[0] == "repos" and len(parts) >= 3:
+        endpoint = ["repos", ":owner", ":repo"] + parts[3:4]
+        if len(parts) > 4:
+            endpoint.append(":path" if parts[3] == "contents" else ":id")
+        return "/" + "/".join(endpoint)
+    return "/" + "/".join(parts[:2])
+
+
+class RetryPolicy:
+    """
+    レスポンスを分類し、再試行するかどうかと待機秒数を決める。
+    待機時間は full jitter 付きの指数バックオフ（0〜base_delay * 2^attempt の一様乱数、max_delay で頭打ち）
+    """
+
+    def __init__(self, max_attempts=6, base_delay=1.0, max_delay=300.0, secondary_min_delay=60.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.secondary_min_delay = secondary_min_delay  # Retry-After がない二次レート制限の最小待機
+
+    def backoff(self, attempt):
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def classify(self, status, headers, body_text=""):
+        """
+        レスポンスの再試行理由を返す。再試行不要（成功・404 など）なら None
+        """
+        if status in (403, 429):
+            if "Retry-After" in headers or SECONDARY_LIMIT_PATTERN.search(body_text or ""):
+                return SECONDARY_RATE_LIMIT
+            if headers.get("X-RateLimit-Remaining") == "0":
+                return PRIMARY_RATE_LIMIT
+            return None  # 権限不足などの 403 は再試行しない
+        if status in RETRYABLE_STATUSES:
+            return SERVER_ERROR
+        return None
+
+    def delay(self, reason, attempt, headers=None):
+        """
+        再試行までの待機秒数を返す。二次レート制限は Retry-After を優先する
+        """
+        headers = headers or {}
+        if reason == SECONDARY_RATE_LIMIT:
+            retry_after = headers.get("Retry-After")
+            if retry_after is not None and retry_after.isdigit():
+                return int(retry_after) + random.uniform(0, 1)
+            return self.secondary_min_delay * 2 ** min(attempt, 3) + self.backoff(attempt)
+        return self.backoff(attempt)
+
+
+class CircuitBreaker:
+    """
+    直近 window 件のうち失敗の割合が threshold を超えたら cooldown 秒だけ全リクエストを止める。
+    二次レート制限を受けたときは pause() でクライアント全体を Retry-After の間止める
+    """
+
+    def __init__(self, window=50, threshold=0.5, min_calls=20, cooldown=60.0):
+        self.outcomes = deque(maxlen=window)
+        self.threshold = threshold
+        self.min_calls = min_calls
+        self.cooldown = cooldown
+        self.open_until = 0.0
+
+    def wait_time(self):
+        """
+        リクエスト送信前に待つべき秒数を返す
+        """
+        return max(self.open_until - time.time(), 0)
+
+    def pause(self, seconds):
+        self.open_until = max(self.open_until, time.time() + seconds)
+
+    def record(self, success):
+        self.outcomes.append(success)
+        if len(self.outcomes) < self.min_calls:
+            return
+        failure_rate = self.outcomes.count(False) / len(self.outcomes)
+        if failure_rate > self.threshold:
+            print(f"⚠ エラー率 {failure_rate:.0%} のため {self.cooldown:.0f}秒間リクエストを停止します")
+            self.pause(self.cooldown)
+            self.outcomes.clear()
+
+
+class RetryMetrics:
+    """
+    エンドポイントごとのリクエスト数と理由別のリトライ回数を集計する
+    """
+
+    def __init__(self):
+        self.requests = Counter()
+        self.retries = defaultdict(Counter)
+        self.gave_up = Counter()
+
+    def record_request(self, endpoint):
+        self.requests[endpoint] += 1
+
+    def record_retry(self, endpoint, reason):
+        self.retries[endpoint][reason] += 1
+
+    def record_give_up(self, endpoint):
+        self.gave_up[endpoint] += 1
+
+    def rows(self):
+        reasons = [PRIMARY_RATE_LIMIT, SECONDARY_RATE_LIMIT, SERVER_ERROR, CONNECTION_ERROR]
+        return [
+            {
+                "endpoint": endpoint,
+                "requests": count,
+                **{reason: self.retries[endpoint][reason] for reason in reasons},
+                "gave_up": self.gave_up[endpoint],
+            }
+            for endpoint, count in self.requests.most_common()
+        ]
+
+    def report(self):
+        for row in self.rows():
+            retries = {k: v for k, v in row.items() if k not in ("endpoint", "requests") and v}
+            print(f"📈 {row['endpoint']}: {row['requests']} requests, retries {retries or 0}")
+
+    def save_csv(self, path):
+        """
+        エンドポイントごとのリクエスト数・理由別のリトライ回数を CSV に保存する（実行ごとに上書き）
+        """
+        rows = self.rows()
+        if not rows:
+            return
+        parent_dir = os.path.dirname(path)
+        if parent_dir:
+            os.makedirs(parent_dir, exist_ok=True)
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+class RetryState:
+    """
+    1リクエスト分の再試行を管理する。
+    schedule() に再試行理由を渡すと、メトリクスとサーキットブレーカーに記録し、
+    再試行する場合は True を返して待機秒数を delay に設定する。
+    retry_on に理由を列挙すると、それ以外の理由では再試行せずにすぐ諦める
+    """
+
+    def __init__(self, policy, breaker, metrics, endpoint, token_count=1, retry_on=None):
+        self.policy = policy
+        self.retry_on = retry_on
+        self.breaker = breaker
+        self.metrics = metrics
+        self.endpoint = endpoint
+        self.attempt = 0
+        self.rate_limited = 0
+        # 一次レート制限はトークンの切り替えで解消するため、トークン数に応じて多めに許容する
+        self.max_rate_limited = policy.max_attempts * max(token_count, 1)
+        self.delay = 0.0
+        self.gave_up = False
+        metrics.record_request(endpoint)
+
+    def schedule(self, reason, headers=None):
+        self.breaker.record(reason not in (SECONDARY_RATE_LIMIT, SERVER_ERROR, CONNECTION_ERROR))
+        if reason is None:
+            return False
+
+        if self.retry_on is not None and reason not in self.retry_on:
+            self.gave_up = True
+            self.metrics.record_give_up(self.endpoint)
+            return False
+
+        self.metrics.record_retry(self.endpoint, reason)
+        if reason == PRIMARY_RATE_LIMIT:
+            self.rate_limited += 1
+            self.delay = 0.0  # 待機はトークンプールが行う
+            retry = self.rate_limited <= self.max_rate_limited
+        else:
+            self.attempt += 1
+            self.delay = self.policy.delay(reason, self.attempt, headers)
+            retry = self.attempt < self.policy.max_attempts
+            if retry and reason == SECONDARY_RATE_LIMIT:
+                # 二次レート制限は同時実行数が原因のことが多いため、クライアント全体を止める
+                self.breaker.pause(self.delay)
+
+        if not retry:
+            self.gave_up = True
+            self.metrics.record_give_up(self.endpoint)
+        return retry
@@ -0,0 +1,104 @@
+import csv
+import os
+
+
+class StreamingCsvWriter:
+    """
+    行をメモリに溜め込まずに CSV へ追記していく書き込み器。
+    書き込み中は "<path>.partial" に出力し、flush_rows 行ごとにディスクへ書き出す（fsync）。
+    close(complete=True) で最終的なファイル名に置き換えるため、完成した CSV だけが path に現れる。
+    途中で落ちた場合は .partial が残り、次回 resume() で続きから書き込める
+    """
+
+    def __init__(self, path, columns, flush_rows=1000, encoding="utf-8", write_empty=True):
+        self.path = path
+        self.partial_path = f"{path}.partial"
+        self.columns = list(columns)
+        self.flush_rows = flush_rows
+        self.encoding = encoding
+        self.write_empty = write_empty  # False なら1行も書かなかった場合にファイルを作らない
+        self.buffer = []
+        self.rows_written = 0
+        self.file = None
+        self.writer = None
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # 例外で抜けた場合は .partial を残し、次回の再開に使う
+        self.close(complete=exc_type is None)
+
+    def _open(self, mode):
+        parent_dir = os.path.dirname(self.path)
+        if parent_dir:
+            os.makedirs(parent_dir, exist_ok=True)
+        self.file = open(self.partial_path, mode, newline="", encoding=self.encoding)
+        self.writer = csv.writer(self.file)
+
+    def resume(self, key_column):
+        """
+        前回の .partial があれば続きから書き込めるようにし、書き込み済みのキー（key_column の値）の集合を返す。
+        最後のキーの行は途中までしか書かれていない可能性があるため削除し、未処理として扱う
+        """
+        if self.file is not None:
+            raise RuntimeError("resume() は書き込みを始める前に呼び出してください")
+        if not os.path.exists(self.partial_path):
+            return set()
+
+        key_index = self.columns.index(key_column)
+        with open(self.partial_path, newline="", encoding=self.encoding) as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            rows = [row for row in reader if len(row) == len(self.columns)] if header == self.columns else []
+        if rows:
+            last_key = rows[-1][key_index]
+            rows = [row for row in rows if row[key_index] != last_key]
+
+        # 完全な行だけを書き直してから追記モードで開き直す
+        tmp_path = f"{self.partial_path}.tmp"
+        with open(tmp_path, "w", newline="", encoding=self.encoding) as f:
+            writer = csv.writer(f)
+            writer.writerow(self.columns)
+            writer.writerows(rows)
+        os.replace(tmp_path, self.partial_path)
+        self._open("a")
+        self.rows_written = len(rows)
+        return {row[key_index] for row in rows}
+
+    def write_rows(self, rows):
+        """
+        行を追加する。同じキーの行（1コミット分など）はまとめて渡すと、その途中でフラッシュされない
+        """
+        self.buffer.extend(rows)
+        if len(self.buffer) >= self.flush_rows:
+            self.flush()
+
+    def flush(self):
+        if self.file is None:
+            self._open("w")
+            self.writer.writerow(self.columns)
+        self.writer.writerows(self.buffer)
+        self.rows_written += len(self.buffer)
+        self.buffer.clear()
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self, complete=True):
+        """
+        バッファを書き出して閉じる。complete=True なら .partial を最終的なファイル名に置き換える
+        """
+        if self.closed:
+            return
+        self.closed = True
+        if self.file is None and not self.buffer and not self.write_empty:
+            return
+        self.flush()
+        self.file.close()
+        if not complete:
+            return
+        if self.rows_written == 0 and not self.write_empty:
+            os.remove(self.partial_path)
+        else:
+            os.replace(self.partial_path, self.path)
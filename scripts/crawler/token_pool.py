@@ -0,0 +1,96 @@
+import os
+import threading
+import time
+
+# 残量がまだ分からないトークンに仮定する1時間（search は1分）あたりの上限
+DEFAULT_LIMITS = {"core": 5000, "search": 30, "graphql": 5000}
+
+
+def load_tokens(*env_names):
+    """
+    .env からトークンのリストを読み込む。
+    GITHUB_TOKENS にカンマ区切りで複数指定するか、env_names に列挙した変数から集める
+    """
+    tokens = [t.strip() for t in os.getenv("GITHUB_TOKENS", "").split(",") if t.strip()]
+    for name in env_names:
+        token = os.getenv(name)
+        if token and token not in tokens:
+            tokens.append(token)
+    return tokens
+
+
+class TokenPool:
+    """
+    複数トークンのレート制限の残量を (トークン, レート制限区分) ごとに管理し、
+    最も余裕のあるトークンを選ぶ。全トークンが尽きたときだけ待機時間を返す
+    """
+
+    def __init__(self, tokens, reserve=1):
+        if isinstance(tokens, str):
+            tokens = [tokens]
+        self.tokens = [t for t in tokens if t]
+        self.reserve = reserve  # 残量がこの値以下のトークンは使わない
+        self.remaining = {}
+        self.reset_at = {}
+        self.limit = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.tokens)
+
+    def _remaining(self, token, resource):
+        key = (token, resource)
+        if key in self.reset_at and self.reset_at[key] <= time.time():
+            # リセット時刻を過ぎたら上限（X-RateLimit-Limit）まで回復したとみなす
+            del self.reset_at[key]
+            self.remaining.pop(key, None)
+        if key in self.remaining:
+            return self.remaining[key]
+        return self.limit.get(key, DEFAULT_LIMITS.get(resource, DEFAULT_LIMITS["core"]))
+
+    def acquire(self, resource):
+        """
+        残量が最も多いトークンを選んで1つ消費し、(トークン, 待機秒数) を返す。
+        全トークンが尽きている場合は (None, 最も早いリセットまでの秒数) を返す
+        """
+        if not self.tokens:
+            return None, 0  # トークンなし（未認証）で送信する
+        with self._lock:
+            token = max(self.tokens, key=lambda t: self._remaining(t, resource))
+            remaining = self._remaining(token, resource)
+            if remaining > self.reserve:
+                self.remaining[(token, resource)] = remaining - 1
+                return token, 0
+            earliest_reset = min(self.reset_at.get((t, resource), 0) for t in self.tokens)
+            return None, max(earliest_reset - time.time(), 0) + 1
+
+    def update(self, token, resource, headers):
+        """
+        レスポンスヘッダーから残量とリセット時刻を反映する。
+        送信済みでまだ応答のないリクエストの分も差し引くため、手元の見積もりと小さい方を採用し、
+        古いリセット周期のレスポンスは無視する
+        """
+        if token is None or "X-RateLimit-Remaining" not in headers or "X-RateLimit-Reset" not in headers:
+            return
+        resource = headers.get("X-RateLimit-Resource", resource)
+        remaining = int(headers["X-RateLimit-Remaining"])
+        reset_at = int(headers["X-RateLimit-Reset"])
+        key = (token, resource)
+        with self._lock:
+            if "X-RateLimit-Limit" in headers:
+                self.limit[key] = int(headers["X-RateLimit-Limit"])
+            if reset_at <= time.time() or reset_at < self.reset_at.get(key, 0):
+                return
+            estimated = self._remaining(token, resource)
+            self.reset_at[key] = reset_at
+            self.remaining[key] = min(estimated, remaining)
+
+    def summary(self):
+        """
+        トークンごとの残量を表示用に返す（トークンは末尾4文字のみ）
+        """
+        with self._lock:
+            return {
+                f"...{token[-4:]}": {resource: self._remaining(token, resource) for resource in DEFAULT_LIMITS}
+                for token in self.tokens
+            }
@@ -1,98 +1,293 @@
 import base64
 import csv
+import json
 import os
 import random
+import sys
 import time
 
 import requests
 from dotenv import load_dotenv
 from tqdm import tqdm
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from crawler.client import GitHubClient  # noqa: E402
+from crawler.crawl_state import DONE, FAILED, MISSING, CrawlState  # noqa: E402
+from crawler.http_cache import HttpCache  # noqa: E402
+from crawler.token_pool import load_tokens  # noqa: E402
+
 # .envファイルを読み込む（スクリプト実行時のカレントディレクトリからの相対パスに注意）
 load_dotenv("config/.env")
 
-# GitHub API 認証情報を.envから取得
-GITHUB_TOKEN = os.getenv("GITHUB_TOKEN2")
-if not GITHUB_TOKEN:
-    raise ValueError("GITHUB_TOKEN2 が .env に設定されていません。")
+# GitHub API 認証情報を.envから取得（GITHUB_TOKENS にカンマ区切りで複数指定できる）
+GITHUB_TOKENS = load_tokens("GITHUB_TOKEN2")
+if not GITHUB_TOKENS:
+    raise ValueError("GITHUB_TOKEN2 または GITHUB_TOKENS が .env に設定されていません。")
 
-HEADERS = {"Authorization": f"token {GITHUB_TOKEN}"}
+# ETag で再検証するため、変更のないファイルは再実行時にレート制限を消費しない
+client = GitHubClient(GITHUB_TOKENS, cache=HttpCache())
 
 def get_file_content(owner, repo, path):
     """
-    GitHub API を用いて、指定リポジトリの依存関係ファイルの内容を取得する。
-    レート制限超過時（HTTP 403）が発生した場合のみ、X-RateLimit-Reset ヘッダーを参照して待機し、再試行する。
+    GitHub API を用いて、指定リポジトリの依存関係ファイルの内容を取得し、(状態, 内容, エラー内容) を返す。
+    状態は 200 なら DONE、404 なら MISSING、それ以外は再試行対象の FAILED とする。
+    レート制限・5xx・接続エラーの再試行（指数バックオフ）はクライアントが行うため、ここでは再帰しない。
     """
-    url = f'https://api.github.com/repos/{owner}/{repo}/contents/{path}'
-    response = requests.get(url, headers=HEADERS)
+    try:
+        status, data, _ = client.get_json(f'/repos/{owner}/{repo}/contents/{path}')
+    except requests.exceptions.RequestException as e:
+        return FAILED, None, repr(e)
     
-    if response.status_code == 200:
-        data = response.json()
+    if status == 200:
         content = base64.b64decode(data['content']).decode('utf-8')
-        return content
-    elif response.status_code == 403:
-        reset_time = int(response.headers.get("X-RateLimit-Reset", time.time() + 60))
-        sleep_duration = max(reset_time - time.time(), 0) + 5  # 余裕をもって5秒追加
-        tqdm.write(f"Rate limit exceeded for {owner}/{repo}/{path}. Sleeping for {sleep_duration:.0f} seconds.")
-        time.sleep(sleep_duration)
-        return get_file_content(owner, repo, path)
+        return DONE, content, None
+    elif status == 404:
+        return MISSING, None, None
     else:
-        return None
+        return FAILED, None, f"HTTP {status}"
 
 # 対象の依存関係ファイルリスト（Gradleファイルも含む）
 dependency_files = ['pom.xml', 'requirements.txt', 'package.json', 'build.gradle', 'build.gradle.kts']
 
+# True なら GraphQL で複数リポジトリの依存関係ファイルを1クエリでまとめて取得する
+USE_GRAPHQL = True
+
+# GraphQL の1クエリに含めるリポジトリ数。タイムアウト時は半分に減らし、成功が続けば少しずつ戻す
+INITIAL_BATCH_SIZE = 25
+MAX_BATCH_SIZE = 50
+
 # 出力先のディレクトリ（絶対パスまたは実行時のカレントディレクトリからの相対パス）
 output_dir = '/Users/kazuki-h/newresearch/results/dependencies_files'
-os.makedirs(output_dir, exist_ok=True)
 
-# チェックポイントファイルのパス
-checkpoint_file = "processed_repos.txt"
+# 進捗を (リポジトリ, ファイル) 単位で記録する状態DB。複数プロセスで同時に実行しても重複しない
+state_db = "results/crawl_state.sqlite3"
+STATE_JOB = "dependencies"
+# エンドポイントごとのリクエスト数・リトライ回数の保存先
+METRICS_FILE = "results/retry_metrics_dependencies.csv"
 
-# 既に処理済みのリポジトリ（owner/repo形式）のリストを読み込む
-processed_repos = set()
-if os.path.exists(checkpoint_file):
-    with open(checkpoint_file, 'r', encoding='utf-8') as cp:
-        for line in cp:
-            processed_repos.add(line.strip())
+# 旧形式のチェックポイントファイル（存在すれば初回のみ状態DBに取り込む）
+checkpoint_file = "processed_repos.txt"
 
 # CSVファイルからリポジトリ情報を読み込む
 csv_file = "results/dependencies/devideRepo.csv"
-with open(csv_file, newline='', encoding='utf-8') as csvfile:
-    reader = csv.DictReader(csvfile)
-    repo_list = list(reader)  # 全リポジトリ情報をリストに格納
-
-# tqdm を使ってリポジトリごとの進捗を表示
-for row in tqdm(repo_list, desc="Processing repositories", unit="repo"):
-    owner = row['owner']
-    repo = row['repo']
-    repo_key = f"{owner}/{repo}"
-    
-    # チェックポイントファイルに記録済みならスキップ
-    if repo_key in processed_repos:
-        tqdm.write(f"Skipping already processed repository: {repo_key}")
-        continue
 
+def fetch_repo_files_rest(owner, repo, files):
+    """
+    REST API で1リポジトリの依存関係ファイルを1つずつ取得し、{ファイル名: (状態, 内容, エラー内容)} を返す
+    """
+    return {
+        file: get_file_content(owner, repo, file)
+        for file in tqdm(files, desc=f"{owner}/{repo} dependency files", leave=False)
+    }
+
+def build_batch_query(repos):
+    """
+    複数リポジトリの依存関係ファイルを取得する GraphQL クエリを組み立てる。
+    repos は [(owner, repo, [ファイル名, ...]), ...] で、未取得のファイルだけを問い合わせる。
+    リポジトリは r0, r1, ...、ファイルは dependency_files の位置に対応する f0, f1, ... のエイリアスで区別する
+    """
+    lines = ["query {"]
+    for i, (owner, repo, files) in enumerate(repos):
+        lines.append(f"  r{i}: repository(owner: {json.dumps(owner)}, name: {json.dumps(repo)}) {{")
+        for file in files:
+            j = dependency_files.index(file)
+            expression = json.dumps(f"HEAD:{file}")
+            lines.append(f"    f{j}: object(expression: {expression}) {{ ... on Blob {{ text isBinary isTruncated }} }}")
+        lines.append("  }")
+    lines.append("}")
+    return "\n".join(lines)
+
+def graphql_errors_by_path(data):
+    """
+    GraphQL の errors を、エラーの起きたフィールドのエイリアス（path の先頭2つまで）ごとにまとめる。
+    例: {("r0",): [リポジトリ r0 のエラー], ("r1", "f2"): [r1 の f2 のエラー]}
+    """
+    errors = {}
+    for error in data.get("errors") or []:
+        path = tuple(str(p) for p in (error.get("path") or [])[:2])
+        if path:
+            errors.setdefault(path, []).append(error)
+    return errors
+
+def fetch_batch_graphql(repos):
+    """
+    GraphQL で複数リポジトリの依存関係ファイルをまとめて取得し、
+    {(owner, repo): {ファイル名: (状態, 内容, エラー内容)}} を返す。
+    タイムアウトやサーバーエラーでバッチ全体が失敗した場合は None を返す。
+    それ以外の通信エラー（再試行を使い切った HTTPError・ChunkedEncodingError など）の場合は、
+    バッチの全ファイルを FAILED として返す（確保したまま止まらず、次回の実行で再試行できるように）
+    """
+    try:
+        status, data, _ = client.post_graphql(build_batch_query(repos))
+    except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+        tqdm.write(f"GraphQL request failed: {e!r}")
+        return None
+    except requests.exceptions.RequestException as e:
+        tqdm.write(f"GraphQL request failed: {e!r}")
+        return {(owner, repo): {file: (FAILED, None, repr(e)) for file in files} for owner, repo, files in repos}
+
+    if status != 200 or not data or data.get("data") is None:
+        tqdm.write(f"GraphQL request failed: {status} {(data or {}).get('errors')}")
+        return None
+
+    errors = graphql_errors_by_path(data)
+    results = {}
+    for i, (owner, repo, files) in enumerate(repos):
+        alias = f"r{i}"
+        node = data["data"].get(alias)
+        if node is None:
+            # 存在しないリポジトリは null かつ errors に NOT_FOUND が入る。
+            # 権限不足・リゾルバーのタイムアウト・レート制限でも null になるため、NOT_FOUND 以外は FAILED にする
+            repo_errors = errors.get((alias,), [])
+            if repo_errors and all(error.get("type") == "NOT_FOUND" for error in repo_errors):
+                results[(owner, repo)] = {file: (MISSING, None, None) for file in files}
+            else:
+                error = repr(repo_errors) if repo_errors else "null repository without errors"
+                results[(owner, repo)] = {file: (FAILED, None, error) for file in files}
+            continue
+        file_results = {}
+        for file in files:
+            file_alias = f"f{dependency_files.index(file)}"
+            blob = node.get(file_alias)
+            file_errors = errors.get((alias, file_alias))
+            if not blob and file_errors:
+                file_results[file] = (FAILED, None, repr(file_errors))
+            elif not blob or blob.get("isBinary"):
+                file_results[file] = (MISSING, None, None)
+            elif blob.get("isTruncated"):
+                # 大きすぎて GraphQL では途中までしか返らないファイルは REST で取り直す
+                file_results[file] = get_file_content(owner, repo, file)
+            else:
+                file_results[file] = (DONE, blob.get("text"), None)
+        results[(owner, repo)] = file_results
+    return results
+
+def save_repo_files(state, owner, repo, file_results):
+    """
+    取得したファイルを {owner}_{repo}/ ディレクトリに保存し、ファイルごとの状態を状態DBに記録する。
+    ファイルは一時ファイルに書いてから置き換えるため、途中で落ちても中途半端な内容は残らない
+    """
+    repo_key = f"{owner}/{repo}"
     repo_dir = os.path.join(output_dir, f"{owner}_{repo}")
     os.makedirs(repo_dir, exist_ok=True)
-    tqdm.write(f'Processing {repo_key}')
-    
-    # 各依存関係ファイルについて進捗表示
-    for file in tqdm(dependency_files, desc=f"{repo_key} dependency files", leave=False):
-        file_path = os.path.join(repo_dir, file)
-        content = get_file_content(owner, repo, file)
-        if content:
+
+    records = []
+    for file, (status, content, error) in file_results.items():
+        if status == DONE and content:
             tqdm.write(f'  Found {file} in {repo_key}')
-            with open(file_path, 'w', encoding='utf-8') as f:
+            file_path = os.path.join(repo_dir, file)
+            with open(file_path + ".tmp", 'w', encoding='utf-8') as f:
                 f.write(content)
+            os.replace(file_path + ".tmp", file_path)
+        elif status == FAILED:
+            tqdm.write(f'  Failed to fetch {file} in {repo_key}: {error}')
         else:
             tqdm.write(f'  {file} not found in {repo_key}')
-    
-    # 1リポジトリ処理完了後にランダムスリープ（例：2～5秒）
-    sleep_time = random.uniform(1, 3)
-    tqdm.write(f"Sleeping for {sleep_time:.1f} seconds before next repository...")
-    time.sleep(sleep_time)
-    
-    # チェックポイントファイルに処理済みリポジトリを記録
-    with open(checkpoint_file, 'a', encoding='utf-8') as cp:
-        cp.write(f"{repo_key}\n")
+        records.append((repo_key, file, status, error))
+
+    state.record(STATE_JOB, records)
+
+def claimed_repos(claimed):
+    """
+    claim() の結果 {"owner/repo": [ファイル名, ...]} を [(owner, repo, [ファイル名, ...]), ...] に変換する
+    """
+    return [(*repo_key.split("/", 1), files) for repo_key, files in claimed.items()]
+
+def run_rest(state):
+    """
+    REST API で1リポジトリずつ取得する（従来の方式）
+    """
+    with tqdm(desc="Processing repositories", unit="repo") as progress:
+        while True:
+            claimed = state.claim(STATE_JOB, limit=1)
+            if not claimed:
+                break
+            for owner, repo, files in claimed_repos(claimed):
+                tqdm.write(f'Processing {owner}/{repo}')
+                save_repo_files(state, owner, repo, fetch_repo_files_rest(owner, repo, files))
+                progress.update(1)
+
+            # 1リポジトリ処理完了後にランダムスリープ（例：2～5秒）
+            sleep_time = random.uniform(1, 3)
+            tqdm.write(f"Sleeping for {sleep_time:.1f} seconds before next repository...")
+            time.sleep(sleep_time)
+
+def run_graphql(state):
+    """
+    GraphQL でバッチごとに取得する。失敗したバッチはサイズを半分にして再試行し、
+    1リポジトリでも失敗する場合は REST で取得する
+    """
+    batch_size = INITIAL_BATCH_SIZE
+    with tqdm(desc="Processing repositories", unit="repo") as progress:
+        while True:
+            batch = claimed_repos(state.claim(STATE_JOB, limit=batch_size))
+            if not batch:
+                break
+
+            while batch:
+                chunk = batch[:batch_size]
+                results = fetch_batch_graphql(chunk)
+
+                if results is None:
+                    if batch_size > 1:
+                        batch_size = max(batch_size // 2, 1)
+                        tqdm.write(f"Reducing GraphQL batch size to {batch_size}")
+                        continue
+                    owner, repo, files = chunk[0]
+                    results = {(owner, repo): fetch_repo_files_rest(owner, repo, files)}
+                elif batch_size < MAX_BATCH_SIZE:
+                    batch_size = min(batch_size + max(batch_size // 4, 1), MAX_BATCH_SIZE)
+
+                for (owner, repo), file_results in results.items():
+                    save_repo_files(state, owner, repo, file_results)
+
+                batch = batch[len(chunk):]
+                progress.update(len(chunk))
+
+def import_checkpoint(state, repo_keys):
+    """
+    旧形式の processed_repos.txt に記録済みのリポジトリを状態DBに取り込む。
+    保存済みのファイルは DONE、無いファイルは MISSING として登録する
+    """
+    if not os.path.exists(checkpoint_file) or state.summary(STATE_JOB):
+        return
+    with open(checkpoint_file, 'r', encoding='utf-8') as cp:
+        processed_repos = {line.strip() for line in cp if line.strip()} & set(repo_keys)
+
+    done, missing = [], []
+    for repo_key in processed_repos:
+        repo_dir = os.path.join(output_dir, repo_key.replace("/", "_", 1))
+        for file in dependency_files:
+            (done if os.path.exists(os.path.join(repo_dir, file)) else missing).append((repo_key, file))
+
+    with state.transaction() as conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO tasks (job, item, part, status) VALUES (?, ?, ?, ?)",
+            [(STATE_JOB, repo_key, file, DONE) for repo_key, file in done]
+            + [(STATE_JOB, repo_key, file, MISSING) for repo_key, file in missing],
+        )
+    print(f"Imported {len(processed_repos)} repositories from {checkpoint_file}")
+
+if __name__ == "__main__":
+    os.makedirs(output_dir, exist_ok=True)
+
+    with open(csv_file, newline='', encoding='utf-8') as csvfile:
+        reader = csv.DictReader(csvfile)
+        repo_keys = [f"{row['owner']}/{row['repo']}" for row in reader]
+
+    state = CrawlState(state_db)
+    import_checkpoint(state, repo_keys)
+    state.add(STATE_JOB, repo_keys, dependency_files)
+    print(f"Crawl state before run: {state.summary(STATE_JOB)}")
+
+    try:
+        if USE_GRAPHQL:
+            run_graphql(state)
+        else:
+            run_rest(state)
+    finally:
+        # 中断した場合も確保したままのタスクを他のワーカーが処理できるよう戻す
+        state.release(STATE_JOB)
+        print(f"Crawl state after run: {state.summary(STATE_JOB)}")
+        client.metrics.report()
+        client.metrics.save_csv(METRICS_FILE)
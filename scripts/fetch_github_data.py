@@ -1,33 +1,102 @@
 import os
+from datetime import datetime, timedelta, timezone
 
 import pandas as pd
 import requests
 from dotenv import load_dotenv
 
+from crawler.client import GitHubClient, next_page_params
+from crawler.crawl_state import DONE, FAILED, CrawlState
+from crawler.http_cache import HttpCache
+from crawler.token_pool import load_tokens
+
 # `.env` ファイルを読み込む
 load_dotenv("config/.env")
 
 # GitHubの設定（トークンを環境変数から取得）
-GITHUB_USERNAME = "rzezeski"  # 取得したい開発者のGitHubユーザー名
-GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")  # 環境変数から取得
-HEADERS = {"Authorization": f"token {GITHUB_TOKEN}"} if GITHUB_TOKEN else {}
-
-# 出力ディレクトリの設定
-OUTPUT_DIR = "../results/"
-os.makedirs(OUTPUT_DIR, exist_ok=True)
-
-# GitHub APIのエンドポイント
-ISSUES_URL = f"https://api.github.com/search/issues?q=author:{GITHUB_USERNAME}+type:issue&per_page=100"
-PULLS_URL = f"https://api.github.com/search/issues?q=author:{GITHUB_USERNAME}+type:pr&per_page=100"
-
-def fetch_github_data(url):
-    """GitHub APIからデータを取得する"""
-    response = requests.get(url, headers=HEADERS)
-    if response.status_code == 200:
-        return response.json().get("items", [])
-    else:
-        print(f"Error {response.status_code}: {response.text}")
-        return []
+GITHUB_TOKENS = load_tokens("GITHUB_TOKEN")  # 環境変数から取得（GITHUB_TOKENS で複数指定可）
+client = GitHubClient(GITHUB_TOKENS, cache=HttpCache())
+
+# 取得する開発者リストのCSVファイル（developer 列にGitHubユーザー名）
+DEVELOPER_LIST_FILE = "/Users/kazuki-h/newresearch/results/B.csv"
+
+# 出力ディレクトリの設定（countcontributions.py などが読み込む {開発者}_issues.csv / {開発者}_pulls.csv を保存する）
+OUTPUT_DIR = "../results/developer_data"
+
+# True なら既存のCSVの最新の created_at より後に作成された Issue/PR だけを取得して追記する
+INCREMENTAL = True
+
+# 開発者×種類（issues / pulls）ごとの進捗を記録する状態DB。
+# ジョブ名に実行日を入れ、同じ日の再実行では取得済みの分を飛ばして失敗した分だけを取り直す
+# （翌日以降の実行では増分取得で全員を更新する）
+STATE_DB = "../results/crawl_state.sqlite3"
+STATE_JOB = f"developer_data_{datetime.now(timezone.utc):%Y%m%d}"
+# エンドポイントごとのリクエスト数・リトライ回数の保存先
+METRICS_FILE = "../results/retry_metrics_developer_data.csv"
+
+# 状態DBのパート名 -> (検索の type, 表示名)
+KINDS = {"issues": ("issue", "Issue"), "pulls": ("pr", "Pull Request")}
+
+# 検索する期間の始まり（GitHub のサービス開始以前）
+SEARCH_START = datetime(2008, 1, 1, tzinfo=timezone.utc)
+
+# 検索APIは1クエリあたり最大1000件までしか返さないため、これを超える期間は半分に分割する
+SEARCH_RESULT_LIMIT = 1000
+PER_PAGE = 100
+
+COLUMNS = [
+    "url", "repository_url", "number", "title", "state", "created_at",
+    "updated_at", "closed_at", "comments", "comments_url", "user",
+]
+
+def format_time(dt):
+    return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def search_range(query, start, end):
+    """
+    created:start..end の範囲を検索し、(総件数, 取得したアイテム) を返す。
+    Link ヘッダーの rel="next" をたどって全ページを取得するが、
+    総件数が上限を超える場合は1ページ目だけで打ち切る（呼び出し側で期間を分割する）
+    """
+    params = {"q": f"{query} created:{format_time(start)}..{format_time(end)}", "per_page": PER_PAGE}
+    items = []
+    total_count = 0
+    while params is not None:
+        status, data, headers = client.get_json("/search/issues", params=params)
+        if status != 200:
+            raise RuntimeError(f"Error {status}: {params['q']}")
+        if data.get("incomplete_results"):
+            print(f"⚠ 検索結果が不完全です: {params['q']}")
+        total_count = data.get("total_count", 0)
+        items.extend(data.get("items", []))
+        if total_count > SEARCH_RESULT_LIMIT:
+            break
+        params = next_page_params(headers)
+    return total_count, items
+
+def fetch_github_data(query, since=None):
+    """
+    GitHub の検索APIから query に一致する Issue/PR を全件取得する。
+    since を指定した場合はそれより後に作成されたものだけを取得する
+    """
+    start = since + timedelta(seconds=1) if since is not None else SEARCH_START
+    end = datetime.now(timezone.utc).replace(microsecond=0)
+    ranges = [(start, end)]
+    items = []
+    while ranges:
+        start, end = ranges.pop()
+        total_count, range_items = search_range(query, start, end)
+        if total_count > SEARCH_RESULT_LIMIT and end - start > timedelta(seconds=1):
+            # 期間を半分に分けて、それぞれ1000件以下になるまで分割する
+            middle = start + (end - start) / 2
+            middle = middle.replace(microsecond=0)
+            ranges.append((middle + timedelta(seconds=1), end))
+            ranges.append((start, middle))
+            continue
+        if total_count > SEARCH_RESULT_LIMIT:
+            print(f"⚠ 1秒間に {total_count} 件あるため一部しか取得できません: {query} {format_time(start)}")
+        items.extend(range_items)
+    return items
 
 def process_data(data):
     """必要な情報を抽出してデータフレームに変換"""
@@ -44,19 +113,75 @@ def process_data(data):
             "closed_at": item.get("closed_at"),
             "comments": item.get("comments", 0),
             "comments_url": item.get("comments_url"),
+            "user": item.get("user"),
         })
-    return pd.DataFrame(processed_data)
-
-# Issuesのデータ取得
-issues_data = fetch_github_data(ISSUES_URL)
-df_issues = process_data(issues_data)
-issues_output_path = os.path.join(OUTPUT_DIR, f"{GITHUB_USERNAME}_issues.csv")
-df_issues.to_csv(issues_output_path, index=False)
-print(f"Issueデータを {issues_output_path} に保存しました。")
-
-# Pull Requestのデータ取得
-pulls_data = fetch_github_data(PULLS_URL)
-df_pulls = process_data(pulls_data)
-pulls_output_path = os.path.join(OUTPUT_DIR, f"{GITHUB_USERNAME}_pulls.csv")
-df_pulls.to_csv(pulls_output_path, index=False)
-print(f"Pull Requestデータを {pulls_output_path} に保存しました。")
+    return pd.DataFrame(processed_data, columns=COLUMNS)
+
+def last_seen(output_path):
+    """
+    既存のCSVに含まれる最新の created_at を返す。ファイルがなければ None
+    """
+    if not os.path.exists(output_path):
+        return None
+    created_at = pd.to_datetime(pd.read_csv(output_path, usecols=["created_at"])["created_at"], errors="coerce", utc=True)
+    if created_at.isna().all():
+        return None
+    return created_at.max().to_pydatetime()
+
+def update_developer_file(username, kind, output_path):
+    """
+    1人の開発者の Issue または PR を取得してCSVに保存する。
+    増分モードでは新しいアイテムだけを取得し、既存のCSVとURLで重複を除いて結合する
+    """
+    since = last_seen(output_path) if INCREMENTAL else None
+    new_df = process_data(fetch_github_data(f"author:{username} type:{kind}", since))
+
+    if since is not None:
+        df = pd.concat([pd.read_csv(output_path), new_df], ignore_index=True)
+        df = df.drop_duplicates(subset=["url"], keep="last")
+    else:
+        df = new_df
+    df = df.sort_values("created_at", kind="stable")
+
+    tmp_path = f"{output_path}.tmp"
+    df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, output_path)
+    return len(new_df), len(df)
+
+def run(state, developers):
+    """
+    状態DBから未処理の開発者を1人ずつ確保して Issue/PR を取得する。
+    検索エラーや再試行を使い切った通信エラーの場合は既存のCSVを変更せずに FAILED を記録し、
+    次回の実行で取り直す（1件の失敗で全体を止めない）
+    """
+    state.add(STATE_JOB, developers, list(KINDS))
+    while True:
+        claimed = state.claim(STATE_JOB, limit=1)
+        if not claimed:
+            return
+        for username, suffixes in claimed.items():
+            for suffix in suffixes:
+                kind, label = KINDS[suffix]
+                output_path = os.path.join(OUTPUT_DIR, f"{username}_{suffix}.csv")
+                try:
+                    new_count, total = update_developer_file(username, kind, output_path)
+                except (RuntimeError, requests.exceptions.RequestException) as e:
+                    print(f"❌ {username} の{label}データを取得できませんでした: {e!r}")
+                    state.record(STATE_JOB, [(username, suffix, FAILED, repr(e))])
+                    continue
+                print(f"{label}データを {output_path} に保存しました。（新規 {new_count} 件 / 計 {total} 件）")
+                state.record(STATE_JOB, [(username, suffix, DONE, None)])
+
+if __name__ == "__main__":
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    developers = pd.read_csv(DEVELOPER_LIST_FILE)["developer"].dropna().unique()
+
+    state = CrawlState(STATE_DB)
+    print(f"Crawl state before run: {state.summary(STATE_JOB)}")
+    try:
+        run(state, developers)
+    finally:
+        state.release(STATE_JOB)
+        print(f"Crawl state after run: {state.summary(STATE_JOB)}")
+        client.metrics.report()
+        client.metrics.save_csv(METRICS_FILE)
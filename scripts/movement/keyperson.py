@@ -1,96 +1,96 @@
 import os
-from collections import defaultdict
+import sys
 from datetime import timedelta
 
+import numpy as np
 import pandas as pd
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from corpus.developer_data import load_contributions  # noqa: E402
+from corpus.window_join import iter_window_matches, iter_window_pairs, to_seconds  # noqa: E402
 
 # 1. データの準備
-def load_all_developer_data(data_dir):
-    all_data = []
-    for file_name in os.listdir(data_dir):
-        if file_name.endswith('.csv'):
-            developer = os.path.splitext(file_name)[0].split('_')[0]
-            df = pd.read_csv(os.path.join(data_dir, file_name))
-            df['developer'] = developer
-            all_data.append(df)
-    return pd.concat(all_data, ignore_index=True)
-
 data_dir = "./../results/developer_data"
-df_all = load_all_developer_data(data_dir)
-
-# 必要なカラムチェック
-required_columns = ['developer', 'repository_url', 'created_at']
-for col in required_columns:
-    if col not in df_all.columns:
-        raise KeyError(f"カラム '{col}' がデータに存在しません: {df_all.columns.tolist()}")
-
-# リポジトリ名の抽出
-df_all['repository'] = df_all['repository_url'].str.extract(r'repos/([^/]+/[^/]+)')
-
-# created_at の変換と不正値除外
-df_all['created_at'] = pd.to_datetime(df_all['created_at'], errors='coerce')
-df_all = df_all.dropna(subset=['created_at'])
+df_all = load_contributions(data_dir, columns=['developer', 'repository', 'created_at'])
 
-# 必要なカラムを整形
-df_all = df_all[['developer', 'repository', 'created_at']].sort_values(by=['developer', 'created_at'])
+# 必要なカラムを整形。
+# リポジトリ名が取れなかった行（NaN）も以前の実装と同じく残す。NaN はどのリポジトリとも（NaN 同士でも）
+# 「異なる」と比較されるため、NaN の行からはウィンドウ内の全ての行（自身を含む）が移動先になり、
+# NaN 自体も1つの移動先として数える
+df_all = df_all[['developer', 'repository', 'created_at']].sort_values(by=['developer', 'created_at'], kind='stable')
+df_all = df_all.reset_index(drop=True)
 
-# 2. キーパーソンの特定（移動回数が多い人を抽出）
+# 移動とみなす前後の期間と、抽出するキーパーソンの人数
 time_window = timedelta(days=30)
-repository_movements = defaultdict(list)
-
-for developer, group in df_all.groupby('developer'):
-    for idx, row in group.iterrows():
-        current_repo = row['repository']
-        current_time = row['created_at']
+TOP_K = 3
 
-        similar_contributions = group[
-            (group['created_at'] >= current_time - time_window) &
-            (group['created_at'] <= current_time + time_window) &
-            (group['repository'] != current_repo)
-        ]
+window_seconds = int(time_window.total_seconds())
+developer_codes = df_all['developer'].cat.codes.to_numpy()
+repository_codes = df_all['repository'].cat.codes.to_numpy()  # NaN は -1
+seconds = to_seconds(df_all['created_at'])
 
-        for _, sim_row in similar_contributions.iterrows():
-            repository_movements[(developer, current_repo)].append(sim_row['repository'])
 
-# 移動回数が多い人（キーパーソン）を特定
-movement_counts = defaultdict(int)
-for (developer, _), to_repos in repository_movements.items():
-    movement_counts[developer] += len(set(to_repos))
+# 2. キーパーソンの特定（移動回数が多い人を抽出）
+def count_movements():
+    """
+    開発者ごとに、各リポジトリへの貢献の前後 time_window 以内に貢献した別のリポジトリの種類数を数え、
+    リポジトリについて合計した移動回数を返す。
+    df_all は開発者・時刻順に並んでいるため、開発者をグループとした時刻の searchsorted で範囲を求める
+    """
+    movements = []
+    for left, right in iter_window_pairs(developer_codes, seconds, window_seconds):
+        moved = (repository_codes[left] != repository_codes[right]) | (repository_codes[left] == -1)
+        movements.append(np.unique(np.stack([
+            developer_codes[left[moved]], repository_codes[left[moved]], repository_codes[right[moved]],
+        ], axis=1), axis=0))
+    movements = np.unique(np.concatenate(movements or [np.empty((0, 3), dtype='int64')]), axis=0)
+    counts = pd.Series(np.bincount(movements[:, 0], minlength=len(df_all['developer'].cat.categories)),
+                       index=df_all['developer'].cat.categories)
+    return counts[counts > 0]
+
+
+movement_counts = count_movements()
+
+# キーパーソンとして移動回数の上位 TOP_K 名を抽出（同数の場合は開発者名順）
+movement_counts = movement_counts.sort_index(kind='stable').sort_values(ascending=False, kind='stable')
+key_persons = movement_counts.index[:TOP_K].tolist()
 
-# キーパーソンとして上位3名を抽出
-key_persons = sorted(movement_counts.items(), key=lambda x: x[1], reverse=True)[:3]
-key_persons = [person[0] for person in key_persons]
 
 # 3. キーパーソンの移動に連動する人を分析
-key_person_movements = []
-
-for key_person in key_persons:
-    key_person_data = df_all[df_all['developer'] == key_person]
-
-    for _, row in key_person_data.iterrows():
-        current_repo = row['repository']
-        current_time = row['created_at']
-
-        # キーパーソンの移動先
-        next_contributions = df_all[
-            (df_all['created_at'] >= current_time - time_window) &
-            (df_all['created_at'] <= current_time + time_window) &
-            (df_all['repository'] != current_repo) &
-            (df_all['developer'] != key_person)
-        ]
-
-        for _, sim_row in next_contributions.iterrows():
-            key_person_movements.append({
-                "key_person": key_person,
-                "from_repository": current_repo,
-                "to_repository": sim_row['repository'],
-                "follower": sim_row['developer'],
-                "time": sim_row['created_at']
-            })
+def find_followers(key_person):
+    """
+    キーパーソンの各貢献の前後 time_window 以内に、別のリポジトリへ貢献した他の開発者を返す。
+    全体を時刻順に並べた配列に対してキーパーソンの貢献時刻で searchsorted し、範囲内の行を列挙する
+    """
+    by_time = np.argsort(seconds, kind='stable')
+    sorted_seconds = seconds[by_time]
+    queries = np.flatnonzero(developer_codes == df_all['developer'].cat.categories.get_loc(key_person))
+    key_person_code = developer_codes[queries[0]] if len(queries) else -1
+
+    matches = []
+    zeros = np.zeros(len(seconds), dtype='int64')
+    for query, row in iter_window_matches(zeros[:len(queries)], seconds[queries], zeros, sorted_seconds, window_seconds):
+        source, target = queries[query], by_time[row]
+        moved = (repository_codes[target] != repository_codes[source]) | (repository_codes[source] == -1)
+        keep = moved & (developer_codes[target] != key_person_code)
+        matches.append(pd.DataFrame({'source': source[keep], 'target': target[keep]}))
+    if not matches:
+        return pd.DataFrame(columns=['key_person', 'from_repository', 'to_repository', 'follower', 'time'])
+
+    # キーパーソンの貢献の時刻順、同じ貢献の中では df_all の順（開発者・時刻順）に並べる
+    matches = pd.concat(matches, ignore_index=True).sort_values(['source', 'target'], kind='stable')
+    source, target = matches['source'].to_numpy(), matches['target'].to_numpy()
+    return pd.DataFrame({
+        "key_person": key_person,
+        "from_repository": df_all['repository'].iloc[source].to_numpy(),
+        "to_repository": df_all['repository'].iloc[target].to_numpy(),
+        "follower": df_all['developer'].iloc[target].to_numpy(),
+        "time": df_all['created_at'].iloc[target].reset_index(drop=True),
+    })
+
 
 # 結果をデータフレーム化
-df_key_movements = pd.DataFrame(key_person_movements)
+df_key_movements = pd.concat([find_followers(key_person) for key_person in key_persons], ignore_index=True)
 
 # 4. 結果を保存
 output_path = "./../results/key_person_movements.csv"
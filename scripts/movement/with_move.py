@@ -1,97 +1,71 @@
 import os
-from collections import defaultdict
+import sys
 from datetime import timedelta
 
+import numpy as np
 import pandas as pd
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from corpus.developer_data import load_contributions  # noqa: E402
+from corpus.window_join import iter_window_pairs, to_seconds  # noqa: E402
 
 # 1. データの読み込み
-def load_all_developer_data(data_dir):
-    """
-    ディレクトリ内の全ての開発者データを統合
-    :param data_dir: データディレクトリのパス
-    :return: 統合されたデータフレーム
-    """
-    all_data = []
-    for file_name in os.listdir(data_dir):
-        if file_name.endswith('.csv'):
-            # ファイル名から開発者名を抽出（アンダースコアの前の部分）
-            developer = os.path.splitext(file_name)[0].split('_')[0]
-            df = pd.read_csv(os.path.join(data_dir, file_name))
-            df['developer'] = developer  # 抽出した開発者名を追加
-            all_data.append(df)
-    
-    return pd.concat(all_data, ignore_index=True)
-
-# データディレクトリのパスを指定
+# データディレクトリのパスを指定（初回は Parquet データセットに変換してから読み込む）
 data_dir = "./../results/developer_data"
-df_all = load_all_developer_data(data_dir)
-
-# 必要なカラムをチェック
-required_columns = ['developer', 'repository_url', 'created_at']
-for col in required_columns:
-    if col not in df_all.columns:
-        raise KeyError(f"カラム '{col}' がデータに存在しません。現在のカラム: {df_all.columns.tolist()}")
-
-# 2. 'repository_url' から 'repository' を生成
-# URLの形式: https://api.github.com/repos/owner_name/repository_name
-df_all['repository'] = df_all['repository_url'].str.extract(r'repos/([^/]+/[^/]+)')
-
-# 必要なカラムを選択して確認
-print("生成されたカラム 'repository':")
-print(df_all[['repository_url', 'repository']].head())
-
-# 'created_at' カラムをタイムスタンプ形式に変換（不正値を処理）
-df_all['created_at'] = pd.to_datetime(df_all['created_at'], errors='coerce')
+# repository は repository_url の repos/owner/name 部分、created_at は不正値を除外済みの datetime
+df_all = load_contributions(data_dir, columns=['developer', 'repository', 'created_at'])
 
-# 不正値を除外
-if df_all['created_at'].isna().any():
-    print("不正な値が含まれています。除外します。")
-    invalid_values = df_all.loc[df_all['created_at'].isna()]
-    print("不正値:", invalid_values)
-    df_all = df_all.dropna(subset=['created_at'])
+# 同じリポジトリに貢献した行だけを比較するため、リポジトリ名が取れなかった行は除外
+df_all = df_all.dropna(subset=['repository'])
 
-# 必要なカラムを選択して並び替え
-df_all = df_all[['developer', 'repository', 'created_at']].sort_values(by=['developer', 'created_at'])
+# 2. 幅を持たせた移動のための期間設定
+time_window = timedelta(days=5)  # 前後5日間の幅を設定（任意の幅を指定できる）
 
-# 3. 幅を持たせた移動のための期間設定
-time_window = timedelta(days=5)  # 30日間の幅を設定
 
-# 4. 期間内のリポジトリ移動を分析
-movement_groups = defaultdict(list)
-
-for developer, group in df_all.groupby('developer'):
-    # 開発者ごとの貢献履歴を取得
-    for idx, row in group.iterrows():
-        # 現在のリポジトリとそのタイムスタンプを取得
-        current_repo = row['repository']
-        current_time = row['created_at']
-
-        # 幅を持たせた期間で他の開発者を調査
-        recent_contributions = df_all[
-            (df_all['created_at'] >= current_time - time_window) &
-            (df_all['created_at'] <= current_time + time_window) &
-            (df_all['repository'] == current_repo) &  # 同じリポジトリを対象
-            (df_all['developer'] != developer)       # 自分以外の開発者
-        ]
-
-        # 同時に行動している開発者を収集
-        for _, matched_row in recent_contributions.iterrows():
-            movement_groups[(developer, current_repo)].append(matched_row['developer'])
-
-# 結果を整形
-results = []
-for key, developers in movement_groups.items():
-    dev, repo = key
-    results.append({
-        "developer": dev,
-        "repository": repo,
-        "co_contributors": list(set(developers)),  # 重複を排除
-        "co_count": len(set(developers))
-    })
-
-# データフレーム化
-df_results = pd.DataFrame(results)
+def find_co_contributions(df, window):
+    """
+    各開発者の各貢献について、同じリポジトリで前後 window 以内に貢献した他の開発者を集め、
+    (developer, repository) ごとの共同貢献者の一覧を返す。
+    リポジトリ・時刻順に並べ替え、ウィンドウの範囲を searchsorted で求めて組を列挙する
+    """
+    df = df.assign(
+        developer=df['developer'].astype('category'),
+        repository=df['repository'].astype('category'),
+    ).sort_values(['repository', 'created_at'], kind='stable').reset_index(drop=True)
+    developers = df['developer'].cat.codes.to_numpy()
+    repositories = df['repository'].cat.codes.to_numpy()
+    seconds = to_seconds(df['created_at'])
+
+    matches = []
+    for left, right in iter_window_pairs(repositories, seconds, int(window.total_seconds())):
+        other = developers[left] != developers[right]  # 自分以外の開発者
+        left, right = left[other], right[other]
+        matches.append(pd.DataFrame({
+            'developer': developers[left],
+            'repository': repositories[left],
+            'co_contributor': developers[right],
+            'created_at': seconds[left],
+        }).drop_duplicates(['developer', 'repository', 'co_contributor']))
+    if not matches:
+        return pd.DataFrame(columns=['developer', 'repository', 'co_contributors', 'co_count'])
+    matches = pd.concat(matches, ignore_index=True)
+
+    names = df['developer'].cat.categories
+    grouped = matches.groupby(['developer', 'repository'])
+    results = pd.DataFrame({
+        # 開発者ごとに、最初に共同貢献が見つかった貢献の時刻順に並べる
+        'first_match': grouped['created_at'].min(),
+        'co_contributors': grouped['co_contributor'].agg(lambda codes: sorted(names[np.unique(codes)])),
+    }).reset_index()
+    results['co_count'] = results['co_contributors'].str.len()
+    results['developer'] = names[results['developer']]
+    results['repository'] = df['repository'].cat.categories[results['repository']]
+    results = results.sort_values(['developer', 'first_match'], kind='stable')
+    return results[['developer', 'repository', 'co_contributors', 'co_count']].reset_index(drop=True)
+
+
+# 3. 期間内に同じリポジトリで行動している開発者を分析
+df_results = find_co_contributions(df_all, time_window)
 
 # 結果を保存
 output_path = "./../results/5_co_contribution_analysis.csv"
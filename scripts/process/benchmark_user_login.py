@@ -0,0 +1,76 @@
+import ast
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from corpus.developer_data import extract_user_logins, list_source_files, parse_timestamps  # noqa: E402
+
+# 計測に使う CSV のディレクトリ（countcontributions.py と同じ）
+data_dir = "../results/developer_data"
+# 各方法の計測の繰り返し回数（最も速かった回を採用する）
+REPEAT = 3
+# 以前の countcontributions.py で使っていた created_at の形式チェック
+DATE_PATTERN = r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}Z$'
+
+
+def literal_eval_logins(users):
+    """ 以前の方法: 1行ずつ ast.literal_eval で dict に戻して login を取り出す """
+    def extract_user_login(user_info):
+        try:
+            return ast.literal_eval(user_info).get('login', None)
+        except (ValueError, SyntaxError):
+            return None
+    return users.apply(extract_user_login)
+
+
+def regex_match_dates(created_at):
+    """ 以前の方法: 1行ずつ正規表現で形式をチェックしてから日時に変換する """
+    valid = created_at.astype(str).str.match(DATE_PATTERN, na=False)
+    return pd.to_datetime(created_at[valid], utc=True)
+
+
+def coerce_dates(created_at):
+    """ 形式を指定して pd.to_datetime で一括変換し、不正な値は NaT にして除く """
+    return pd.to_datetime(created_at, format='%Y-%m-%dT%H:%M:%SZ', errors='coerce', utc=True).dropna()
+
+
+def ingest_dates(created_at):
+    """ 取り込み時の方法（parse_timestamps）: pyarrow の strptime で一括変換し、不正な値は除く """
+    return parse_timestamps(created_at).dropna()
+
+
+def best_time(function, values):
+    best = float('inf')
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result = function(values)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+# 全 CSV の user・created_at 列を文字列のまま読み込む
+frames = [
+    pd.read_csv(os.path.join(data_dir, file_name), usecols=lambda column: column in ['user', 'created_at'], dtype=str)
+    for file_name in list_source_files(data_dir)
+]
+raw = pd.concat(frames, ignore_index=True).reindex(columns=['user', 'created_at'])
+print(f"📊 {len(raw)} 行で計測します")
+
+old_seconds, old_logins = best_time(literal_eval_logins, raw['user'])
+new_seconds, new_logins = best_time(extract_user_logins, raw['user'])
+same = old_logins.fillna('').astype(str).equals(new_logins.fillna('').astype(str))
+print(f"user.login  ast.literal_eval: {old_seconds:.3f}s  正規表現の一括抽出: {new_seconds:.3f}s  "
+      f"({old_seconds / max(new_seconds, 1e-9):.1f} 倍)  結果の一致: {same}")
+
+# ISO8601 として解釈できる別形式の値は parse_timestamps だけが変換するので、件数も表示する
+print("created_at")
+for label, function in [
+    ("str.match + to_datetime", regex_match_dates),
+    ("to_datetime(format=..., errors='coerce')", coerce_dates),
+    ("parse_timestamps（pyarrow strptime）", ingest_dates),
+]:
+    seconds, dates = best_time(function, raw['created_at'])
+    print(f"  {label}: {seconds:.3f}s  有効な日時: {len(dates)} 件")
@@ -1,72 +1,30 @@
-import ast
-import glob
 import os
+import sys
 
 import pandas as pd
 
-# データディレクトリを指定
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from corpus.developer_data import load_contributions  # noqa: E402
+
+# データディレクトリを指定（*_pulls.csv と *_issues.csv。初回は Parquet データセットに変換してから読み込む）
 data_dir = "../results/developer_data"
 
-# 全ての *_pulls.csv と *_issues.csv ファイルを検索
-pull_files = glob.glob(os.path.join(data_dir, "*_pulls.csv"))
-issue_files = glob.glob(os.path.join(data_dir, "*_issues.csv"))
+# 日付形式が不正な行は読み込み時に除外される。
+# GitHub API の形式（2024-01-02T03:04:05Z）以外の ISO8601 の日時も他の集計と同じく有効な日付として数え、
+# 2021-02-29 のような存在しない日付は除外する
+# 開発者名（user.login）は取り込み時に `user_login` カラムとして抽出済み
+contributions = load_contributions(data_dir, columns=['type', 'repository_url', 'user_login'])
+
+# `repository_url` の最後の部分（リポジトリ名）を取得し、新しい `repository` カラムを追加
+contributions['repository'] = contributions['repository_url'].str.rstrip('/').str.rsplit('/', n=1).str[-1]
 
 # 開発者ごとの統合データフレームを用意
 all_contributions = []
 
-def extract_user_login(user_info):
-    """ 'user' カラムからGitHubユーザー名を抽出する関数 """
-    try:
-        return ast.literal_eval(user_info).get('login', None)
-    except (ValueError, SyntaxError):
-        return None
-
-def extract_repo_name(repo_url):
-    """ `repository_url` からリポジトリ名を抽出する関数 """
-    try:
-        return repo_url.rstrip('/').split('/')[-1]  # 最後の部分（リポジトリ名）を取得
-    except AttributeError:
-        return None
-
-# PRデータの処理
-for pull_file in pull_files:
-    pulls_data = pd.read_csv(pull_file)
-
-    # `repository_url` からリポジトリ名を取得し、新しい `repository` カラムを追加
-    pulls_data['repository'] = pulls_data['repository_url'].apply(extract_repo_name)
-
-    # `created_at` に日付形式以外のデータが含まれていないかチェックし、日付のみをフィルタ
-    valid_dates_mask = pulls_data['created_at'].astype(str).str.match(r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}Z$', na=False)
-    pulls_data = pulls_data[valid_dates_mask]
-    pulls_data['created_at'] = pd.to_datetime(pulls_data['created_at'])
-
-    # 開発者名を抽出
-    pulls_data['user_login'] = pulls_data['user'].apply(extract_user_login)
-
-    # PR数を集計（リポジトリごとに開発者別）
-    pr_counts = pulls_data.groupby(['repository', 'user_login']).size().reset_index(name='pr_count')
-
-    all_contributions.append(pr_counts)
-
-# Issueデータの処理
-for issue_file in issue_files:
-    issues_data = pd.read_csv(issue_file)
-
-    # `repository_url` からリポジトリ名を取得し、新しい `repository` カラムを追加
-    issues_data['repository'] = issues_data['repository_url'].apply(extract_repo_name)
-
-    # `created_at` のチェック
-    valid_dates_mask = issues_data['created_at'].astype(str).str.match(r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}Z$', na=False)
-    issues_data = issues_data[valid_dates_mask]
-    issues_data['created_at'] = pd.to_datetime(issues_data['created_at'])
-
-    # 開発者名を抽出
-    issues_data['user_login'] = issues_data['user'].apply(extract_user_login)
-
-    # Issue数を集計（リポジトリごとに開発者別）
-    issue_counts = issues_data.groupby(['repository', 'user_login']).size().reset_index(name='issue_count')
-
-    all_contributions.append(issue_counts)
+# PR数・Issue数を集計（リポジトリごとに開発者別）
+for contribution_type, count_column in [('pulls', 'pr_count'), ('issues', 'issue_count')]:
+    typed = contributions[contributions['type'] == contribution_type]
+    all_contributions.append(typed.groupby(['repository', 'user_login']).size().reset_index(name=count_column))
 
 # すべてのデータを統合
 final_contributions = pd.concat(all_contributions, ignore_index=True)
@@ -1,10 +1,14 @@
-import pandas as pd
+import os
+import sys
 
-# CSV ファイルからデータを読み込む
-df = pd.read_csv('/Users/kazuki-h/newresearch/results/monthly_contributions.csv')
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from corpus.contribution_cube import update_cube  # noqa: E402
 
-# 'apache/zookeeper' のみを抽出
-zookeeper_df = df[df['repository'] == 'apache/zookeeper']
+# 月次の貢献キューブを読み込む（CSV が更新されていなければ保存済みのキューブをそのまま使う）
+cube = update_cube('/Users/kazuki-h/newresearch/results/developer_data')
+
+# 'apache/zookeeper' のみを抽出し、月・開発者ごとの貢献数に集約
+zookeeper_df = cube.rollup(['month', 'developer'], filters={'repository': 'apache/zookeeper'})
 
 # month でグループ化し、contribution_count を合計し、貢献人数をカウント
 grouped = zookeeper_df.groupby('month').agg(
@@ -12,4 +16,5 @@ grouped = zookeeper_df.groupby('month').agg(
     unique_contributors=('developer', 'nunique')
 ).reset_index()
 
-grouped.to_csv('/Users/kazuki-h/newresearch/results/monthly_contributions.csv', index=False)
\ No newline at end of file
+# 入力の monthly_contributions.csv を上書きしないよう、別のファイルに保存
+grouped.to_csv('/Users/kazuki-h/newresearch/results/zookeeper_monthly_contributions.csv', index=False)
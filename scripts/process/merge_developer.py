@@ -1,42 +1,35 @@
 import os
+import sys
 
 import pandas as pd
 
-# ディレクトリを指定
-directory_path = "../results/developer_data"
-
-# CSVファイルのパスを動的に取得
-file_paths = {os.path.splitext(f)[0]: os.path.join(directory_path, f) for f in os.listdir(directory_path) if f.endswith(".csv")}
-
-# 結果を格納するリスト
-results = []
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from corpus.developer_data import iter_contributions  # noqa: E402
 
-# 各ファイルを処理
-for file_name, file_path in file_paths.items():
-    try:
-        # ファイル名から開発者名を抽出
-        developer = file_name.split("_")[0]
-        
-        # ファイルを読み込む
-        df = pd.read_csv(file_path)
-        
-        # repository_url列、created_at列、comments列を抽出
-        if 'repository_url' in df.columns and 'created_at' in df.columns and 'comments' in df.columns:
-            for _, row in df[['repository_url', 'created_at', 'comments']].dropna().iterrows():
-                results.append({
-                    "開発者名": developer,
-                    "貢献先リポジトリ": row['repository_url'],
-                    "作成日": row['created_at'],
-                    "コメント数": row['comments']
-                })
-    except Exception as e:
-        print(f"Error processing {file_name}: {e}")
+# ディレクトリを指定（初回は Parquet データセットに変換してから読み込む）
+directory_path = "../results/developer_data"
+# 1回に読み込んで書き出す行数（全体をメモリに載せずに少しずつ書き出す）
+CHUNK_ROWS = 200_000
 
-# データフレームに変換
-final_df = pd.DataFrame(results)
+# 読み込む列と、出力する列名
+output_columns = {
+    'developer': '開発者名',
+    'repository_url': '貢献先リポジトリ',
+    'created_at': '作成日',
+    'comments': 'コメント数',
+}
 
 # ファイルに保存
 output_file = "../results/developer_merge_contributions.csv"
-final_df.to_csv(output_file, index=False, encoding='utf-8-sig')
-
-print(f"結果は次のファイルに保存されました: {output_file}")
+row_count = 0
+with open(output_file, 'w', encoding='utf-8-sig', newline='') as f:
+    pd.DataFrame(columns=list(output_columns.values())).to_csv(f, index=False)
+    # 開発者名、repository_url列、created_at列、comments列だけをチャンクごとに読み込み、欠損のある行を除いて追記
+    for chunk in iter_contributions(directory_path, columns=list(output_columns), batch_size=CHUNK_ROWS):
+        chunk = chunk.dropna()
+        # 作成日は元のCSVと同じ形式の文字列で出力する
+        chunk['created_at'] = chunk['created_at'].dt.strftime('%Y-%m-%dT%H:%M:%SZ')
+        chunk.rename(columns=output_columns).to_csv(f, header=False, index=False)
+        row_count += len(chunk)
+
+print(f"結果は次のファイルに保存されました: {output_file}（{row_count} 行）")
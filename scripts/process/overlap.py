@@ -1,40 +1,34 @@
+import ast
+import os
+import sys
+
 import pandas as pd
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from corpus.common_repos import repository_overlap  # noqa: E402
+
 # ファイルを読み込む
 pre_contributions = pd.read_csv('../movement/zookeeper_pre_contribution_with_developers.csv')
 post_contributions = pd.read_csv('../movement/zookeeper_post_contribution_with_developers.csv')
 
 # 開発者リストを文字列からリスト形式に変換
-pre_contributions['developers'] = pre_contributions['developers'].apply(eval)
-post_contributions['developers'] = post_contributions['developers'].apply(eval)
-
-# 重複を計算する関数
-def count_overlapping_developers(row):
-    pre_developers = set(row['pre_developers'])
-    post_developers = set(row['post_developers'])
-    return len(pre_developers & post_developers)
-
-# 各リポジトリの重複を計算
-overlap_results = []
-
-for pre_idx, pre_row in pre_contributions.iterrows():
-    for post_idx, post_row in post_contributions.iterrows():
-        overlap = count_overlapping_developers({
-            'pre_developers': pre_row['developers'],
-            'post_developers': post_row['developers']
-        })
-        overlap_results.append({
-            'pre_repo': pre_row['before'],
-            'post_repo': post_row['after'],
-            'overlap_count': overlap
-        })
-
-# 結果を DataFrame に変換
-overlap_df = pd.DataFrame(overlap_results)
+pre_contributions['developers'] = pre_contributions['developers'].apply(ast.literal_eval)
+post_contributions['developers'] = post_contributions['developers'].apply(ast.literal_eval)
+
+# True なら重複が0人の組も出力する（全リポジトリの組み合わせになるため大きくなる）
+INCLUDE_ZERO_OVERLAP = False
+# True なら Jaccard 係数（重複数 / 和集合の人数）の列も出力する
+ADD_JACCARD = False
+
+# 各リポジトリの重複を、リポジトリ×開発者の疎行列の積で計算
+overlap_df = repository_overlap(
+    pre_contributions, post_contributions, 'before', 'after',
+    include_zero=INCLUDE_ZERO_OVERLAP, jaccard=ADD_JACCARD,
+)
 
 # 結果を確認
 print(overlap_df)
 
 # 結果を CSV に保存
 overlap_df.to_csv('repository_overlap_counts.csv', index=False, encoding='utf-8-sig')
-print("重複数を保存しました: repository_overlap_counts.csv")
\ No newline at end of file
+print("重複数を保存しました: repository_overlap_counts.csv")
@@ -0,0 +1,201 @@
+import json
+import os
+import random
+import runpy
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import pandas as pd
+import pytest
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts")
+sys.path.insert(0, SCRIPTS_DIR)
+# scripts/analyze のモジュールは同じディレクトリのモジュールを直接 import する
+sys.path.insert(0, os.path.join(SCRIPTS_DIR, "analyze"))
+
+# developer_data の CSV の列（GitHub API の issues / pulls の一部）
+DEVELOPER_DATA_COLUMNS = [
+    "repository_url", "number", "title", "state", "created_at", "updated_at",
+    "closed_at", "comments", "comments_url", "url", "user",
+]
+
+
+def contribution_row(rng, developer, number, start, days):
+    """
+    developer_data の1行を作る。リポジトリ名の取れない URL・不正な日付・形式の違う user も混ぜる
+    """
+    roll = rng.random()
+    if roll < 0.03:
+        repository_url = ""
+    elif roll < 0.05:
+        repository_url = "https://example.com/not-a-repository"
+    else:
+        repository_url = f"https://api.github.com/repos/owner{rng.randrange(4)}/repo{rng.randrange(8)}"
+    created = start + pd.Timedelta(seconds=rng.randrange(days * 86400))
+    created_at = "invalid" if rng.random() < 0.02 else created.strftime("%Y-%m-%dT%H:%M:%SZ")
+    roll = rng.random()
+    if roll < 0.8:
+        user = repr({"login": developer, "id": number, "type": "User"})
+    elif roll < 0.9:
+        user = repr({"id": number, "login": developer})
+    elif roll < 0.95:
+        user = f'{{"login": "{developer}", "id": {number}}}'
+    else:
+        user = "not a dict"
+    return {
+        "repository_url": repository_url,
+        "number": number,
+        "title": f"title {number}",
+        "state": rng.choice(["open", "closed"]),
+        "created_at": created_at,
+        "updated_at": (created + pd.Timedelta(days=1)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "closed_at": "" if rng.random() < 0.5 else (created + pd.Timedelta(days=2)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "comments": rng.randrange(10),
+        "comments_url": f"{repository_url}/comments",
+        "url": f"{repository_url}/issues/{number}",
+        "user": user,
+    }
+
+
+def write_developer_data(data_dir, developers=12, rows=40, seed=0, start="2020-01-01", days=365):
+    """
+    data_dir に {開発者}_issues.csv / {開発者}_pulls.csv の合成データを書き出す
+    """
+    rng = random.Random(seed)
+    os.makedirs(data_dir, exist_ok=True)
+    start = pd.Timestamp(start)
+    for d in range(developers):
+        developer = f"dev{d}"
+        for kind in ["issues", "pulls"]:
+            records = [
+                contribution_row(rng, developer, number, start, days)
+                for number in range(rng.randrange(rows // 2, rows))
+            ]
+            frame = pd.DataFrame(records, columns=DEVELOPER_DATA_COLUMNS)
+            frame.to_csv(os.path.join(data_dir, f"{developer}_{kind}.csv"), index=False)
+
+
+@pytest.fixture
+def results_dir(tmp_path):
+    """
+    スクリプトと同じ相対パス（./../results/developer_data）で合成データを読めるディレクトリ構成を作る
+    """
+    results = tmp_path / "results"
+    write_developer_data(str(results / "developer_data"))
+    return results
+
+
+def run_script(relative_path, cwd):
+    """
+    scripts/ 以下のスクリプトを cwd をカレントディレクトリにして実行する
+    """
+    previous = os.getcwd()
+    os.makedirs(cwd, exist_ok=True)
+    os.chdir(cwd)
+    try:
+        runpy.run_path(os.path.join(SCRIPTS_DIR, relative_path), run_name="__main__")
+    finally:
+        os.chdir(previous)
+
+
+class StubResponse:
+    """
+    スタブサーバーが返すレスポンス。body が dict / list なら JSON にする
+    """
+
+    def __init__(self, status=200, body=None, headers=None):
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+
+
+class StubRequest:
+    def __init__(self, method, path, params, headers, body):
+        self.method = method
+        self.path = path
+        self.params = params
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body)
+
+
+class GitHubStub:
+    """
+    GitHub API の代わりにローカルで応答する HTTP サーバー。
+    handler(StubRequest) が StubResponse を返す。受け取ったリクエストは requests に順に記録する
+    """
+
+    def __init__(self):
+        self.handler = lambda request: StubResponse(404, {"message": "Not Found"})
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def respond(self):
+                parts = urlsplit(self.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                request = StubRequest(
+                    self.command, parts.path, dict(parse_qsl(parts.query)), dict(self.headers),
+                    self.rfile.read(length).decode("utf-8") if length else "",
+                )
+                stub.requests.append(request)
+                response = stub.handler(request)
+                body = response.body
+                if isinstance(body, (dict, list)):
+                    body = json.dumps(body)
+                body = (body or "").encode("utf-8")
+                try:
+                    self.send_response(response.status)
+                    for name, value in response.headers.items():
+                        self.send_header(name, value)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # クライアントがタイムアウトで切断した
+
+            do_GET = do_POST = respond
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def github_stub():
+    stub = GitHubStub()
+    yield stub
+    stub.close()
+
+
+class FakeClock:
+    """
+    time モジュールの代わりに差し替える時計。sleep() は待たずに時刻だけ進め、待機秒数を sleeps に記録する
+    """
+
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+    def advance(self, seconds):
+        self.now += seconds
@@ -0,0 +1,80 @@
+import asyncio
+import time
+
+from conftest import StubResponse
+
+from crawler.async_client import AsyncGitHubClient, resource_for_path
+from crawler.http_cache import HttpCache
+from crawler.retry import CircuitBreaker, RetryPolicy
+
+
+def make_client(stub, tokens=("token-a",), **kwargs):
+    return AsyncGitHubClient(
+        list(tokens), api_url=stub.url, retry_policy=RetryPolicy(max_attempts=3, base_delay=0),
+        circuit_breaker=CircuitBreaker(min_calls=1000), **kwargs,
+    )
+
+
+def test_resource_for_path():
+    assert resource_for_path("/search/commits") == "search"
+    assert resource_for_path("/graphql") == "graphql"
+    assert resource_for_path("/repos/apache/zookeeper") == "core"
+
+
+def test_get_json_retries_and_gives_up(github_stub):
+    github_stub.handler = lambda request: StubResponse(502)
+
+    async def run():
+        async with make_client(github_stub) as client:
+            return await client.get_json("/repos/apache/zookeeper"), client.metrics
+
+    (status, data), metrics = asyncio.run(run())
+    assert (status, data) == (502, None)
+    assert len(github_stub.requests) == 3
+    assert metrics.gave_up["/repos/:owner/:repo"] == 1
+
+
+def test_exhausted_search_does_not_block_core_requests(github_stub):
+    reset_at = int(time.time()) + 2
+
+    def handler(request):
+        if request.path.startswith("/search/") and time.time() < reset_at:
+            return StubResponse(
+                403, {"message": "API rate limit exceeded"},
+                {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(reset_at), "X-RateLimit-Resource": "search"},
+            )
+        return StubResponse(200, {"path": request.path})
+
+    github_stub.handler = handler
+
+    async def run():
+        async with make_client(github_stub, max_concurrency=1) as client:
+            search = asyncio.create_task(client.get_json("/search/commits"))
+            await asyncio.sleep(0.3)  # search がリセット待ちに入る
+            core_started = time.monotonic()
+            core = await client.get_json("/repos/apache/zookeeper")
+            core_seconds = time.monotonic() - core_started
+            return core, core_seconds, await search
+
+    core, core_seconds, search = asyncio.run(run())
+    # 送信枠が1つでも、search の待機中に core のリクエストが通る
+    assert core == (200, {"path": "/repos/apache/zookeeper"})
+    assert core_seconds < 1
+    assert search == (200, {"path": "/search/commits"})
+
+
+def test_etag_revalidation_reuses_cached_body(github_stub, tmp_path):
+    def handler(request):
+        if request.headers.get("If-None-Match") == '"v1"':
+            return StubResponse(304, "")
+        return StubResponse(200, {"name": "zookeeper"}, {"ETag": '"v1"'})
+
+    github_stub.handler = handler
+    cache = HttpCache(str(tmp_path / "cache.sqlite3"))
+
+    async def run():
+        async with make_client(github_stub, cache=cache) as client:
+            return [await client.get_json("/repos/apache/zookeeper") for _ in range(2)]
+
+    assert asyncio.run(run()) == [(200, {"name": "zookeeper"})] * 2
+    assert [request.headers.get("If-None-Match") for request in github_stub.requests] == [None, '"v1"']
@@ -0,0 +1,147 @@
+import time
+
+import pytest
+import requests
+from conftest import FakeClock, StubResponse
+
+import crawler.client as client_module
+import crawler.token_pool as token_pool
+from crawler.client import GitHubClient, next_page_params
+from crawler.http_cache import HttpCache
+from crawler.retry import CircuitBreaker, RetryPolicy
+
+
+def make_client(stub, tokens=("token-a",), **kwargs):
+    # テストでは待機しない
+    return GitHubClient(
+        list(tokens), api_url=stub.url, retry_policy=RetryPolicy(max_attempts=4, base_delay=0),
+        circuit_breaker=CircuitBreaker(min_calls=1000), **kwargs,
+    )
+
+
+def test_get_json_retries_server_errors_until_success(github_stub):
+    responses = iter([StubResponse(502), StubResponse(503), StubResponse(200, {"ok": True})])
+    github_stub.handler = lambda request: next(responses)
+    client = make_client(github_stub)
+
+    status, data, _ = client.get_json("/repos/apache/zookeeper")
+
+    assert (status, data) == (200, {"ok": True})
+    assert len(github_stub.requests) == 3
+    assert client.metrics.rows()[0]["server_error"] == 2
+
+
+def test_post_graphql_does_not_retry_server_errors(github_stub):
+    github_stub.handler = lambda request: StubResponse(502)
+    client = make_client(github_stub)
+
+    status, data, _ = client.post_graphql("query { viewer { login } }")
+
+    assert (status, data) == (502, None)
+    assert len(github_stub.requests) == 1
+    assert client.metrics.gave_up["/graphql"] == 1
+
+
+def test_post_graphql_retries_rate_limits(github_stub):
+    responses = iter([
+        StubResponse(403, {"message": "You have exceeded a secondary rate limit"}, {"Retry-After": "0"}),
+        StubResponse(200, {"errors": [{"type": "RATE_LIMITED"}]}),
+        StubResponse(200, {"data": {"viewer": {"login": "octocat"}}}),
+    ])
+    github_stub.handler = lambda request: next(responses)
+    client = make_client(github_stub)
+
+    status, data, _ = client.post_graphql("query { viewer { login } }")
+
+    assert (status, data) == (200, {"data": {"viewer": {"login": "octocat"}}})
+    assert len(github_stub.requests) == 3
+
+
+def token_of(request):
+    return request.headers.get("Authorization", "").removeprefix("token ")
+
+
+def exhausted(reset_at):
+    return StubResponse(
+        403, {"message": "API rate limit exceeded"},
+        {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(int(reset_at)), "X-RateLimit-Limit": "5000"},
+    )
+
+
+@pytest.mark.parametrize("status", [403, 429])
+def test_rotates_token_on_primary_rate_limit(github_stub, status):
+    reset_at = time.time() + 3600
+
+    def handler(request):
+        if token_of(request) == "token-a":
+            response = exhausted(reset_at)
+            response.status = status
+            return response
+        return StubResponse(200, {"ok": True})
+
+    github_stub.handler = handler
+    client = make_client(github_stub, tokens=("token-a", "token-b"))
+
+    assert client.get_json("/repos/apache/zookeeper")[:2] == (200, {"ok": True})
+    assert client.get_json("/repos/apache/kafka")[:2] == (200, {"ok": True})
+    # 尽きたトークンは2回目以降選ばない
+    assert [token_of(request) for request in github_stub.requests] == ["token-a", "token-b", "token-b"]
+
+
+def test_waits_for_reset_when_all_tokens_exhausted(github_stub, monkeypatch):
+    clock = FakeClock(time.time())
+    monkeypatch.setattr(token_pool, "time", clock)
+    monkeypatch.setattr(client_module, "time", clock)
+    reset_at = clock.now + 120
+
+    def handler(request):
+        if clock.now < reset_at:
+            return exhausted(reset_at)
+        return StubResponse(200, {"ok": True})
+
+    github_stub.handler = handler
+    client = make_client(github_stub, tokens=("token-a", "token-b"))
+
+    assert client.get_json("/search/commits", {"q": "author:octocat"})[:2] == (200, {"ok": True})
+    assert len(github_stub.requests) == 3
+    assert clock.sleeps and clock.sleeps[0] == pytest.approx(121, abs=1)
+
+
+def test_connection_errors_are_raised_after_max_attempts(github_stub):
+    client = make_client(github_stub)
+    client.api_url = "http://127.0.0.1:9"  # 接続できないポート
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        client.get_json("/repos/apache/zookeeper")
+    assert client.metrics.rows()[0]["connection_error"] == 4
+
+
+def test_etag_revalidation_reuses_cached_body(github_stub, tmp_path):
+    def handler(request):
+        if request.headers.get("If-None-Match") == '"v1"':
+            return StubResponse(304, "")
+        return StubResponse(200, {"name": "zookeeper"}, {"ETag": '"v1"'})
+
+    github_stub.handler = handler
+    client = make_client(github_stub, cache=HttpCache(str(tmp_path / "cache.sqlite3")))
+
+    assert client.get_json("/repos/apache/zookeeper")[:2] == (200, {"name": "zookeeper"})
+    assert client.get_json("/repos/apache/zookeeper")[:2] == (200, {"name": "zookeeper"})
+    assert [request.headers.get("If-None-Match") for request in github_stub.requests] == [None, '"v1"']
+
+
+def test_immutable_resource_is_served_from_cache(github_stub, tmp_path):
+    github_stub.handler = lambda request: StubResponse(200, {"files": []})
+    client = make_client(github_stub, cache=HttpCache(str(tmp_path / "cache.sqlite3")))
+    path = "/repos/apache/zookeeper/commits/0123456789abcdef0123456789abcdef01234567"
+
+    assert client.get_json(path)[:2] == (200, {"files": []})
+    assert client.get_json(path)[:2] == (200, {"files": []})
+    assert len(github_stub.requests) == 1
+
+
+def test_next_page_params():
+    headers = {"Link": '<https://api.github.com/search/commits?q=x&page=3>; rel="next", '
+                       '<https://api.github.com/search/commits?q=x&page=10>; rel="last"'}
+    assert next_page_params(headers) == {"q": "x", "page": "3"}
+    assert next_page_params({}) is None
@@ -0,0 +1,127 @@
+import asyncio
+import importlib
+
+import pandas as pd
+import pytest
+from conftest import StubResponse
+
+from crawler.async_client import AsyncGitHubClient
+from crawler.crawl_state import DONE, FAILED, CrawlState
+from crawler.retry import CircuitBreaker, RetryPolicy
+
+COMMITS = {
+    "c1": [{"filename": "a.py", "patch": "@@ -1 +1 @@"}, {"filename": "b.py", "patch": "@@ -2 +2 @@"}],
+    "c2": [],  # マージ・空コミット
+    "c3": [{"filename": "c.py", "patch": "@@ -3 +3 @@"}],
+}
+
+
+@pytest.fixture
+def commit_patch(github_stub, tmp_path, monkeypatch):
+    """
+    commit_patch.py をスタブサーバー宛てのクライアントと一時ディレクトリの入出力先で読み込む
+    """
+    monkeypatch.chdir(tmp_path)  # HTTP キャッシュを一時ディレクトリに置く
+    module = importlib.import_module("Contributions.commit_patch")
+
+    def make_client(tokens, **kwargs):
+        return AsyncGitHubClient(
+            ["token-a"], api_url=github_stub.url, retry_policy=RetryPolicy(max_attempts=2, base_delay=0),
+            circuit_breaker=CircuitBreaker(min_calls=1000), **kwargs,
+        )
+
+    monkeypatch.setattr(module, "AsyncGitHubClient", make_client)
+    monkeypatch.setattr(module, "input_directory", str(tmp_path / "commit_history"))
+    monkeypatch.setattr(module, "output_directory", str(tmp_path / "commit-diff"))
+    monkeypatch.setattr(module, "state_db", str(tmp_path / "state.sqlite3"))
+    monkeypatch.setattr(module, "METRICS_FILE", str(tmp_path / "metrics.csv"))
+    (tmp_path / "commit_history").mkdir()
+    for developer, shas in [("alice", ["c1", "c2", "c3"]), ("bob", ["c1", "c3"])]:
+        pd.DataFrame({
+            "repo": ["o/r"] * len(shas), "commit_sha": shas, "changed_files": ["x.py"] * len(shas),
+        }).to_csv(tmp_path / "commit_history" / f"{developer}.csv", index=False)
+    return module
+
+
+def commit_handler(broken):
+    def handler(request):
+        sha = request.path.rsplit("/", 1)[-1]
+        if sha in broken:
+            return StubResponse(502)
+        return StubResponse(200, {"sha": sha, "files": COMMITS[sha]})
+    return handler
+
+
+def statuses(module, tmp_path):
+    state = CrawlState(str(tmp_path / "state.sqlite3"))
+    return dict(state.conn.execute("SELECT item, status FROM tasks WHERE job = ?", (module.STATE_JOB,)))
+
+
+def test_failed_commit_detail_marks_developer_failed(commit_patch, github_stub, tmp_path):
+    github_stub.handler = commit_handler(broken={"c3"})
+
+    asyncio.run(commit_patch.main())
+
+    # 取得を諦めたコミットは書き込まず、出力は .partial のまま残す
+    assert statuses(commit_patch, tmp_path) == {"alice": FAILED, "bob": FAILED}
+    assert not (tmp_path / "commit-diff" / "alice.csv").exists()
+    partial = pd.read_csv(tmp_path / "commit-diff" / "alice.csv.partial")
+    assert partial["commit_sha"].tolist() == ["c1", "c1", "c2"]
+    # 空コミットはファイル名・patch が空の1行として残る
+    assert partial[partial["commit_sha"] == "c2"][["filename", "patch"]].isna().all(axis=None)
+    # 失敗した c3 は共有している bob の処理でも取り直す
+    c3_requests = [request for request in github_stub.requests if request.path.endswith("/c3")]
+    assert len(c3_requests) == 4
+
+    # 次回の実行では .partial から再開し、失敗したコミットを取り直して完了にする
+    github_stub.handler = commit_handler(broken=set())
+    github_stub.requests.clear()
+    asyncio.run(commit_patch.main())
+
+    assert statuses(commit_patch, tmp_path) == {"alice": DONE, "bob": DONE}
+    # alice は書き込み済みの c1 を取り直さない（最後に書き込んだ c2 は書きかけの可能性があるため取り直す）
+    assert sorted(request.path.rsplit("/", 1)[-1] for request in github_stub.requests[:2]) == ["c2", "c3"]
+    alice = pd.read_csv(tmp_path / "commit-diff" / "alice.csv")
+    assert alice[["commit_sha", "filename"]].fillna("").values.tolist() == [
+        ["c1", "a.py"], ["c1", "b.py"], ["c2", ""], ["c3", "c.py"],
+    ]
+    bob = pd.read_csv(tmp_path / "commit-diff" / "bob.csv")
+    assert bob["commit_sha"].tolist() == ["c1", "c1", "c3"]
+
+    # 完了した開発者は再実行しても取得し直さない
+    github_stub.requests.clear()
+    asyncio.run(commit_patch.main())
+    assert github_stub.requests == []
+
+
+def test_fetch_commit_marks_developer_failed_when_detail_fetch_gives_up(github_stub, tmp_path, monkeypatch):
+    monkeypatch.setenv("GITHUB_TOKEN", "token-a")
+    fetch_commit = importlib.import_module("Contributions.fetch_commit")
+    monkeypatch.setattr(fetch_commit, "output_dir", str(tmp_path))
+
+    def handler(request):
+        if request.path == "/search/commits":
+            return StubResponse(200, {"items": [
+                {"sha": sha, "repository": {"full_name": "o/r"}, "commit": {"message": sha, "committer": {"date": "2020-01-01"}}}
+                for sha in ["c1", "c2", "c3"]
+            ]})
+        return commit_handler(broken={"c3"})(request)
+
+    github_stub.handler = handler
+    state = CrawlState(str(tmp_path / "state.sqlite3"))
+    state.add(fetch_commit.STATE_JOB, ["alice"], ["commits"])
+
+    async def run():
+        async with AsyncGitHubClient(
+            ["token-a"], api_url=github_stub.url, retry_policy=RetryPolicy(max_attempts=2, base_delay=0),
+            circuit_breaker=CircuitBreaker(min_calls=1000),
+        ) as client:
+            await fetch_commit.developer_worker(client, state)
+
+    asyncio.run(run())
+
+    # 変更ファイルが空のコミットとして書き込まず、.partial を残して次回に取り直す
+    assert state.summary(fetch_commit.STATE_JOB) == {FAILED: 1}
+    assert not (tmp_path / "alice.csv").exists()
+    partial = pd.read_csv(tmp_path / "alice.csv.partial")
+    assert partial[["commit_sha", "changed_files"]].fillna("").values.tolist() == [["c1", "a.py, b.py"], ["c2", ""]]
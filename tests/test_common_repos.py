@@ -0,0 +1,68 @@
+import os
+import random
+from itertools import combinations
+
+import pandas as pd
+import pytest
+from conftest import SCRIPTS_DIR
+
+from corpus.common_repos import mine_common_groups
+
+
+def brute_force_groups(bitsets, group_size, min_common_repos):
+    """
+    以前の overfive.py と同じく全ての組み合わせを調べる
+    """
+    groups = []
+    for group in combinations(sorted(bitsets), group_size):
+        common = ~0
+        for developer in group:
+            common &= bitsets[developer]
+        if common.bit_count() >= min_common_repos:
+            groups.append((group, common))
+    return groups
+
+
+def test_mine_common_groups_matches_all_combinations():
+    rng = random.Random(0)
+    bitsets = {f"dev{i:02d}": rng.getrandbits(6) for i in range(14)}
+    found = mine_common_groups(bitsets, [2, 3, 4], min_common_repos=2)
+    for group_size in [2, 3, 4]:
+        assert found[group_size] == brute_force_groups(bitsets, group_size, 2)
+
+
+def test_mine_common_groups_raises_above_max_groups():
+    # 60人が同じ2つのリポジトリを共有すると、12人組だけでも C(60, 12) 通りになる
+    bitsets = {f"dev{i:02d}": 0b11 for i in range(60)}
+    with pytest.raises(RuntimeError, match="上限 1000 件"):
+        mine_common_groups(bitsets, range(5, 13), min_common_repos=2, max_groups=1000)
+
+
+def test_mine_common_groups_returns_all_groups_at_max_groups():
+    # 8人から5〜8人組は C(8,5)+C(8,6)+C(8,7)+C(8,8) = 56+28+8+1 = 93 通り
+    bitsets = {f"dev{i}": 0b11 for i in range(8)}
+    found = mine_common_groups(bitsets, range(5, 9), min_common_repos=2, max_groups=93)
+    assert sum(len(groups) for groups in found.values()) == 93
+
+
+def test_overfive_writes_no_csv_when_max_groups_is_exceeded(tmp_path, monkeypatch):
+    input_path = tmp_path / "pre_contribution_with_developers.csv"
+    developers = [f"dev{i:02d}" for i in range(30)]
+    pd.DataFrame({
+        "before": ["owner/a", "owner/b"],
+        "developers": [str(developers), str(developers)],
+    }).to_csv(input_path, index=False)
+    script = open(os.path.join(SCRIPTS_DIR, "common_repo_contribution", "overfive.py"), encoding="utf-8").read()
+    script = script.replace(
+        '"/Users/kazuki-h/newresearch/results/movement/Zinto/zookeeper_pre_contribution_with_developers.csv"',
+        repr(str(input_path)),
+    ).replace("MAX_GROUPS = 5_000_000", "MAX_GROUPS = 1000")
+    output_dir = tmp_path / "results" / "common_repoCon"
+    output_dir.mkdir(parents=True)
+    cwd = tmp_path / "scripts" / "common_repo_contribution"
+    cwd.mkdir(parents=True)
+    monkeypatch.chdir(cwd)
+
+    with pytest.raises(RuntimeError):
+        exec(compile(script, "overfive.py", "exec"), {"__name__": "__main__", "__file__": str(cwd / "overfive.py")})
+    assert list(output_dir.iterdir()) == []
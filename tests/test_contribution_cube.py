@@ -0,0 +1,75 @@
+import os
+import random
+
+import pandas as pd
+
+from conftest import DEVELOPER_DATA_COLUMNS, contribution_row, run_script
+from corpus.contribution_cube import CUBE_DIMENSIONS, update_cube
+from corpus.developer_data import load_contributions
+
+
+def old_monthly_contributions(data_dir):
+    """
+    以前の developer_per_month.py の groupby による集計
+    """
+    df_all = load_contributions(data_dir, columns=['developer', 'repository', 'created_at', 'type'])
+    df_all['month'] = df_all['created_at'].dt.to_period('M')
+    return df_all.groupby(['developer', 'repository', 'month', 'type'], observed=True).size().reset_index(
+        name='contribution_count')
+
+
+def old_monthly_repository_contributions(data_dir):
+    """
+    以前の repo_per_month.py の groupby による集計
+    """
+    df_all = load_contributions(data_dir, columns=['repository', 'created_at', 'type'])
+    df_all = df_all[['repository', 'created_at', 'type']].sort_values(by='created_at')
+    df_all['month'] = df_all['created_at'].dt.to_period('M')
+    return df_all.groupby(['month', 'repository', 'type'], observed=True).size().reset_index(
+        name='contribution_count')
+
+
+def append_contributions(data_dir, start, days, seed=1):
+    """
+    既存の CSV に start から days 日間の貢献を追記し、更新時刻を進める
+    """
+    rng = random.Random(seed)
+    for file_name in sorted(os.listdir(data_dir))[::2]:
+        path = os.path.join(data_dir, file_name)
+        developer = file_name.split('_')[0]
+        rows = [contribution_row(rng, developer, 1000 + i, pd.Timestamp(start), days) for i in range(15)]
+        pd.DataFrame(rows, columns=DEVELOPER_DATA_COLUMNS).to_csv(path, mode='a', header=False, index=False)
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+def test_monthly_scripts_match_old_groupby(results_dir):
+    data_dir = str(results_dir / "developer_data")
+    run_script("Contributions/developer_per_month.py", results_dir.parent / "Contributions")
+    run_script("Contributions/repo_per_month.py", results_dir.parent / "Contributions")
+
+    expected = old_monthly_contributions(data_dir).to_csv(index=False)
+    assert (results_dir / "monthly_contributions.csv").read_text() == expected
+    expected = old_monthly_repository_contributions(data_dir).to_csv(index=False)
+    assert (results_dir / "monthly_repository_contributions.csv").read_text() == expected
+
+
+def test_incremental_update_matches_full_rebuild(results_dir, tmp_path):
+    data_dir = str(results_dir / "developer_data")
+    cube_path = str(tmp_path / "cube" / "cube.parquet")
+    first = update_cube(data_dir, cube_path)
+    last_month = first.last_month
+
+    # 前回の最終月の途中から後の月に貢献が追加された場合
+    append_contributions(data_dir, "2020-12-20", 90)
+    incremental = update_cube(data_dir, cube_path)
+    full = update_cube(data_dir, str(tmp_path / "full" / "cube.parquet"), full=True)
+
+    assert incremental.last_month > last_month
+    pd.testing.assert_frame_equal(incremental.rollup(CUBE_DIMENSIONS), full.rollup(CUBE_DIMENSIONS))
+    expected = old_monthly_contributions(data_dir).to_csv(index=False)
+    assert incremental.rollup(CUBE_DIMENSIONS).to_csv(index=False) == expected
+
+    # CSV が変わっていなければ保存済みのキューブをそのまま使う
+    reused = update_cube(data_dir, cube_path)
+    pd.testing.assert_frame_equal(reused.counts, incremental.counts)
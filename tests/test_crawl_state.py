@@ -0,0 +1,115 @@
+import pytest
+from conftest import FakeClock
+
+import crawler.crawl_state as crawl_state
+from crawler.crawl_state import CLAIMED, DONE, FAILED, MISSING, PENDING, CrawlState
+
+JOB = "dependencies"
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(crawl_state, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def state_path(tmp_path):
+    return str(tmp_path / "state.sqlite3")
+
+
+def test_claim_returns_items_in_order_without_duplicates(state_path, clock):
+    worker_a = CrawlState(state_path, worker_id="a")
+    worker_b = CrawlState(state_path, worker_id="b")
+    worker_a.add(JOB, ["r1", "r2", "r3"], ["pom.xml", "package.json"])
+    worker_a.add(JOB, ["r1"], ["pom.xml"])  # 登録済みのタスクは変更しない
+
+    assert worker_a.claim(JOB, limit=2) == {"r1": ["pom.xml", "package.json"], "r2": ["pom.xml", "package.json"]}
+    assert worker_b.claim(JOB, limit=2) == {"r3": ["pom.xml", "package.json"]}
+    assert worker_b.claim(JOB, limit=2) == {}
+    assert worker_a.summary(JOB) == {CLAIMED: 6}
+
+
+def test_claim_only_unfinished_parts(state_path, clock):
+    state = CrawlState(state_path)
+    state.add(JOB, ["r1"], ["pom.xml", "package.json"])
+    state.claim(JOB, limit=1)
+    state.record(JOB, [("r1", "pom.xml", DONE, None), ("r1", "package.json", MISSING, None)])
+
+    assert state.claim(JOB, limit=1) == {}
+    assert state.summary(JOB) == {DONE: 1, MISSING: 1}
+
+
+def test_expired_lease_can_be_reclaimed(state_path, clock):
+    worker_a = CrawlState(state_path, worker_id="a", lease_seconds=600)
+    worker_b = CrawlState(state_path, worker_id="b", lease_seconds=600)
+    worker_a.add(JOB, ["r1"], ["pom.xml"])
+    assert worker_a.claim(JOB, limit=1) == {"r1": ["pom.xml"]}
+
+    clock.advance(599)
+    assert worker_b.claim(JOB, limit=1) == {}
+    clock.advance(2)
+    assert worker_b.claim(JOB, limit=1) == {"r1": ["pom.xml"]}
+
+
+def test_renew_extends_lease_of_own_items(state_path, clock):
+    worker_a = CrawlState(state_path, worker_id="a", lease_seconds=600)
+    worker_b = CrawlState(state_path, worker_id="b", lease_seconds=600)
+    worker_a.add(JOB, ["r1"], ["pom.xml"])
+    worker_a.claim(JOB, limit=1)
+
+    clock.advance(500)
+    worker_b.renew(JOB, ["r1"])  # 他のワーカーの確保は延長しない
+    worker_a.renew(JOB, ["r1"])
+    clock.advance(500)
+    assert worker_b.claim(JOB, limit=1) == {}
+    clock.advance(101)
+    assert worker_b.claim(JOB, limit=1) == {"r1": ["pom.xml"]}
+
+
+def test_failed_items_are_deferred_to_next_run(state_path, clock):
+    state = CrawlState(state_path, max_attempts=2)
+    state.add(JOB, ["r1", "r2"], ["pom.xml"])
+    state.claim(JOB, limit=1)
+    clock.advance(1)
+    state.record(JOB, [("r1", "pom.xml", FAILED, "HTTP 502")])
+
+    # 同じ実行の中では失敗した r1 を再確保しない
+    assert state.claim(JOB, limit=2) == {"r2": ["pom.xml"]}
+
+    clock.advance(1)
+    next_run = CrawlState(state_path, max_attempts=2)
+    assert next_run.claim(JOB, limit=2) == {"r1": ["pom.xml"]}
+    clock.advance(1)
+    next_run.record(JOB, [("r1", "pom.xml", FAILED, "HTTP 502")])
+
+    # attempts が上限に達したら再試行しない
+    clock.advance(1)
+    assert CrawlState(state_path, max_attempts=2).claim(JOB, limit=2) == {}
+
+
+def test_release_returns_own_claims_to_pending(state_path, clock):
+    worker_a = CrawlState(state_path, worker_id="a")
+    worker_b = CrawlState(state_path, worker_id="b")
+    worker_a.add(JOB, ["r1", "r2"], ["pom.xml"])
+    worker_a.claim(JOB, limit=1)
+    worker_b.claim(JOB, limit=1)
+
+    worker_a.release(JOB)
+    assert worker_a.summary(JOB) == {PENDING: 1, CLAIMED: 1}
+    assert worker_b.claim(JOB, limit=2) == {"r1": ["pom.xml"]}
+
+
+def test_items_returns_items_whose_parts_all_have_status(state_path, clock):
+    state = CrawlState(state_path)
+    state.add(JOB, ["r1", "r2", "r3"], ["pom.xml", "package.json"])
+    state.claim(JOB, limit=3)
+    state.record(JOB, [
+        ("r3", "pom.xml", DONE, None), ("r3", "package.json", DONE, None),
+        ("r1", "pom.xml", DONE, None), ("r1", "package.json", DONE, None),
+        ("r2", "pom.xml", DONE, None), ("r2", "package.json", FAILED, "HTTP 502"),
+    ])
+
+    assert state.items(JOB, DONE) == ["r1", "r3"]
+    assert state.items(JOB, FAILED) == []
@@ -0,0 +1,146 @@
+import importlib
+
+import pytest
+from conftest import StubResponse
+
+from crawler.client import GitHubClient
+from crawler.crawl_state import FAILED, MISSING, CrawlState
+from crawler.retry import CircuitBreaker, RetryPolicy
+
+
+@pytest.fixture
+def deps(github_stub, tmp_path, monkeypatch):
+    """
+    dependencies_file.py をスタブサーバー宛てのクライアントと一時ディレクトリの出力先で読み込む
+    """
+    monkeypatch.setenv("GITHUB_TOKEN2", "token-a")
+    module = importlib.import_module("dependencies.dependencies_file")
+    client = GitHubClient(
+        ["token-a"], api_url=github_stub.url, retry_policy=RetryPolicy(base_delay=0),
+        circuit_breaker=CircuitBreaker(min_calls=1000),
+    )
+    monkeypatch.setattr(module, "client", client)
+    monkeypatch.setattr(module, "output_dir", str(tmp_path / "dependencies_files"))
+    return module
+
+
+def graphql_response(data, errors=None):
+    body = {"data": data}
+    if errors:
+        body["errors"] = errors
+    return StubResponse(200, body)
+
+
+def test_null_repository_is_missing_only_for_not_found(deps, github_stub):
+    github_stub.handler = lambda request: graphql_response(
+        {"r0": None, "r1": None, "r2": {"f0": {"text": "<project/>", "isBinary": False, "isTruncated": False}}},
+        [
+            {"type": "NOT_FOUND", "path": ["r0"], "message": "Could not resolve to a Repository"},
+            {"type": "FORBIDDEN", "path": ["r1"], "message": "Resource not accessible"},
+        ],
+    )
+    repos = [("gone", "repo", ["pom.xml"]), ("private", "repo", ["pom.xml"]), ("apache", "zookeeper", ["pom.xml"])]
+
+    results = deps.fetch_batch_graphql(repos)
+
+    assert results[("gone", "repo")]["pom.xml"] == (MISSING, None, None)
+    assert results[("private", "repo")]["pom.xml"][0] == FAILED
+    assert "FORBIDDEN" in results[("private", "repo")]["pom.xml"][2]
+    assert results[("apache", "zookeeper")]["pom.xml"][:2] == ("done", "<project/>")
+
+
+def test_null_repository_without_errors_is_failed(deps, github_stub):
+    github_stub.handler = lambda request: graphql_response({"r0": None})
+
+    results = deps.fetch_batch_graphql([("apache", "zookeeper", ["pom.xml", "package.json"])])
+
+    assert {status for status, _, _ in results[("apache", "zookeeper")].values()} == {FAILED}
+
+
+def test_file_level_error_is_failed_and_missing_file_is_missing(deps, github_stub):
+    github_stub.handler = lambda request: graphql_response(
+        {"r0": {"f0": None, "f2": None}},
+        [{"type": "SERVICE_UNAVAILABLE", "path": ["r0", "f0"], "message": "timeout"}],
+    )
+
+    results = deps.fetch_batch_graphql([("apache", "zookeeper", ["pom.xml", "package.json"])])
+
+    assert results[("apache", "zookeeper")]["pom.xml"][0] == FAILED
+    assert results[("apache", "zookeeper")]["package.json"] == (MISSING, None, None)
+
+
+def test_failed_repository_is_retried_in_next_run(deps, github_stub, tmp_path):
+    github_stub.handler = lambda request: graphql_response(
+        {"r0": None, "r1": None},
+        [
+            {"type": "NOT_FOUND", "path": ["r0"], "message": "Could not resolve to a Repository"},
+            {"type": "RATE_LIMITED", "path": ["r1"], "message": "sub-query rate limited"},
+        ],
+    )
+    state_path = str(tmp_path / "state.sqlite3")
+    state = CrawlState(state_path)
+    state.add(deps.STATE_JOB, ["gone/repo", "busy/repo"], ["pom.xml"])
+
+    deps.run_graphql(state)
+
+    assert state.summary(deps.STATE_JOB) == {MISSING: 1, FAILED: 1}
+    next_run = CrawlState(state_path)
+    assert next_run.claim(deps.STATE_JOB, limit=10) == {"busy/repo": ["pom.xml"]}
+
+
+def batch_size_of(request):
+    return request.json()["query"].count("repository(")
+
+
+def batch_stub(max_batch):
+    """
+    max_batch より多いリポジトリを含むクエリは 502 にし、それ以外は全リポジトリの pom.xml を返す
+    """
+    def handler(request):
+        size = batch_size_of(request)
+        if size > max_batch:
+            return StubResponse(502, {"message": "Bad Gateway"})
+        return graphql_response({
+            f"r{i}": {"f0": {"text": "<project/>", "isBinary": False, "isTruncated": False}} for i in range(size)
+        })
+    return handler
+
+
+def test_batch_shrinks_once_per_failure(deps, github_stub, tmp_path):
+    github_stub.handler = batch_stub(max_batch=4)
+    state = CrawlState(str(tmp_path / "state.sqlite3"))
+    repos = [f"owner{i}/repo{i}" for i in range(25)]
+    state.add(deps.STATE_JOB, repos, ["pom.xml"])
+
+    deps.run_graphql(state)
+
+    sizes = [batch_size_of(request) for request in github_stub.requests]
+    # 失敗するたびに1回で半分になる（同じサイズで再試行しない）
+    assert sizes[:5] == [25, 12, 6, 3, 4]
+    assert all(size <= 4 or next_size < size for size, next_size in zip(sizes, sizes[1:]))
+    assert state.summary(deps.STATE_JOB) == {"done": 25}
+    assert all((tmp_path / "dependencies_files" / repo.replace("/", "_") / "pom.xml").exists() for repo in repos)
+
+
+def test_single_repository_failure_falls_back_to_rest(deps, github_stub, tmp_path, monkeypatch):
+    def handler(request):
+        if request.method == "POST":
+            return StubResponse(502, {"message": "Bad Gateway"})
+        if request.path == "/repos/apache/zookeeper/contents/pom.xml":
+            return StubResponse(200, {"content": "PHByb2plY3QvPg=="})  # <project/>
+        return StubResponse(404, {"message": "Not Found"})
+
+    github_stub.handler = handler
+    state = CrawlState(str(tmp_path / "state.sqlite3"))
+    state.add(deps.STATE_JOB, ["apache/zookeeper"], ["pom.xml", "package.json"])
+    monkeypatch.setattr(deps, "INITIAL_BATCH_SIZE", 4)
+
+    deps.run_graphql(state)
+
+    # バッチサイズ 4 -> 2 -> 1 で1回ずつ失敗してから REST で取得する
+    posts = [batch_size_of(request) for request in github_stub.requests if request.method == "POST"]
+    assert posts == [1, 1, 1]
+    gets = [request.path for request in github_stub.requests if request.method == "GET"]
+    assert gets == ["/repos/apache/zookeeper/contents/pom.xml", "/repos/apache/zookeeper/contents/package.json"]
+    assert state.summary(deps.STATE_JOB) == {"done": 1, MISSING: 1}
+    assert (tmp_path / "dependencies_files" / "apache_zookeeper" / "pom.xml").read_text() == "<project/>"
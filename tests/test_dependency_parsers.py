@@ -0,0 +1,30 @@
+from dependency_parsers import extract_dependencies_from_pom
+
+POM = """<?xml version="1.0"?>
+<project xmlns="http://maven.apache.org/POM/4.0.0">
+  <parent><groupId>org.parent</groupId><artifactId>parent</artifactId><version>1</version></parent>
+  <artifactId>child</artifactId>
+  <dependencies>
+    <dependency><groupId>${lib.group}</groupId><artifactId>core</artifactId>
+      <exclusions><exclusion><groupId>ex</groupId><artifactId>ex</artifactId></exclusion></exclusions>
+    </dependency>
+    <dependency><groupId>${project.groupId}</groupId><artifactId>sibling</artifactId></dependency>
+  </dependencies>
+  <build><plugins><plugin><artifactId>plugin</artifactId>
+    <dependencies><dependency><groupId>org.plugin</groupId><artifactId>extra</artifactId></dependency></dependencies>
+    <configuration><groupId>not-a-dependency</groupId></configuration>
+  </plugin></plugins></build>
+  <properties><lib.group>org.${base}</lib.group><base>lib</base></properties>
+  <profiles><profile><properties><lib.group>wrong</lib.group></properties></profile></profiles>
+</project>
+"""
+
+
+def test_pom_dependencies_after_clearing_finished_subtrees(tmp_path):
+    path = tmp_path / "pom.xml"
+    path.write_text(POM, encoding="utf-8")
+    assert extract_dependencies_from_pom(str(path)) == [
+        "org.lib:core",
+        "org.parent:sibling",
+        "org.plugin:extra",
+    ]
@@ -0,0 +1,221 @@
+import ast
+import glob
+import os
+import random
+
+import numpy as np
+import pandas as pd
+from conftest import contribution_row, run_script
+
+from corpus.developer_data import extract_user_logins, parse_timestamps
+
+# 以前の countcontributions.py が日付の検証に使っていた正規表現
+OLD_DATE_PATTERN = r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}Z$'
+
+
+def old_extract_user_login(user_info):
+    """
+    以前の countcontributions.py の行ごとの ast.literal_eval による抽出
+    """
+    try:
+        return ast.literal_eval(user_info).get('login', None)
+    except (ValueError, SyntaxError):
+        return None
+
+
+def make_users(seed=0, rows=500):
+    """
+    合成データの user 列に、正規表現で取れない・取り違えやすい形式を加える
+    """
+    rng = random.Random(seed)
+    start = pd.Timestamp("2020-01-01")
+    users = [contribution_row(rng, f"dev{i % 7}", i, start, 30)["user"] for i in range(rows)]
+    users += [
+        repr({"login": "", "id": 1}),
+        repr({"login": None, "id": 2}),
+        repr({"id": 3}),
+        repr({"login": "o'brien", "id": 4}),
+        repr({"login": 'quote"d', "id": 5}),
+        "{ 'login' : 'spaced', 'id': 6}",
+        "{'login': 'unterminated",
+        "",
+    ]
+    return pd.Series(users + [np.nan], dtype="str")
+
+
+def make_timestamps(seed=0, rows=500):
+    """
+    GitHub API の形式の日時に、別の ISO8601 の形式・不正な値・欠損値を混ぜる
+    """
+    rng = random.Random(seed)
+    start = pd.Timestamp("2020-01-01")
+    values = [contribution_row(rng, "dev", i, start, 3650)["created_at"] for i in range(rows)]
+    values += [
+        "2020-02-29T12:00:00Z",
+        "2021-02-29T12:00:00Z",
+        "2020-01-02T03:04:05.678Z",
+        "2020-01-02T03:04:05+09:00",
+        "2020-01-02",
+        "2020-13-01T00:00:00Z",
+        "invalid",
+        "",
+    ]
+    return pd.Series(values + [np.nan], dtype="str")
+
+
+def test_extract_user_logins_matches_literal_eval():
+    users = make_users()
+    expected = users.map(old_extract_user_login, na_action="ignore")
+    actual = extract_user_logins(users)
+    assert actual.isna().tolist() == expected.isna().tolist()
+    assert actual[actual.notna()].tolist() == expected[expected.notna()].tolist()
+
+
+def test_parse_timestamps_matches_iso8601_parsing():
+    values = make_timestamps()
+    expected = pd.to_datetime(values, errors="coerce", utc=True, format="ISO8601")
+    pd.testing.assert_series_equal(parse_timestamps(values), expected, check_dtype=False)
+
+
+def test_parse_timestamps_matches_old_regex_filter():
+    values = make_timestamps()
+    valid = values.astype(str).str.match(OLD_DATE_PATTERN, na=False)
+    expected = pd.to_datetime(values[valid], utc=True, errors="coerce")
+    actual = parse_timestamps(values)
+    pd.testing.assert_series_equal(actual[valid], expected, check_dtype=False)
+    # GitHub API の形式に合う行はすべて変換できる（2/29 などの存在しない日付を除く）
+    assert actual[valid].notna().sum() == expected.notna().sum()
+
+
+def baseline_countcontributions(data_dir):
+    """
+    変更前（baseline）の countcontributions.py の読み込み・日付の検証・集計をそのまま写したもの。
+    Parquet データセットを使わず、CSV を1つずつ読む
+    """
+    # 全ての *_pulls.csv と *_issues.csv ファイルを検索
+    pull_files = glob.glob(os.path.join(data_dir, "*_pulls.csv"))
+    issue_files = glob.glob(os.path.join(data_dir, "*_issues.csv"))
+
+    # 開発者ごとの統合データフレームを用意
+    all_contributions = []
+
+    def extract_user_login(user_info):
+        """ 'user' カラムからGitHubユーザー名を抽出する関数 """
+        try:
+            return ast.literal_eval(user_info).get('login', None)
+        except (ValueError, SyntaxError):
+            return None
+
+    def extract_repo_name(repo_url):
+        """ `repository_url` からリポジトリ名を抽出する関数 """
+        try:
+            return repo_url.rstrip('/').split('/')[-1]  # 最後の部分（リポジトリ名）を取得
+        except AttributeError:
+            return None
+
+    # PRデータの処理
+    for pull_file in pull_files:
+        pulls_data = pd.read_csv(pull_file)
+
+        # `repository_url` からリポジトリ名を取得し、新しい `repository` カラムを追加
+        pulls_data['repository'] = pulls_data['repository_url'].apply(extract_repo_name)
+
+        # `created_at` に日付形式以外のデータが含まれていないかチェックし、日付のみをフィルタ
+        valid_dates_mask = pulls_data['created_at'].astype(str).str.match(r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}Z$', na=False)
+        pulls_data = pulls_data[valid_dates_mask]
+        pulls_data['created_at'] = pd.to_datetime(pulls_data['created_at'])
+
+        # 開発者名を抽出
+        pulls_data['user_login'] = pulls_data['user'].apply(extract_user_login)
+
+        # PR数を集計（リポジトリごとに開発者別）
+        pr_counts = pulls_data.groupby(['repository', 'user_login']).size().reset_index(name='pr_count')
+
+        all_contributions.append(pr_counts)
+
+    # Issueデータの処理
+    for issue_file in issue_files:
+        issues_data = pd.read_csv(issue_file)
+
+        # `repository_url` からリポジトリ名を取得し、新しい `repository` カラムを追加
+        issues_data['repository'] = issues_data['repository_url'].apply(extract_repo_name)
+
+        # `created_at` のチェック
+        valid_dates_mask = issues_data['created_at'].astype(str).str.match(r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}Z$', na=False)
+        issues_data = issues_data[valid_dates_mask]
+        issues_data['created_at'] = pd.to_datetime(issues_data['created_at'])
+
+        # 開発者名を抽出
+        issues_data['user_login'] = issues_data['user'].apply(extract_user_login)
+
+        # Issue数を集計（リポジトリごとに開発者別）
+        issue_counts = issues_data.groupby(['repository', 'user_login']).size().reset_index(name='issue_count')
+
+        all_contributions.append(issue_counts)
+
+    # すべてのデータを統合
+    final_contributions = pd.concat(all_contributions, ignore_index=True)
+
+    # PR数とIssue数を統合
+    final_contributions = final_contributions.groupby(['repository', 'user_login']).sum().reset_index()
+    return final_contributions
+
+
+def run_countcontributions(results_dir):
+    run_script("process/countcontributions.py", str(results_dir.parent / "process"))
+    return pd.read_csv(results_dir / "contributions_by_repository.csv")
+
+
+def test_countcontributions_matches_baseline(results_dir):
+    run_script("process/countcontributions.py", str(results_dir.parent / "process"))
+    output_file = results_dir / "contributions_by_repository.csv"
+    expected_file = results_dir / "expected.csv"
+    baseline_countcontributions(str(results_dir / "developer_data")).to_csv(expected_file, index=False)
+    with open(output_file, "rb") as actual, open(expected_file, "rb") as expected:
+        assert actual.read() == expected.read()
+    assert os.path.getsize(output_file) > 0
+
+
+def test_parse_timestamps_accepts_iso8601_rejected_by_old_regex():
+    values = pd.Series([
+        "2020-01-02T03:04:05Z",
+        "2020-01-02T03:04:05.678Z",
+        "2020-01-02T03:04:05+09:00",
+        "2020-01-02",
+        "2021-02-29T12:00:00Z",
+        "invalid",
+    ], dtype="str")
+    assert values.str.match(OLD_DATE_PATTERN).tolist() == [True, False, False, False, True, False]
+
+    parsed = parse_timestamps(values)
+
+    # 取り込み時の変換は、baseline の他のスクリプト（pd.to_datetime(errors='coerce')）と同じく
+    # GitHub API の形式以外の ISO8601 も受け付ける。存在しない日付は NaT にする
+    # （baseline の countcontributions.py は正規表現に合う 2021-02-29 で例外になっていた）
+    assert parsed.tolist()[:4] == [
+        pd.Timestamp("2020-01-02T03:04:05Z"),
+        pd.Timestamp("2020-01-02T03:04:05.678Z"),
+        pd.Timestamp("2020-01-01T18:04:05Z"),
+        pd.Timestamp("2020-01-02T00:00:00Z"),
+    ]
+    assert parsed[4:].isna().all()
+
+
+def test_countcontributions_counts_other_iso8601_dates(tmp_path):
+    # GitHub API の形式以外の日時の行は、baseline では除外され、新しい集計では数える（意図した変更）
+    results_dir = tmp_path / "results"
+    data_dir = results_dir / "developer_data"
+    data_dir.mkdir(parents=True)
+    created_at = ["2020-01-02T03:04:05Z", "2020-01-02T03:04:05.678Z", "2020-01-02", "invalid"]
+    pd.DataFrame({
+        "repository_url": ["https://api.github.com/repos/apache/zookeeper"] * len(created_at),
+        "created_at": created_at,
+        "user": [repr({"login": "dev0"})] * len(created_at),
+    }).to_csv(data_dir / "dev0_pulls.csv", index=False)
+    pd.DataFrame(columns=["repository_url", "created_at", "user"]).to_csv(data_dir / "dev0_issues.csv", index=False)
+
+    baseline = baseline_countcontributions(str(data_dir))
+    actual = run_countcontributions(results_dir)
+
+    assert baseline[["repository", "user_login", "pr_count"]].values.tolist() == [["zookeeper", "dev0", 1]]
+    assert actual[["repository", "user_login", "pr_count"]].values.tolist() == [["zookeeper", "dev0", 3]]
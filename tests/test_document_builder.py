@@ -0,0 +1,32 @@
+import os
+
+from dependency_document import MANIFEST_FILES
+from document_builder import DOCUMENTS_FILE, MANIFEST_DOCUMENTS_FILE, index_path_for, read_all_documents, refresh_documents
+
+
+def write_repositories(base_dir):
+    go_repo = base_dir / "owner_go"
+    go_repo.mkdir()
+    (go_repo / "go.mod").write_text("module example.com/m\n\nrequire github.com/pkg/errors v0.9.1\n", encoding="utf-8")
+    py_repo = base_dir / "owner_py"
+    py_repo.mkdir()
+    (py_repo / "requirements.txt").write_text("numpy==1.21.0\n", encoding="utf-8")
+
+
+def test_document_builders_keep_separate_outputs_and_indexes(tmp_path):
+    write_repositories(tmp_path)
+    all_path = str(tmp_path / DOCUMENTS_FILE)
+    manifest_path = str(tmp_path / MANIFEST_DOCUMENTS_FILE)
+    assert index_path_for(all_path) != index_path_for(manifest_path)
+
+    # document.py と dependency_document.py を交互に実行する
+    assert refresh_documents(str(tmp_path), all_path, workers=1) == (2, 2, 0)
+    assert refresh_documents(str(tmp_path), manifest_path, filenames=MANIFEST_FILES, workers=1) == (2, 2, 0)
+
+    # 相手の実行で自分の出力や索引が変わらないので、2回目はどちらも全てスキップする
+    assert refresh_documents(str(tmp_path), all_path, workers=1) == (2, 0, 2)
+    assert refresh_documents(str(tmp_path), manifest_path, filenames=MANIFEST_FILES, workers=1) == (2, 0, 2)
+
+    assert read_all_documents(all_path) == {"owner_go": "github.com/pkg/errors", "owner_py": "numpy"}
+    assert read_all_documents(manifest_path) == {"owner_go": "", "owner_py": "numpy"}
+    assert all(os.path.exists(index_path_for(path)) for path in [all_path, manifest_path])
@@ -0,0 +1,71 @@
+import importlib
+import time
+
+import pandas as pd
+import pytest
+from conftest import StubResponse
+
+from crawler.client import GitHubClient
+from crawler.crawl_state import DONE, FAILED, CrawlState
+from crawler.retry import CircuitBreaker, RetryPolicy
+
+
+@pytest.fixture
+def fetch(github_stub, tmp_path, monkeypatch):
+    """
+    fetch_github_data.py をスタブサーバー宛てのクライアントと一時ディレクトリの出力先で読み込む
+    """
+    monkeypatch.chdir(tmp_path)  # 読み込み時に作る HTTP キャッシュを一時ディレクトリに置く
+    module = importlib.import_module("fetch_github_data")
+    client = GitHubClient(
+        ["token-a"], api_url=github_stub.url, timeout=0.2, retry_policy=RetryPolicy(max_attempts=2, base_delay=0),
+        circuit_breaker=CircuitBreaker(min_calls=1000),
+    )
+    monkeypatch.setattr(module, "client", client)
+    monkeypatch.setattr(module, "OUTPUT_DIR", str(tmp_path / "developer_data"))
+    (tmp_path / "developer_data").mkdir()
+    return module
+
+
+def search_handler(request):
+    query = request.params["q"]
+    if query.startswith("author:slow "):
+        time.sleep(0.5)  # クライアントのタイムアウトより長い
+    if query.startswith("author:broken type:pr "):
+        return StubResponse(422, {"message": "Validation Failed"})
+    author = query.split()[0].removeprefix("author:")
+    return StubResponse(200, {"total_count": 1, "incomplete_results": False, "items": [{
+        "html_url": f"https://github.com/o/r/issues/{len(query)}",
+        "repository_url": "https://api.github.com/repos/o/r",
+        "number": 1,
+        "created_at": "2024-01-02T03:04:05Z",
+        "user": {"login": author},
+    }]})
+
+
+def test_network_failure_is_recorded_and_run_continues(fetch, github_stub, tmp_path):
+    github_stub.handler = search_handler
+    state_path = str(tmp_path / "state.sqlite3")
+    state = CrawlState(state_path)
+
+    fetch.run(state, ["slow", "broken", "ok"])
+
+    statuses = dict(
+        ((item, part), status) for item, part, status in state.conn.execute(
+            "SELECT item, part, status FROM tasks WHERE job = ?", (fetch.STATE_JOB,)
+        )
+    )
+    assert statuses == {
+        ("slow", "issues"): FAILED, ("slow", "pulls"): FAILED,
+        ("broken", "issues"): DONE, ("broken", "pulls"): FAILED,
+        ("ok", "issues"): DONE, ("ok", "pulls"): DONE,
+    }
+    written = sorted(path.name for path in (tmp_path / "developer_data").iterdir())
+    assert written == ["broken_issues.csv", "ok_issues.csv", "ok_pulls.csv"]
+    assert pd.read_csv(tmp_path / "developer_data" / "ok_pulls.csv")["number"].tolist() == [1]
+
+    # 同じ日の再実行では失敗した分だけを取り直す
+    github_stub.requests.clear()
+    fetch.run(CrawlState(state_path), ["slow", "broken", "ok"])
+    retried = sorted({request.params["q"].split(" created:")[0] for request in github_stub.requests})
+    assert retried == ["author:broken type:pr", "author:slow type:issue", "author:slow type:pr"]
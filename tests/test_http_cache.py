@@ -0,0 +1,60 @@
+import pytest
+from conftest import FakeClock
+
+import crawler.http_cache as http_cache
+from crawler.http_cache import HttpCache, is_immutable, token_scope
+
+SHA = "0123456789abcdef0123456789abcdef01234567"
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(http_cache, "time", clock)
+    return clock
+
+
+def test_is_immutable():
+    assert is_immutable(f"/repos/apache/zookeeper/commits/{SHA}")
+    assert is_immutable("/repos/apache/zookeeper/contents/pom.xml", {"ref": SHA})
+    assert not is_immutable("/repos/apache/zookeeper/commits/master")
+    assert not is_immutable("/repos/apache/zookeeper/contents/pom.xml")
+    assert not is_immutable("/repos/apache/zookeeper/contents/pom.xml", {"ref": "master"})
+
+
+def test_token_scope_does_not_store_token():
+    assert token_scope(None) == "anonymous"
+    assert token_scope("token-a") != token_scope("token-b")
+    assert "token-a" not in token_scope("token-a")
+
+
+def test_put_and_get(tmp_path, clock):
+    cache = HttpCache(str(tmp_path / "cache.sqlite3"))
+    key = cache.make_key("scope", "https://api.github.com/repos/a/b", {"per_page": 100, "page": 2})
+    assert key == "scope https://api.github.com/repos/a/b?page=2&per_page=100"
+
+    cache.put(key, {"name": "b"}, etag='"abc"')
+    assert cache.get(key) == ({"name": "b"}, '"abc"', False)
+    # ETag のない可変リソースは再検証できないので保存しない
+    cache.put("no-etag", {"name": "c"})
+    assert cache.get("no-etag") is None
+
+
+def test_lru_evicts_least_recently_accessed(tmp_path, clock):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = HttpCache(path)
+    payload = {"text": "x" * 1000}
+    for key in ["a", "b", "c"]:
+        cache.put(key, payload, immutable=True)
+        clock.advance(1)
+    entry_size = cache.total_bytes // 3
+    cache.max_bytes = entry_size * 3
+    clock.advance(1)
+    cache.get("a")  # a を最近使ったことにする
+    clock.advance(1)
+    cache.put("d", payload, immutable=True)
+
+    # 上限の 90% 以下になるまで、最終アクセスが古い b, c の順に消える
+    assert [key for key in "abcd" if cache.get(key) is not None] == ["a", "d"]
+    cache.close()
+    assert HttpCache(path).total_bytes == entry_size * 2
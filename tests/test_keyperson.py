@@ -0,0 +1,72 @@
+from collections import defaultdict
+from datetime import timedelta
+
+import pandas as pd
+
+from conftest import run_script
+from test_with_move import load_all_developer_data
+
+
+def old_key_person_movements(data_dir, time_window, top_k=3):
+    """
+    以前の keyperson.py の iterrows による実装
+    """
+    df_all = load_all_developer_data(data_dir)
+    df_all['repository'] = df_all['repository_url'].str.extract(r'repos/([^/]+/[^/]+)')
+    df_all['created_at'] = pd.to_datetime(df_all['created_at'], errors='coerce')
+    df_all = df_all.dropna(subset=['created_at'])
+    df_all = df_all[['developer', 'repository', 'created_at']].sort_values(by=['developer', 'created_at'])
+
+    repository_movements = defaultdict(list)
+    for developer, group in df_all.groupby('developer'):
+        for _, row in group.iterrows():
+            current_repo = row['repository']
+            current_time = row['created_at']
+            similar_contributions = group[
+                (group['created_at'] >= current_time - time_window) &
+                (group['created_at'] <= current_time + time_window) &
+                (group['repository'] != current_repo)
+            ]
+            for _, sim_row in similar_contributions.iterrows():
+                repository_movements[(developer, current_repo)].append(sim_row['repository'])
+
+    movement_counts = defaultdict(int)
+    for (developer, _), to_repos in repository_movements.items():
+        movement_counts[developer] += len(set(to_repos))
+    key_persons = sorted(movement_counts.items(), key=lambda x: x[1], reverse=True)[:top_k]
+    key_persons = [person[0] for person in key_persons]
+
+    key_person_movements = []
+    for key_person in key_persons:
+        key_person_data = df_all[df_all['developer'] == key_person]
+        for _, row in key_person_data.iterrows():
+            current_repo = row['repository']
+            current_time = row['created_at']
+            next_contributions = df_all[
+                (df_all['created_at'] >= current_time - time_window) &
+                (df_all['created_at'] <= current_time + time_window) &
+                (df_all['repository'] != current_repo) &
+                (df_all['developer'] != key_person)
+            ]
+            for _, sim_row in next_contributions.iterrows():
+                key_person_movements.append({
+                    "key_person": key_person,
+                    "from_repository": current_repo,
+                    "to_repository": sim_row['repository'],
+                    "follower": sim_row['developer'],
+                    "time": sim_row['created_at'],
+                })
+    return key_persons, pd.DataFrame(key_person_movements)
+
+
+def test_keyperson_matches_old_loop(results_dir):
+    run_script("movement/keyperson.py", results_dir.parent / "movement")
+
+    new = pd.read_csv(results_dir / "key_person_movements.csv")
+    key_persons, old = old_key_person_movements(str(results_dir / "developer_data"), timedelta(days=30))
+    old_path = results_dir / "old_key_person_movements.csv"
+    old.to_csv(old_path, index=False)
+    old = pd.read_csv(old_path)
+
+    assert new['key_person'].unique().tolist() == key_persons
+    pd.testing.assert_frame_equal(new, old)
@@ -0,0 +1,39 @@
+import random
+
+import numpy as np
+import pytest
+
+pytest.importorskip("gensim")
+from gensim.models.doc2vec import TaggedDocument  # noqa: E402
+
+from model_registry import INFERRED_FILE, load_or_train  # noqa: E402
+
+PARAMS = {"vector_size": 8, "epochs": 5, "workers": 1}
+
+
+def make_documents(n=30, seed=0):
+    rng = random.Random(seed)
+    packages = [f"pkg{i}" for i in range(40)]
+    return [TaggedDocument(words=rng.sample(packages, 6), tags=[f"repo{i}"]) for i in range(n)]
+
+
+def test_inferred_vectors_are_reused_until_retraining(tmp_path):
+    model_dir = str(tmp_path / "model")
+    documents = make_documents()
+    trained = load_or_train(documents, model_dir, PARAMS, retrain_ratio=0.2)
+
+    # 1件だけ変更すると推論し、そのベクトルを保存する
+    documents[3] = TaggedDocument(words=documents[3].words + ["pkg-new"], tags=documents[3].tags)
+    first = load_or_train(documents, model_dir, PARAMS, retrain_ratio=0.2)
+    assert (tmp_path / "model" / INFERRED_FILE).exists()
+    np.testing.assert_array_equal(np.delete(first, 3, axis=0), np.delete(trained, 3, axis=0))
+
+    # 同じ入力で再実行しても推論し直さず、同じベクトルを返す
+    second = load_or_train(documents, model_dir, PARAMS, retrain_ratio=0.2)
+    np.testing.assert_array_equal(first, second)
+
+    # 変更が retrain_ratio を超えるまで積み重なると学習し直し、推論したベクトルは消す
+    for i in range(10, 20):
+        documents[i] = TaggedDocument(words=documents[i].words + ["pkg-new"], tags=documents[i].tags)
+    load_or_train(documents, model_dir, PARAMS, retrain_ratio=0.2)
+    assert not (tmp_path / "model" / INFERRED_FILE).exists()
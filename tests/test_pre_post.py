@@ -0,0 +1,116 @@
+import random
+
+import pandas as pd
+
+from corpus.pre_post import pre_post_summaries, split_summary
+
+PIVOT = "apache/zookeeper"
+
+
+def make_contributions(seed=0, developers=30, rows=40):
+    """
+    repository_data_with_repo.csv と同じ列（developer, repo, created_at）の合成データ。
+    基準リポジトリに貢献しない開発者と、同じ時刻の貢献も含める
+    """
+    rng = random.Random(seed)
+    repos = [PIVOT] + [f"owner{i}/repo{i}" for i in range(8)]
+    records = []
+    for d in range(developers):
+        # 3人に1人は基準リポジトリに貢献しない
+        choices = repos if d % 3 else repos[1:]
+        for _ in range(rng.randrange(1, rows)):
+            created_at = pd.Timestamp("2020-01-01", tz="UTC") + pd.Timedelta(hours=rng.randrange(2000))
+            records.append({"developer": f"dev{d}", "repo": rng.choice(choices), "created_at": created_at})
+    return pd.DataFrame(records)
+
+
+def old_track_movements(data, pivot):
+    """
+    以前の movement.py / developer_movement.py の開発者ごとの iterrows による分類
+    """
+    data = data.sort_values(by=['developer', 'created_at'])
+
+    def track_movements(group):
+        visited_before = set()
+        visited_after = set()
+        visited_before_rows = []
+        visited_after_rows = []
+        seen_pivot = False
+        for _, row in group.iterrows():
+            current_repo = row['repo']
+            if current_repo == pivot:
+                seen_pivot = True
+            elif seen_pivot:
+                visited_after.add(current_repo)
+                visited_after_rows.append(current_repo)
+            else:
+                visited_before.add(current_repo)
+                visited_before_rows.append(current_repo)
+        return pd.Series({
+            'before': list(visited_before), 'after': list(visited_after),
+            'before_rows': visited_before_rows, 'after_rows': visited_after_rows,
+        })
+
+    return data.groupby('developer').apply(track_movements).reset_index()
+
+
+def old_summaries(data, pivot):
+    """
+    以前の3種類の集計（人数・開発者ごとの貢献数・開発者一覧）を、列名を新しい集計に揃えて返す
+    """
+    movements = old_track_movements(data, pivot)
+    summaries = {}
+    for phase in ['before', 'after']:
+        unique_pairs = movements.explode(phase)[['developer', phase]].dropna()
+        counts = unique_pairs[phase].value_counts().reset_index()
+        counts.columns = ['repo', 'count']
+        rows = movements.explode(f'{phase}_rows')[['developer', f'{phase}_rows']].dropna()
+        rows.columns = ['developer', 'repo']
+        detailed = rows.groupby(['repo', 'developer']).size().reset_index(name='count')
+        with_developers = unique_pairs.groupby(phase).agg(
+            count=('developer', 'nunique'),
+            developers=('developer', lambda x: sorted(x.unique())),
+        ).reset_index().rename(columns={phase: 'repo'})
+        summaries[phase] = {"count": counts, "detailed": detailed, "with_developers": with_developers}
+    return summaries
+
+
+def test_pre_post_matches_old_loop_for_pivot_contributors():
+    data = make_contributions()
+    summaries = pre_post_summaries(data, [PIVOT])
+
+    # 基準リポジトリに貢献していない開発者は新しい集計に含めない（以前は全て before に数えていた）
+    contributors = data.loc[data['repo'] == PIVOT, 'developer'].unique()
+    assert len(contributors) < data['developer'].nunique()
+    old = old_summaries(data[data['developer'].isin(contributors)], PIVOT)
+
+    for phase in ['before', 'after']:
+        new_count = split_summary(summaries["count"], PIVOT, phase)
+        assert len(new_count) > 0
+        # 人数が同じリポジトリの順序は以前は不定だったため、人数の多い順・リポジトリ名順で比べる
+        pd.testing.assert_frame_equal(
+            new_count,
+            old[phase]["count"].sort_values(['count', 'repo'], ascending=[False, True]).reset_index(drop=True),
+            check_dtype=False,
+        )
+        pd.testing.assert_frame_equal(
+            split_summary(summaries["detailed"], PIVOT, phase),
+            old[phase]["detailed"], check_dtype=False,
+        )
+        pd.testing.assert_frame_equal(
+            split_summary(summaries["with_developers"], PIVOT, phase),
+            old[phase]["with_developers"], check_dtype=False,
+        )
+
+
+def test_multiple_pivots_match_single_pivot_runs():
+    data = make_contributions(seed=1)
+    pivots = [PIVOT, "owner0/repo0"]
+    combined = pre_post_summaries(data, pivots)
+    for pivot in pivots:
+        single = pre_post_summaries(data, [pivot])
+        for name in ["count", "detailed", "with_developers"]:
+            for phase in ['before', 'after']:
+                pd.testing.assert_frame_equal(
+                    split_summary(combined[name], pivot, phase), split_summary(single[name], pivot, phase)
+                )
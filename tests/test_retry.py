@@ -0,0 +1,118 @@
+import pytest
+from conftest import FakeClock
+
+import crawler.retry as retry
+from crawler.retry import (
+    CONNECTION_ERROR, PRIMARY_RATE_LIMIT, SECONDARY_RATE_LIMIT, SERVER_ERROR, CircuitBreaker, RetryMetrics,
+    RetryPolicy, RetryState, endpoint_of,
+)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(retry, "time", clock)
+    return clock
+
+
+@pytest.mark.parametrize("status, headers, body, expected", [
+    (200, {}, "", None),
+    (404, {}, "", None),
+    (403, {}, "Resource not accessible by integration", None),
+    (403, {"X-RateLimit-Remaining": "0"}, "API rate limit exceeded", PRIMARY_RATE_LIMIT),
+    (429, {"X-RateLimit-Remaining": "0"}, "", PRIMARY_RATE_LIMIT),
+    (403, {"Retry-After": "30"}, "", SECONDARY_RATE_LIMIT),
+    (403, {"X-RateLimit-Remaining": "10"}, "You have exceeded a secondary rate limit", SECONDARY_RATE_LIMIT),
+    (403, {}, "You have triggered an abuse detection mechanism", SECONDARY_RATE_LIMIT),
+    (500, {}, "", SERVER_ERROR),
+    (502, {}, "", SERVER_ERROR),
+    (501, {}, "", None),
+])
+def test_classify(status, headers, body, expected):
+    assert RetryPolicy().classify(status, headers, body) == expected
+
+
+def test_delay_prefers_retry_after_for_secondary_limit():
+    policy = RetryPolicy(base_delay=1, max_delay=8)
+    assert 30 <= policy.delay(SECONDARY_RATE_LIMIT, 1, {"Retry-After": "30"}) < 31
+    assert policy.delay(SECONDARY_RATE_LIMIT, 1) >= policy.secondary_min_delay
+    assert all(0 <= policy.delay(SERVER_ERROR, attempt) <= 8 for attempt in range(10))
+
+
+def test_endpoint_of_hides_names():
+    assert endpoint_of("/repos/apache/zookeeper/contents/pom.xml") == "/repos/:owner/:repo/contents/:path"
+    assert endpoint_of("/repos/apache/zookeeper/commits/" + "a" * 40) == "/repos/:owner/:repo/commits/:id"
+    assert endpoint_of("/search/commits") == "/search/commits"
+
+
+def test_retry_state_gives_up_after_max_attempts(clock):
+    metrics = RetryMetrics()
+    state = RetryState(RetryPolicy(max_attempts=3, base_delay=0), CircuitBreaker(), metrics, "/graphql")
+
+    assert state.schedule(SERVER_ERROR)
+    assert state.schedule(CONNECTION_ERROR)
+    assert not state.schedule(SERVER_ERROR)
+    assert state.gave_up
+    row = metrics.rows()[0]
+    assert (row["requests"], row[SERVER_ERROR], row[CONNECTION_ERROR], row["gave_up"]) == (1, 2, 1, 1)
+
+
+def test_retry_state_allows_primary_limits_per_token(clock):
+    state = RetryState(RetryPolicy(max_attempts=2), CircuitBreaker(), RetryMetrics(), "/search/commits", token_count=3)
+
+    assert all(state.schedule(PRIMARY_RATE_LIMIT) for _ in range(6))
+    assert state.delay == 0
+    assert not state.schedule(PRIMARY_RATE_LIMIT)
+
+
+def test_retry_state_retry_on_gives_up_on_other_reasons(clock):
+    metrics = RetryMetrics()
+    retry_on = (PRIMARY_RATE_LIMIT, SECONDARY_RATE_LIMIT)
+    state = RetryState(RetryPolicy(), CircuitBreaker(), metrics, "/graphql", retry_on=retry_on)
+
+    assert state.schedule(PRIMARY_RATE_LIMIT)
+    assert not state.schedule(SERVER_ERROR)
+    assert state.gave_up
+    assert metrics.gave_up["/graphql"] == 1
+
+
+def test_secondary_limit_pauses_whole_client(clock):
+    breaker = CircuitBreaker()
+    state = RetryState(RetryPolicy(), breaker, RetryMetrics(), "/search/commits")
+
+    assert state.schedule(SECONDARY_RATE_LIMIT, {"Retry-After": "120"})
+    assert 120 <= breaker.wait_time() < 121
+
+
+def test_circuit_breaker_opens_and_closes(clock):
+    breaker = CircuitBreaker(window=4, threshold=0.5, min_calls=4, cooldown=60)
+    for success in [True, False, True, False]:
+        breaker.record(success)
+    # ちょうど閾値ではまだ開かない
+    assert breaker.wait_time() == 0
+
+    breaker.record(False)
+    assert breaker.wait_time() == 60
+    clock.advance(30)
+    assert breaker.wait_time() == 30
+    clock.advance(30)
+    assert breaker.wait_time() == 0
+    # 開いたときに履歴を捨てるので、閉じた直後の1件で再び開かない
+    breaker.record(False)
+    assert breaker.wait_time() == 0
+
+
+def test_metrics_save_csv(tmp_path):
+    metrics = RetryMetrics()
+    state = RetryState(RetryPolicy(max_attempts=1), CircuitBreaker(), metrics, "/graphql")
+    state.schedule(SERVER_ERROR)
+    RetryMetrics().save_csv(str(tmp_path / "empty.csv"))  # リクエストがなければ書かない
+    path = tmp_path / "results" / "metrics.csv"
+
+    metrics.save_csv(str(path))
+
+    assert not (tmp_path / "empty.csv").exists()
+    assert path.read_text(encoding="utf-8").splitlines() == [
+        "endpoint,requests,primary_rate_limit,secondary_rate_limit,server_error,connection_error,gave_up",
+        "/graphql,1,0,0,1,0,1",
+    ]
@@ -0,0 +1,40 @@
+import random
+
+import numpy as np
+
+from set_similarity import SparseSimilarityIndex
+
+
+def make_index(n=150, seed=0):
+    """
+    10個のパッケージ群のどれかを中心に依存パッケージを持つリポジトリ（同じ群どうしは Jaccard 係数が高い）
+    """
+    rng = random.Random(seed)
+    token_lists = []
+    for i in range(n):
+        family = [f"family{i % 10}:pkg{j}" for j in range(12)]
+        tokens = rng.sample(family, 10) + [f"common:pkg{rng.randrange(30)}" for _ in range(2)]
+        token_lists.append(tokens)
+    return SparseSimilarityIndex([f"repo{i}" for i in range(n)], token_lists, "binary")
+
+
+def test_top_k_all_matches_most_similar():
+    similarity_index = make_index()
+    rows = list(similarity_index.top_k_all(5, block_size=32))
+    for tag in ["repo0", "repo77"]:
+        found = [(neighbor, score) for row_tag, neighbor, _, score in rows if row_tag == tag]
+        expected = similarity_index.most_similar(tag, 5)
+        np.testing.assert_allclose([s for _, s in found], [s for _, s in expected], rtol=1e-5)
+
+
+def test_approximate_top_k_all_uses_lsh_candidates():
+    similarity_index = make_index()
+    lsh = similarity_index.build_lsh()
+    exact = {(tag, neighbor): score for tag, neighbor, _, score in similarity_index.top_k_all(5)}
+    approximate = list(similarity_index.top_k_all(5, approximate=True))
+    assert approximate
+    for tag, neighbor, _, score in approximate:
+        assert similarity_index.index[neighbor] in lsh.candidates(similarity_index.index[tag])
+        assert np.isclose(score, similarity_index.similarity(tag, neighbor), rtol=1e-5)
+    found = {(tag, neighbor) for tag, neighbor, _, _ in approximate}
+    assert len(found & set(exact)) / len(exact) > 0.8
@@ -0,0 +1,36 @@
+import numpy as np
+
+from similarity_index import RepositorySimilarityIndex
+
+
+def make_index(n=200, dim=16, seed=0):
+    rng = np.random.default_rng(seed)
+    return RepositorySimilarityIndex([f"repo{i}" for i in range(n)], rng.normal(size=(n, dim)))
+
+
+def test_top_k_all_matches_most_similar():
+    similarity_index = make_index()
+    rows = list(similarity_index.top_k_all(5, block_size=64))
+    assert len(rows) == len(similarity_index) * 5
+    for tag in ["repo0", "repo123"]:
+        expected = similarity_index.most_similar(tag, 5)
+        found = [(neighbor, score) for row_tag, neighbor, _, score in rows if row_tag == tag]
+        assert [n for n, _ in found] == [n for n, _ in expected]
+        np.testing.assert_allclose([s for _, s in found], [s for _, s in expected], rtol=1e-5)
+
+
+def test_approximate_top_k_all_probing_every_list_is_exact():
+    similarity_index = make_index()
+    ivf = similarity_index.build_ivf(n_lists=8)
+    exact = list(similarity_index.top_k_all(5))
+    approximate = list(similarity_index.top_k_all(5, approximate=True, n_probe=len(ivf.lists)))
+    assert [row[:3] for row in approximate] == [row[:3] for row in exact]
+    np.testing.assert_allclose([row[3] for row in approximate], [row[3] for row in exact], rtol=1e-5)
+
+
+def test_approximate_top_k_all_recall():
+    similarity_index = make_index(n=500)
+    similarity_index.build_ivf()
+    exact = {(tag, neighbor) for tag, neighbor, _, _ in similarity_index.top_k_all(10)}
+    approximate = {(tag, neighbor) for tag, neighbor, _, _ in similarity_index.top_k_all(10, approximate=True)}
+    assert len(exact & approximate) / len(exact) > 0.8
@@ -0,0 +1,64 @@
+import csv
+
+import pytest
+
+from crawler.sink import StreamingCsvWriter
+
+COLUMNS = ["developer", "commit_sha", "changed_files"]
+
+
+def read_rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.reader(f))
+
+
+def test_complete_write_replaces_partial(tmp_path):
+    path = str(tmp_path / "out" / "dev.csv")
+    with StreamingCsvWriter(path, COLUMNS, flush_rows=2) as writer:
+        writer.write_rows([["dev", "a", "x.py"], ["dev", "b", "y.py"]])
+        assert read_rows(path + ".partial")[1:] == [["dev", "a", "x.py"], ["dev", "b", "y.py"]]
+        writer.write_rows([["dev", "c", ""]])
+
+    assert read_rows(path) == [COLUMNS, ["dev", "a", "x.py"], ["dev", "b", "y.py"], ["dev", "c", ""]]
+    assert not (tmp_path / "out" / "dev.csv.partial").exists()
+
+
+def test_empty_output_is_not_created_without_write_empty(tmp_path):
+    path = tmp_path / "dev.csv"
+    with StreamingCsvWriter(str(path), COLUMNS, write_empty=False) as writer:
+        assert writer.resume("commit_sha") == set()
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_resume_from_partial_drops_last_key(tmp_path):
+    path = str(tmp_path / "dev.csv")
+    with pytest.raises(RuntimeError):
+        with StreamingCsvWriter(path, COLUMNS, flush_rows=1) as writer:
+            writer.write_rows([["dev", "a", "x.py"], ["dev", "a", "y.py"]])
+            writer.write_rows([["dev", "b", "z.py"]])
+            raise RuntimeError("interrupted")
+    # 例外で終わった場合は .partial が残る
+    assert not (tmp_path / "dev.csv").exists()
+    with open(path + ".partial", "a", newline="", encoding="utf-8") as f:
+        f.write("dev,c,trunc")  # 書きかけの行
+
+    with StreamingCsvWriter(path, COLUMNS, flush_rows=1) as writer:
+        # 最後のキーの行は途中までしか書かれていない可能性があるため捨てる
+        assert writer.resume("commit_sha") == {"a", "b"}
+        assert writer.rows_written == 3
+        writer.write_rows([["dev", "c", "w.py"]])
+
+    assert read_rows(path) == [
+        COLUMNS, ["dev", "a", "x.py"], ["dev", "a", "y.py"], ["dev", "b", "z.py"], ["dev", "c", "w.py"],
+    ]
+
+
+def test_resume_ignores_partial_with_other_columns(tmp_path):
+    path = tmp_path / "dev.csv"
+    (tmp_path / "dev.csv.partial").write_text("old,columns\n1,2\n", encoding="utf-8")
+
+    with StreamingCsvWriter(str(path), COLUMNS) as writer:
+        assert writer.resume("commit_sha") == set()
+
+    assert read_rows(path) == [COLUMNS]
@@ -0,0 +1,70 @@
+import pytest
+from conftest import FakeClock
+
+import crawler.token_pool as token_pool
+from crawler.token_pool import TokenPool, load_tokens
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(token_pool, "time", clock)
+    return clock
+
+
+def rate_limit_headers(remaining, reset_at, limit=5000):
+    return {
+        "X-RateLimit-Remaining": str(remaining),
+        "X-RateLimit-Reset": str(int(reset_at)),
+        "X-RateLimit-Limit": str(limit),
+    }
+
+
+def test_acquire_prefers_token_with_most_remaining(clock):
+    pool = TokenPool(["token-a", "token-b"])
+    pool.update("token-a", "core", rate_limit_headers(10, clock.now + 600))
+    pool.update("token-b", "core", rate_limit_headers(100, clock.now + 600))
+
+    assert pool.acquire("core") == ("token-b", 0)
+    assert pool.summary()["...en-b"]["core"] == 99
+
+
+def test_acquire_waits_until_earliest_reset_when_all_exhausted(clock):
+    pool = TokenPool(["token-a", "token-b"])
+    pool.update("token-a", "search", rate_limit_headers(0, clock.now + 30, limit=30))
+    pool.update("token-b", "search", rate_limit_headers(1, clock.now + 50, limit=30))
+
+    token, wait_time = pool.acquire("search")
+    assert token is None
+    assert wait_time == pytest.approx(31)
+    # 他のレート制限区分には影響しない
+    assert pool.acquire("core")[1] == 0
+
+    clock.advance(31)
+    assert pool.acquire("search") == ("token-a", 0)
+
+
+def test_update_ignores_stale_reset_window(clock):
+    pool = TokenPool(["token-a"])
+    pool.update("token-a", "core", rate_limit_headers(50, clock.now + 600))
+    # 前のリセット周期のレスポンスが遅れて届いても残量を戻さない
+    pool.update("token-a", "core", rate_limit_headers(4000, clock.now + 10))
+    pool.update("token-a", "core", rate_limit_headers(4000, clock.now - 10))
+
+    assert pool.summary()["...en-a"]["core"] == 50
+
+
+def test_update_uses_resource_header(clock):
+    pool = TokenPool(["token-a"])
+    pool.update("token-a", "core", {**rate_limit_headers(0, clock.now + 60), "X-RateLimit-Resource": "graphql"})
+
+    assert pool.acquire("graphql")[0] is None
+    assert pool.acquire("core") == ("token-a", 0)
+
+
+def test_load_tokens_merges_list_and_named_variables(monkeypatch):
+    monkeypatch.setenv("GITHUB_TOKENS", "token-a, token-b,,")
+    monkeypatch.setenv("GITHUB_TOKEN", "token-b")
+    monkeypatch.setenv("GITHUB_TOKEN2", "token-c")
+
+    assert load_tokens("GITHUB_TOKEN", "GITHUB_TOKEN2", "UNSET_TOKEN") == ["token-a", "token-b", "token-c"]
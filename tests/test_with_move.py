@@ -0,0 +1,61 @@
+import ast
+import os
+from collections import defaultdict
+from datetime import timedelta
+
+import pandas as pd
+
+from conftest import run_script
+
+
+def load_all_developer_data(data_dir):
+    all_data = []
+    for file_name in sorted(os.listdir(data_dir)):
+        if file_name.endswith('.csv'):
+            developer = os.path.splitext(file_name)[0].split('_')[0]
+            df = pd.read_csv(os.path.join(data_dir, file_name))
+            df['developer'] = developer
+            all_data.append(df)
+    return pd.concat(all_data, ignore_index=True)
+
+
+def old_co_contributions(data_dir, time_window):
+    """
+    以前の with_move.py の iterrows による実装
+    """
+    df_all = load_all_developer_data(data_dir)
+    df_all['repository'] = df_all['repository_url'].str.extract(r'repos/([^/]+/[^/]+)')
+    df_all['created_at'] = pd.to_datetime(df_all['created_at'], errors='coerce')
+    df_all = df_all.dropna(subset=['created_at'])
+    df_all = df_all[['developer', 'repository', 'created_at']].sort_values(by=['developer', 'created_at'])
+
+    movement_groups = defaultdict(list)
+    for developer, group in df_all.groupby('developer'):
+        for _, row in group.iterrows():
+            current_repo = row['repository']
+            current_time = row['created_at']
+            recent_contributions = df_all[
+                (df_all['created_at'] >= current_time - time_window) &
+                (df_all['created_at'] <= current_time + time_window) &
+                (df_all['repository'] == current_repo) &
+                (df_all['developer'] != developer)
+            ]
+            for _, matched_row in recent_contributions.iterrows():
+                movement_groups[(developer, current_repo)].append(matched_row['developer'])
+
+    return pd.DataFrame([
+        {"developer": dev, "repository": repo, "co_contributors": sorted(set(developers)),
+         "co_count": len(set(developers))}
+        for (dev, repo), developers in movement_groups.items()
+    ])
+
+
+def test_with_move_matches_old_loop(results_dir):
+    run_script("movement/with_move.py", results_dir.parent / "movement")
+
+    new = pd.read_csv(results_dir / "5_co_contribution_analysis.csv")
+    new['co_contributors'] = new['co_contributors'].map(ast.literal_eval)
+    old = old_co_contributions(str(results_dir / "developer_data"), timedelta(days=5))
+
+    assert len(new) > 0
+    pd.testing.assert_frame_equal(new, old, check_dtype=False)